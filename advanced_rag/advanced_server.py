@@ -6,11 +6,18 @@ import sys
 sys.path.append('..')
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Dict, Any, List
 import uvicorn
 from langchain_rag import AdvancedRAGSystem
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from impact.shared.utils.streaming import encode_stream, media_type_for, STREAM_HEADERS
+from impact.shared.utils.single_flight import AsyncSingleFlight, flight_key
+from impact.shared.utils.http_client import get_transport
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Advanced Impact Intelligence Platform",
@@ -21,6 +28,9 @@ app = FastAPI(
 # Global RAG system instance
 rag_system = None
 
+# Identical concurrent searches share one retrieval + Gemini call
+search_flights = AsyncSingleFlight()
+
 class QueryRequest(BaseModel):
     query: str
     max_results: int = 5
@@ -54,7 +64,8 @@ async def root():
             "Semantic search with vector embeddings",
             "Langchain integration",
             "Advanced query understanding",
-            "Evidence-based insights"
+            "Evidence-based insights",
+            "Streaming answers (POST /search/stream)"
         ],
         "status": "ready" if rag_system else "initializing"
     }
@@ -78,7 +89,11 @@ async def search_query(request: QueryRequest):
         raise HTTPException(status_code=503, detail="RAG system not initialized")
     
     try:
-        result = rag_system.query(request.query)
+        # query() blocks, so it runs in the threadpool rather than on the event loop
+        result = await search_flights.do(
+            flight_key(request.query),
+            lambda: run_in_threadpool(rag_system.query, request.query)
+        )
         
         return QueryResponse(
             question=result['question'],
@@ -91,6 +106,28 @@ async def search_query(request: QueryRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query processing failed: {str(e)}")
 
+@app.post("/search/stream")
+async def search_query_stream(request: QueryRequest, format: str = "sse"):
+    """
+    Stream a search answer: an 'evidence' event with the source documents,
+    'token' events as the answer is generated, then 'done' or 'error'.
+    format=sse (default) for Server-Sent Events, format=ndjson for JSON lines.
+    """
+    if rag_system is None:
+        raise HTTPException(status_code=503, detail="RAG system not initialized")
+    
+    try:
+        media_type = media_type_for(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # The sync generator runs in Starlette's threadpool, off the event loop
+    return StreamingResponse(
+        encode_stream(rag_system.stream_query(request.query), format),
+        media_type=media_type,
+        headers=STREAM_HEADERS
+    )
+
 @app.post("/compare")
 async def compare_systems(request: QueryRequest):
     """Compare advanced and simple RAG systems"""
@@ -145,7 +182,9 @@ async def get_system_stats():
                 "Context-aware responses",
                 "Multi-document synthesis",
                 "Evidence attribution"
-            ]
+            ],
+            "request_coalescing": search_flights.get_stats(),
+            "http": get_transport().get_stats()
         }
         
     except Exception as e:
@@ -240,6 +240,45 @@ class RAGBenchmark:
         
         return results
     
+    def run_retrieval_benchmark(self, n_results: int = 5) -> Dict[str, Any]:
+        """Compare per-query retrieval against one batched retrieval over the whole suite"""
+        print(f"\n⚡ RETRIEVAL BATCHING BENCHMARK")
+        print("-" * 40)
+        
+        from vector_store import VectorStoreManager
+        manager = VectorStoreManager()
+        queries = [query_info['query'] for query_info in self.test_queries]
+        
+        # Warm up the model so neither run pays the first-call cost
+        manager.embedding_model.encode(queries[:1])
+        
+        start_time = time.time()
+        sequential_results = [manager.search_similar(query, n_results=n_results) for query in queries]
+        sequential_time = time.time() - start_time
+        
+        start_time = time.time()
+        batch_results = manager.search_similar_batch(queries, n_results=n_results)
+        batch_time = time.time() - start_time
+        
+        matching = sum(
+            1 for seq, batch in zip(sequential_results, batch_results)
+            if [r['id'] for r in seq] == [r['id'] for r in batch]
+        )
+        
+        retrieval_metrics = {
+            'query_count': len(queries),
+            'sequential_time': sequential_time,
+            'batch_time': batch_time,
+            'speedup': sequential_time / max(batch_time, 0.001),
+            'identical_results': matching
+        }
+        
+        print(f"   Sequential: {sequential_time:.3f}s for {len(queries)} queries")
+        print(f"   Batched:    {batch_time:.3f}s for {len(queries)} queries")
+        print(f"   Speedup:    {retrieval_metrics['speedup']:.1f}x ({matching}/{len(queries)} identical result lists)")
+        
+        return retrieval_metrics
+    
     def run_full_benchmark(self) -> Dict[str, Any]:
         """Run complete benchmark suite"""
         print("🏁 STARTING COMPREHENSIVE RAG BENCHMARK")
@@ -435,5 +474,6 @@ if __name__ == "__main__":
     benchmark = RAGBenchmark()
     results = benchmark.run_full_benchmark()
     benchmark.print_summary_report(results)
+    benchmark.run_retrieval_benchmark()
     
     print(f"\n✅ Benchmark complete! Check the results file for detailed analysis.")
\ No newline at end of file
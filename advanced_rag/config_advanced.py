@@ -14,20 +14,47 @@ SUPABASE_KEY = os.getenv('SUPABASE_KEY')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')  # Optional for embeddings
 
 # Vector Store Configuration
-VECTOR_STORE_TYPE = "chroma"  # or "faiss"
+VECTOR_STORE_TYPE = "chroma"  # "chroma", "numpy" (in-process exact search) or "faiss"
+NUMPY_STORE_DTYPE = "float32"  # Storage precision for the numpy store: float32, float16 or int8
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"  # Fast, good quality
+EMBEDDING_WORKERS = 1  # Processes used to embed during bulk (re)indexing; 0 = one per CPU
+EMBEDDING_BATCH_SIZE = 256  # Most texts in one encode batch (reached by short MCQ answers)
+EMBEDDING_TOKEN_BUDGET = 8192  # Most padded tokens (texts x longest text) in one encode batch
+EMBEDDING_BACKEND = "torch"  # "torch" (sentence-transformers) or "onnx" (int8 onnxruntime, no torch at query time)
 CHUNK_SIZE = 500
 CHUNK_OVERLAP = 50
 
+# Retrieval Configuration
+RETRIEVAL_MODE = "hybrid"  # "hybrid" (BM25 + dense, fused) or "dense"
+RETRIEVER_K = 4  # Evidence documents passed to the LLM in hybrid mode
+HYBRID_FETCH_K = 20  # Candidates taken from each leg before fusion
+HYBRID_FUSION = "rrf"  # "rrf" (reciprocal-rank fusion) or "weighted" (normalized scores)
+HYBRID_WEIGHTS = [1.0, 1.0]  # dense, lexical
+
 # Langchain Configuration
 LLM_MODEL = "gemini-1.5-flash"
 TEMPERATURE = 0.1
 MAX_TOKENS = 1000
 
+# Answer Cache Configuration
+ANSWER_CACHE_ENABLED = True
+ANSWER_CACHE_THRESHOLD = 0.92  # Cosine similarity above which a question reuses a cached answer
+ANSWER_CACHE_MAX_ENTRIES = 512  # LRU capacity
+ANSWER_CACHE_TTL = 3600  # Seconds
+ANSWER_CACHE_PATH = "./cache/answers.sqlite3"  # On-disk tier; None keeps answers in memory only
+
+# Sync Configuration
+CHANGE_FEED_OVERLAP_SECONDS = 60  # Re-read window behind the stored (updated_at, response_id) cursor
+PIPELINE_QUEUE_DEPTH = 2  # Batches buffered between the fetch, embed and write stages of bulk ingestion
+INGEST_PAGE_SIZE = 500  # Rows fetched per page when (re)building a vector store
+
 # Database Configuration
 DB_TABLE_RESPONSES = "responses"
 DB_TABLE_QUESTIONS = "questions"
 
 # Paths
 VECTOR_DB_PATH = "./vector_store"
-CACHE_PATH = "./cache"
\ No newline at end of file
+CACHE_PATH = "./cache"
+EMBEDDING_CACHE_PATH = "./cache/embeddings"  # Content-addressed embedding cache shared by all ingestion paths
+ONNX_MODEL_PATH = "./cache/onnx"  # Int8 ONNX exports for EMBEDDING_BACKEND = "onnx", created on first use
+CORPUS_VERSION_PATH = "./vector_store/corpus_version"  # Stamp bumped by every sync; scopes the answer cache
\ No newline at end of file
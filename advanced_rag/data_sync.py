@@ -4,18 +4,23 @@ Creates a safe snapshot of production data for experimentation
 """
 import os
 import sys
+import logging
 sys.path.append('..')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
 
-import requests
 import json
 from typing import List, Dict, Any
 from datetime import datetime
 from config_advanced import SUPABASE_URL, SUPABASE_KEY
+from impact.shared.utils.http_client import get_transport
+
+logger = logging.getLogger(__name__)
 
 class DataSynchronizer:
     def __init__(self):
         self.source_url = SUPABASE_URL
         self.source_key = SUPABASE_KEY
+        self.http = get_transport()
         self.snapshot_file = "data_snapshot.json"
         self.backup_file = f"data_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
     
@@ -38,7 +43,7 @@ class DataSynchronizer:
             "select": "*"
         }
         
-        response = requests.get(responses_url, headers=headers, params=responses_params)
+        response = self.http.get(responses_url, headers=headers, params=responses_params)
         if response.status_code == 200:
             data_snapshot['responses'] = response.json()
             print(f"  ✅ Fetched {len(data_snapshot['responses'])} responses")
@@ -52,7 +57,7 @@ class DataSynchronizer:
         questions_url = f"{self.source_url}/rest/v1/questions"
         questions_params = {"select": "*"}
         
-        response = requests.get(questions_url, headers=headers, params=questions_params)
+        response = self.http.get(questions_url, headers=headers, params=questions_params)
         if response.status_code == 200:
             data_snapshot['questions'] = response.json()
             print(f"  ✅ Fetched {len(data_snapshot['questions'])} questions")
@@ -82,6 +87,7 @@ class DataSynchronizer:
             print(f"  ❌ Failed to fetch questions: {response.status_code}")
             print(f"  Error details: {response.text}")
         
+        logger.debug(self.http.summary())
         return data_snapshot
     
     def save_snapshot(self, data: Dict[str, List[Dict]]):
@@ -9,14 +9,20 @@ sys.path.append('..')
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnablePassthrough, RunnableParallel
 from langchain_community.vectorstores import Chroma
 from langchain_community.embeddings import SentenceTransformerEmbeddings
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 import json
 from config_advanced import *
 from vector_store import VectorStoreManager
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from impact.advanced.hybrid_retriever import HybridRetriever
+from impact.advanced.numpy_langchain import NumpyLangChainStore
+from impact.shared.utils.answer_cache import SemanticAnswerCache, CorpusVersion
+from impact.shared.utils.onnx_encoder import EncoderEmbeddings
+
 class AdvancedRAGSystem:
     def __init__(self):
         self.vector_manager = VectorStoreManager()
@@ -24,7 +30,15 @@ class AdvancedRAGSystem:
         self.embeddings = None
         self.vectorstore = None
         self.retriever = None
+        self.retrieval_settings: Dict[str, Any] = {}
         self.rag_chain = None
+        self.answer_cache = SemanticAnswerCache(
+            threshold=ANSWER_CACHE_THRESHOLD,
+            max_entries=ANSWER_CACHE_MAX_ENTRIES,
+            ttl_seconds=ANSWER_CACHE_TTL,
+            path=ANSWER_CACHE_PATH
+        ) if ANSWER_CACHE_ENABLED else None
+        self.corpus_version = CorpusVersion(CORPUS_VERSION_PATH)
         self.setup_langchain_components()
     
     def setup_langchain_components(self):
@@ -41,9 +55,13 @@ class AdvancedRAGSystem:
         print("✅ LLM initialized")
         
         # Initialize embeddings
-        self.embeddings = SentenceTransformerEmbeddings(
-            model_name=EMBEDDING_MODEL
-        )
+        if EMBEDDING_BACKEND == "onnx":
+            # Share the vector manager's int8 ONNX encoder
+            self.embeddings = EncoderEmbeddings(self.vector_manager.embedding_model)
+        else:
+            self.embeddings = SentenceTransformerEmbeddings(
+                model_name=EMBEDDING_MODEL
+            )
         print("✅ Embeddings initialized")
         
         # Connect to existing vector store
@@ -53,22 +71,45 @@ class AdvancedRAGSystem:
         self.create_rag_chain()
     
     def setup_vectorstore(self):
-        """Setup Langchain vector store from existing ChromaDB"""
+        """Setup Langchain vector store from the existing ChromaDB or NumPy store"""
         print("🔗 Connecting to vector store...")
         
         try:
-            # Connect to existing ChromaDB
-            self.vectorstore = Chroma(
-                persist_directory=VECTOR_DB_PATH,
-                embedding_function=self.embeddings,
-                collection_name="survey_responses"
-            )
+            if VECTOR_STORE_TYPE == "numpy":
+                # Search the NumPy store the vector manager loaded, not a Chroma collection
+                self.vectorstore = NumpyLangChainStore(self.vector_manager.collection, self.embeddings)
+            else:
+                # Connect to existing ChromaDB
+                self.vectorstore = Chroma(
+                    persist_directory=VECTOR_DB_PATH,
+                    embedding_function=self.embeddings,
+                    collection_name="survey_responses"
+                )
             
             # Create retriever
-            self.retriever = self.vectorstore.as_retriever(
-                search_type="similarity",
-                search_kwargs={"k": 5}
-            )
+            if RETRIEVAL_MODE == "hybrid":
+                self.retrieval_settings = {
+                    'mode': RETRIEVAL_MODE,
+                    'k': RETRIEVER_K,
+                    'fetch_k': HYBRID_FETCH_K,
+                    'fusion': HYBRID_FUSION,
+                    'weights': list(HYBRID_WEIGHTS)
+                }
+                self.retriever = HybridRetriever.from_vectorstore(
+                    self.vectorstore,
+                    k=RETRIEVER_K,
+                    fetch_k=HYBRID_FETCH_K,
+                    fusion=HYBRID_FUSION,
+                    weights=HYBRID_WEIGHTS
+                )
+            else:
+                self.retrieval_settings = {'mode': RETRIEVAL_MODE, 'k': 5}
+                self.retriever = self.vectorstore.as_retriever(
+                    search_type="similarity",
+                    search_kwargs={"k": 5}
+                )
+            self.retrieval_settings.update(store=VECTOR_STORE_TYPE, embedding_model=EMBEDDING_MODEL,
+                                           embedding_backend=EMBEDDING_BACKEND)
             
             print(f"✅ Connected to vector store with {self.vectorstore._collection.count()} documents")
             
@@ -119,44 +160,138 @@ Response: {doc.page_content}
 """)
             return "\n".join(formatted)
         
-        self.rag_chain = (
-            {"context": self.retriever | format_docs, "question": RunnablePassthrough()}
+        # Retrieve once and carry the documents through, so the returned
+        # sources are exactly the context the LLM saw
+        self.answer_chain = (
+            RunnablePassthrough.assign(context=lambda x: format_docs(x["docs"]))
             | prompt
             | self.llm
             | StrOutputParser()
         )
         
+        self.rag_chain = RunnableParallel(
+            docs=self.retriever,
+            question=RunnablePassthrough()
+        ).assign(answer=self.answer_chain)
+        
         print("✅ RAG chain created successfully")
     
+    def format_sources(self, docs) -> List[Dict[str, Any]]:
+        """Source documents as returned to API clients"""
+        return [
+            {
+                'text': doc.page_content,
+                'metadata': doc.metadata,
+                'organization': doc.metadata.get('charity_name', 'Unknown'),
+                'age_group': doc.metadata.get('age_group', 'Unknown'),
+                'question_text': doc.metadata.get('question_text', 'Unknown')
+            }
+            for doc in docs
+        ]
+    
+    def answer_scope(self) -> Dict[str, Any]:
+        """Answers are only reused under the same LLM and retrieval settings"""
+        return {'system': 'advanced_langchain_rag', 'model': LLM_MODEL, 'retrieval': self.retrieval_settings}
+    
+    def lookup_answer(self, question: str) -> Tuple[Optional[List[float]], Optional[Dict[str, Any]]]:
+        """Embed the question and look for a near-duplicate cached answer"""
+        if self.answer_cache is None:
+            return None, None
+        
+        embedding = self.embeddings.embed_query(question)
+        hit = self.answer_cache.lookup(
+            embedding,
+            scope=self.answer_scope(),
+            corpus_version=self.corpus_version.current()
+        )
+        if hit is None:
+            return embedding, None
+        
+        print(f"💾 Answer cache hit ({hit['similarity']:.3f}): '{hit['question']}'")
+        return embedding, {
+            **hit['answer'],
+            'question': question,
+            'cached': True,
+            'cached_question': hit['question'],
+            'cache_similarity': hit['similarity']
+        }
+    
+    def remember_answer(self, question: str, embedding: Optional[List[float]], response: Dict[str, Any]):
+        """Cache a successful answer for near-duplicate questions"""
+        if self.answer_cache is None or embedding is None or 'error' in response:
+            return
+        
+        self.answer_cache.store(
+            question,
+            embedding,
+            response,
+            scope=self.answer_scope(),
+            corpus_version=self.corpus_version.current()
+        )
+    
+    def stream_query(self, question: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Stream a query as (event, data) pairs: 'evidence' as soon as retrieval
+        finishes, 'token' for each chunk of the answer, then 'done' or 'error'
+        """
+        print(f"🤔 Streaming query: '{question}'")
+        
+        try:
+            embedding, cached = self.lookup_answer(question)
+            if cached is not None:
+                yield 'evidence', {key: value for key, value in cached.items() if key != 'answer'}
+                yield 'token', {'text': cached['answer']}
+                yield 'done', {'evidence_count': cached['evidence_count'], 'answer_length': len(cached['answer']),
+                               'cached': True}
+                return
+            
+            relevant_docs = self.retriever.invoke(question)
+            evidence = {
+                'question': question,
+                'source_documents': self.format_sources(relevant_docs),
+                'evidence_count': len(relevant_docs),
+                'system_type': 'advanced_langchain_rag'
+            }
+            yield 'evidence', evidence
+            
+            answer = []
+            for chunk in self.answer_chain.stream({"docs": relevant_docs, "question": question}):
+                answer.append(chunk)
+                yield 'token', {'text': chunk}
+            
+            answer = ''.join(answer)
+            self.remember_answer(question, embedding, {**evidence, 'answer': answer})
+            print(f"✅ Streamed answer with {len(relevant_docs)} source documents")
+            yield 'done', {'evidence_count': len(relevant_docs), 'answer_length': len(answer)}
+            
+        except Exception as e:
+            print(f"❌ Streaming query failed: {str(e)}")
+            yield 'error', {'error': str(e)}
+    
     def query(self, question: str) -> Dict[str, Any]:
         """Process a query using the advanced RAG system"""
         print(f"🤔 Processing query: '{question}'")
         
         try:
-            # Get relevant documents first (for metadata)
-            relevant_docs = self.retriever.get_relevant_documents(question)
+            embedding, cached = self.lookup_answer(question)
+            if cached is not None:
+                return cached
             
-            # Generate answer using RAG chain
-            answer = self.rag_chain.invoke(question)
+            # Single retrieval: the chain returns the documents with the answer
+            result = self.rag_chain.invoke(question)
+            relevant_docs = result["docs"]
+            answer = result["answer"]
             
             # Format response
             response = {
                 'question': question,
                 'answer': answer,
-                'source_documents': [
-                    {
-                        'text': doc.page_content,
-                        'metadata': doc.metadata,
-                        'organization': doc.metadata.get('charity_name', 'Unknown'),
-                        'age_group': doc.metadata.get('age_group', 'Unknown'),
-                        'question_text': doc.metadata.get('question_text', 'Unknown')
-                    }
-                    for doc in relevant_docs
-                ],
+                'source_documents': self.format_sources(relevant_docs),
                 'evidence_count': len(relevant_docs),
                 'system_type': 'advanced_langchain_rag'
             }
             
+            self.remember_answer(question, embedding, response)
             print(f"✅ Generated answer with {len(relevant_docs)} source documents")
             return response
             
@@ -3,31 +3,53 @@ Vector Store Management - Step 2: Get vector storage working
 """
 import os
 import sys
+import logging
 sys.path.append('..')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
 
-import chromadb
-from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Generator, Tuple
 import json
-import requests
 from config_advanced import *
+from impact.shared.utils.embedding_cache import CachedEncoder
+from impact.shared.utils.http_client import get_transport
+from impact.shared.utils.answer_cache import bump_corpus_version
+from impact.shared.utils.ingest_pipeline import run_pipeline
+from impact.shared.utils.embedding_pool import EmbeddingPool
+from impact.shared.utils.onnx_encoder import load_embedding_model, embedding_loader
+from impact.advanced.numpy_vector_store import NumpyVectorStore
+
+logger = logging.getLogger(__name__)
 
 class VectorStoreManager:
-    def __init__(self):
-        self.embedding_model = SentenceTransformer(EMBEDDING_MODEL)
+    def __init__(self, workers: int = EMBEDDING_WORKERS):
+        self.embedding_model = load_embedding_model(EMBEDDING_MODEL, EMBEDDING_BACKEND, ONNX_MODEL_PATH)
+        # Bulk embedding goes through the pool (sharded across processes when
+        # workers > 1); queries keep using the in-process model
+        self.embedding_pool = EmbeddingPool(
+            EMBEDDING_MODEL, workers, EMBEDDING_BATCH_SIZE, EMBEDDING_TOKEN_BUDGET,
+            loader=embedding_loader(EMBEDDING_BACKEND, ONNX_MODEL_PATH),
+            model=self.embedding_model
+        )
+        self.encoder = CachedEncoder(EMBEDDING_MODEL, EMBEDDING_CACHE_PATH, model=self.embedding_pool,
+                                     backend=EMBEDDING_BACKEND)
+        self.http = get_transport()
         self.client = None
         self.collection = None
         self.setup_vector_store()
     
     def setup_vector_store(self):
-        """Initialize ChromaDB vector store"""
+        """Initialize the configured vector store (ChromaDB or in-process NumPy)"""
+        if VECTOR_STORE_TYPE == "numpy":
+            self.setup_numpy_store()
+            return
+        
         print("🔧 Setting up ChromaDB vector store...")
         
         # Create vector store directory
         os.makedirs(VECTOR_DB_PATH, exist_ok=True)
         
-        # Initialize ChromaDB client
+        # Initialize ChromaDB client (imported here so the NumPy backend runs without chromadb)
+        import chromadb
         self.client = chromadb.PersistentClient(path=VECTOR_DB_PATH)
         
         # Get or create collection
@@ -41,11 +63,43 @@ class VectorStoreManager:
             )
             print("✅ Created new collection")
     
+    def setup_numpy_store(self):
+        """Initialize the in-process NumPy exact-search store"""
+        print("🔧 Setting up NumPy vector store...")
+        
+        numpy_path = os.path.join(VECTOR_DB_PATH, "numpy")
+        self.collection = NumpyVectorStore.load_or_create(
+            numpy_path,
+            "survey_responses",
+            dtype=NUMPY_STORE_DTYPE,
+            metadata={"description": "Survey responses with embeddings"}
+        )
+        print(f"✅ Loaded NumPy store with {self.collection.count()} documents ({self.collection.dtype})")
+    
+    def reset_collection(self):
+        """Remove all documents from the configured vector store"""
+        if isinstance(self.collection, NumpyVectorStore):
+            self.collection.reset()
+            return
+        
+        self.client.delete_collection("survey_responses")
+        self.collection = self.client.create_collection("survey_responses")
+    
+    def flush_collection(self):
+        """Write pending NumPy store changes to disk (ChromaDB persists on every write)"""
+        if isinstance(self.collection, NumpyVectorStore):
+            self.collection.flush()
+    
+    def find_snapshot_file(self) -> Optional[str]:
+        """Location of a local data snapshot, if there is one"""
+        snapshot_file = "data_snapshot.json"
+        return snapshot_file if os.path.exists(snapshot_file) else None
+    
     def fetch_survey_data(self) -> List[Dict]:
         """Fetch survey data from snapshot or Supabase"""
         # Try to load from snapshot first
-        snapshot_file = "data_snapshot.json"
-        if os.path.exists(snapshot_file):
+        snapshot_file = self.find_snapshot_file()
+        if snapshot_file:
             print(f"📥 Loading survey data from snapshot: {snapshot_file}")
             with open(snapshot_file, 'r') as f:
                 data = json.load(f)
@@ -65,16 +119,71 @@ class VectorStoreManager:
         
         params = {"select": "*"}
         
-        response = requests.get(url, headers=headers, params=params)
+        response = self.http.get(url, headers=headers, params=params)
         
         if response.status_code == 200:
             data = response.json()
             print(f"✅ Fetched {len(data)} survey responses")
+            logger.debug(self.http.summary())
             return data
         else:
             print(f"❌ Failed to fetch data: {response.status_code}")
             return []
     
+    def iter_survey_pages(self, page_size: int = INGEST_PAGE_SIZE) -> Generator[List[Dict], None, None]:
+        """Survey data in pages: slices of the snapshot, or Supabase keyset pages by response_id"""
+        snapshot_file = self.find_snapshot_file()
+        if snapshot_file:
+            responses = self.fetch_survey_data()
+            for start in range(0, len(responses), page_size):
+                yield responses[start:start + page_size]
+            return
+        
+        print("📥 Streaming survey data from Supabase...")
+        headers = {
+            "apikey": SUPABASE_KEY,
+            "Authorization": f"Bearer {SUPABASE_KEY}",
+            "Content-Type": "application/json"
+        }
+        
+        last_id = None
+        while True:
+            params = {"select": "*", "order": "response_id.asc", "limit": page_size}
+            if last_id is not None:
+                params["response_id"] = f"gt.{last_id}"
+            
+            response = self.http.get(f"{SUPABASE_URL}/rest/v1/responses", headers=headers, params=params)
+            if response.status_code != 200:
+                raise RuntimeError(f"Failed to fetch data: {response.status_code}")
+            
+            page = response.json()
+            if page:
+                yield page
+            if len(page) < page_size:
+                break
+            last_id = page[-1]["response_id"]
+    
+    def embed_documents_page(self, survey_page: List[Dict]) -> Tuple[List[Dict], List[List[float]]]:
+        """Prepare and embed one page of survey data (the pipeline's embed stage)"""
+        documents = self.prepare_documents(survey_page)
+        texts = [doc['text'] for doc in documents]
+        # Only texts missing from the cache hit the model
+        embeddings = self.encoder.encode(texts).tolist() if texts else []
+        return documents, embeddings
+    
+    def write_documents_page(self, page: Tuple[List[Dict], List[List[float]]]):
+        """Add one embedded page to the collection (the pipeline's write stage)"""
+        documents, embeddings = page
+        if not documents:
+            return
+        
+        self.collection.add(
+            ids=[doc['id'] for doc in documents],
+            documents=[doc['text'] for doc in documents],
+            embeddings=embeddings,
+            metadatas=[doc['metadata'] for doc in documents]
+        )
+    
     def prepare_documents(self, survey_data: List[Dict]) -> List[Dict]:
         """Prepare documents for vector storage"""
         print("📝 Preparing documents for embedding...")
@@ -106,10 +215,13 @@ class VectorStoreManager:
             # Create document
             question_info = item.get('questions', {}) or {}
             
+            doc_id = str(item.get('response_id', item.get('id', 'unknown')))
             doc = {
-                'id': str(item.get('response_id', item.get('id', 'unknown'))),
+                'id': doc_id,
                 'text': response_text,
                 'metadata': {
+                    # Lets the hybrid retriever match this response across its legs
+                    'response_id': doc_id,
                     'charity_name': item.get('charity_name', ''),
                     'age_group': item.get('age_group', ''),
                     'gender': item.get('gender', ''),
@@ -138,9 +250,10 @@ class VectorStoreManager:
         texts = [doc['text'] for doc in documents]
         metadatas = [doc['metadata'] for doc in documents]
         
-        # Generate embeddings
+        # Generate embeddings (only texts missing from the cache hit the model)
         print("🧠 Generating embeddings...")
-        embeddings = self.embedding_model.encode(texts).tolist()
+        embeddings = self.encoder.encode(texts).tolist()
+        print(self.encoder.summary())
         
         # Add to collection
         self.collection.add(
@@ -149,36 +262,74 @@ class VectorStoreManager:
             embeddings=embeddings,
             metadatas=metadatas
         )
+        self.flush_collection()
         
         print(f"✅ Added {len(documents)} documents to vector store")
         print(f"Total documents in collection: {self.collection.count()}")
     
-    def search_similar(self, query: str, n_results: int = 5) -> List[Dict]:
+    def build_where_filter(self, filters: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Convert a simple {field: value} filter dict into a ChromaDB where clause"""
+        if not filters:
+            return None
+        
+        clauses = []
+        for field, value in filters.items():
+            if value is None:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                clauses.append({field: {"$in": list(value)}})
+            else:
+                clauses.append({field: value})
+        
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+    
+    def search_similar(self, query: str, n_results: int = 5,
+                       filters: Optional[Dict[str, Any]] = None) -> List[Dict]:
         """Search for similar documents"""
         print(f"🔍 Searching for: '{query}'")
         
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode([query]).tolist()
+        formatted_results = self.search_similar_batch([query], n_results=n_results, filters=filters)[0]
         
-        # Search in vector store
+        print(f"✅ Found {len(formatted_results)} similar documents")
+        return formatted_results
+    
+    def search_similar_batch(self, queries: List[str], n_results: int = 5,
+                             filters: Optional[Dict[str, Any]] = None) -> List[List[Dict]]:
+        """
+        Search for several queries at once.
+        All queries are embedded in one forward pass and scored in a single
+        vector store call; results are returned per query in input order.
+        """
+        if not queries:
+            return []
+        
+        # Generate all query embeddings in one forward pass
+        query_embeddings = self.embedding_model.encode(list(queries)).tolist()
+        
+        # Search in vector store with every query in the same call
         results = self.collection.query(
-            query_embeddings=query_embedding,
+            query_embeddings=query_embeddings,
             n_results=n_results,
+            where=self.build_where_filter(filters),
             include=['documents', 'metadatas', 'distances']
         )
         
         # Format results
-        formatted_results = []
-        for i in range(len(results['ids'][0])):
-            formatted_results.append({
-                'id': results['ids'][0][i],
-                'text': results['documents'][0][i],
-                'metadata': results['metadatas'][0][i],
-                'similarity_score': 1 - results['distances'][0][i]  # Convert distance to similarity
-            })
+        batch_results = []
+        for q in range(len(queries)):
+            formatted_results = []
+            for i in range(len(results['ids'][q])):
+                formatted_results.append({
+                    'id': results['ids'][q][i],
+                    'text': results['documents'][q][i],
+                    'metadata': results['metadatas'][q][i],
+                    'similarity_score': 1 - results['distances'][q][i]  # Convert distance to similarity
+                })
+            batch_results.append(formatted_results)
         
-        print(f"✅ Found {len(formatted_results)} similar documents")
-        return formatted_results
+        return batch_results
     
     def test_vector_search(self):
         """Test vector search functionality"""
@@ -193,9 +344,11 @@ class VectorStoreManager:
             "overcoming challenges and resilience"
         ]
         
-        for query in test_queries:
+        # Run all test queries as one batch
+        batch_results = self.search_similar_batch(test_queries, n_results=3)
+        
+        for query, results in zip(test_queries, batch_results):
             print(f"\nQuery: '{query}'")
-            results = self.search_similar(query, n_results=3)
             
             for i, result in enumerate(results):
                 print(f"  {i+1}. Score: {result['similarity_score']:.3f}")
@@ -215,16 +368,31 @@ class VectorStoreManager:
                 return
             
             # Clear existing data
-            self.client.delete_collection("survey_responses")
-            self.collection = self.client.create_collection("survey_responses")
+            self.reset_collection()
         
-        # Fetch and process data
-        survey_data = self.fetch_survey_data()
-        if not survey_data:
+        # Fetch, embed and write overlap: the next page downloads and the
+        # previous one is written while the current page is embedding
+        try:
+            pipeline = run_pipeline(
+                self.iter_survey_pages(),
+                self.embed_documents_page,
+                self.write_documents_page,
+                queue_depth=PIPELINE_QUEUE_DEPTH
+            )
+        finally:
+            # Pages are written in memory; save them once for the whole run
+            self.flush_collection()
+            self.embedding_pool.close()
+        print(pipeline.summary())
+        print(self.embedding_pool.summary())
+        print(self.encoder.summary())
+        if pipeline.stages["fetch"].records == 0:
+            print("❌ No survey data to add")
             return
+        print(f"Total documents in collection: {self.collection.count()}")
         
-        documents = self.prepare_documents(survey_data)
-        self.add_documents_to_vector_store(documents)
+        # Cached answers were generated from the previous corpus
+        bump_corpus_version(CORPUS_VERSION_PATH)
         
         # Test the populated store
         self.test_vector_search()
@@ -232,5 +400,11 @@ class VectorStoreManager:
         print("\n✅ Vector store population complete!")
 
 if __name__ == "__main__":
-    manager = VectorStoreManager()
+    import argparse
+    parser = argparse.ArgumentParser(description="Populate the vector store")
+    parser.add_argument("--workers", type=int, default=EMBEDDING_WORKERS,
+                        help="Embedding processes (0 = one per CPU)")
+    args = parser.parse_args()
+    
+    manager = VectorStoreManager(workers=args.workers)
     manager.populate_vector_store()
\ No newline at end of file
@@ -7,7 +7,7 @@ import sys
 sys.path.append('..')
 
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, Any, List
 import uvicorn
@@ -17,6 +17,9 @@ from datetime import datetime
 # Import our conversational RAG system
 from conversational_rag import ConversationalRAGSystem
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+from impact.shared.utils.streaming import encode_stream, media_type_for, STREAM_HEADERS
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Advanced RAG System - Impact Intelligence",
@@ -314,7 +317,7 @@ async def get_chat_interface():
             showLoading(true);
             
             try {
-                const response = await fetch('/chat', {
+                const response = await fetch('/chat/stream', {
                     method: 'POST',
                     headers: {
                         'Content-Type': 'application/json',
@@ -325,18 +328,47 @@ async def get_chat_interface():
                     })
                 });
                 
-                const data = await response.json();
-                
-                if (response.ok) {
-                    // Add assistant response
-                    addMessage(data.message, 'assistant', {
-                        evidence_count: data.evidence_count,
-                        organizations: data.organizations,
-                        age_groups: data.age_groups,
-                        genders: data.genders
-                    });
-                } else {
+                if (!response.ok) {
                     addMessage('Sorry, I encountered an error processing your question. Please try again.', 'assistant');
+                    showLoading(false);
+                    return;
+                }
+                
+                // Evidence arrives first, then the answer token by token
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+                let contentDiv = null;
+                let answer = '';
+                
+                while (true) {
+                    const { value, done } = await reader.read();
+                    if (done) break;
+                    buffer += decoder.decode(value, { stream: true });
+                    
+                    const events = buffer.split('\\n\\n');
+                    buffer = events.pop();
+                    for (const raw of events) {
+                        const lines = raw.split('\\n');
+                        const event = lines[0].replace('event: ', '');
+                        const data = JSON.parse(lines[1].replace('data: ', ''));
+                        
+                        if (event === 'evidence') {
+                            showLoading(false);
+                            contentDiv = addMessage('', 'assistant', {
+                                evidence_count: data.evidence_count,
+                                organizations: data.organizations,
+                                age_groups: data.age_groups,
+                                genders: data.genders
+                            });
+                        } else if (event === 'token' && contentDiv) {
+                            answer += data.text;
+                            contentDiv.textContent = answer;
+                            contentDiv.parentElement.parentElement.scrollTop = contentDiv.parentElement.parentElement.scrollHeight;
+                        } else if (event === 'error') {
+                            addMessage('Sorry, I encountered an error processing your question. Please try again.', 'assistant');
+                        }
+                    }
                 }
             } catch (error) {
                 addMessage('Sorry, I\\'m having trouble connecting. Please check your connection and try again.', 'assistant');
@@ -368,6 +400,7 @@ async def get_chat_interface():
             
             messagesContainer.appendChild(messageDiv);
             messagesContainer.scrollTop = messagesContainer.scrollHeight;
+            return messageDiv.querySelector('.message-content');
         }
         
         function showLoading(show) {
@@ -443,6 +476,45 @@ async def chat_endpoint(request: ChatRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
 
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest, format: str = "sse"):
+    """
+    Stream a chat reply: an 'evidence' event with the retrieved sources and
+    metadata, then 'token' events as Gemini produces the answer, then 'done'.
+    format=sse (default) for Server-Sent Events, format=ndjson for JSON lines.
+    """
+    if rag_system is None:
+        raise HTTPException(status_code=503, detail="RAG system not initialized")
+    
+    try:
+        media_type = media_type_for(format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    def events():
+        evidence = {}
+        for event, data in rag_system.stream_chat(request.message):
+            if event == 'evidence':
+                evidence = data
+            elif event == 'done':
+                # Store in chat history once the answer is complete
+                chat_history.append({
+                    'timestamp': datetime.now().isoformat(),
+                    'session_id': request.session_id,
+                    'question': request.message,
+                    'answer': data['answer'],
+                    'evidence_count': data['evidence_count'],
+                    'organizations': evidence.get('organizations', []),
+                    'age_groups': evidence.get('age_groups', []),
+                    'genders': evidence.get('genders', [])
+                })
+                data = {**data, 'timestamp': datetime.now().isoformat(), 'session_id': request.session_id}
+            yield event, data
+    
+    # A sync generator is iterated in Starlette's threadpool, so the blocking
+    # retrieval and the Gemini stream never stall the event loop
+    return StreamingResponse(encode_stream(events(), format), media_type=media_type, headers=STREAM_HEADERS)
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
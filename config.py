@@ -11,6 +11,41 @@ SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 # Google AI configuration
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
+# On-disk embedding cache shared by all ingestion paths
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./cache/embeddings")
+
+# Seconds the questions table is served from memory before revalidation
+QUESTION_CACHE_TTL = int(os.getenv("QUESTION_CACHE_TTL", "300"))
+
+# Resolve charity/age/gender filters with local rules, calling the LLM only when unsure
+FILTER_FAST_PATH = os.getenv("FILTER_FAST_PATH", "true").lower() == "true"
+
+# Memo of LLM-parsed search parameters, keyed by question and catalog version (empty path: memory only)
+PARAMETER_CACHE_PATH = os.getenv("PARAMETER_CACHE_PATH", "./cache/query_parameters.sqlite3") or None
+PARAMETER_CACHE_MAX_ENTRIES = int(os.getenv("PARAMETER_CACHE_MAX_ENTRIES", "2048"))
+
+# Seconds of the responses change feed re-read behind the saved (updated_at, response_id) cursor
+CHANGE_FEED_OVERLAP_SECONDS = int(os.getenv("CHANGE_FEED_OVERLAP_SECONDS", "60"))
+
+# Async RAG pipeline: worker threads for blocking calls and per-stage timeouts (seconds)
+RAG_BLOCKING_WORKERS = int(os.getenv("RAG_BLOCKING_WORKERS", "16"))
+DECONSTRUCT_TIMEOUT = float(os.getenv("DECONSTRUCT_TIMEOUT", "15"))
+SEARCH_TIMEOUT = float(os.getenv("SEARCH_TIMEOUT", "10"))
+SYNTHESIS_TIMEOUT = float(os.getenv("SYNTHESIS_TIMEOUT", "45"))
+
+# Start an unfiltered search with a larger k alongside query deconstruction, then filter it locally
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "false").lower() == "true"
+SPECULATIVE_K = int(os.getenv("SPECULATIVE_K", "100"))
+SPECULATIVE_MIN_RESULTS = int(os.getenv("SPECULATIVE_MIN_RESULTS", "10"))
+
+# Local NumPy mirror of the responses table for facet-filtered search; only used when enabled,
+# and rebuilt in the background whenever the corpus version stamp changes
+LOCAL_INDEX_ENABLED = os.getenv("LOCAL_INDEX_ENABLED", "false").lower() == "true"
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "./vector_store/numpy")
+
+# Stamp bumped by every sync and enrichment run
+CORPUS_VERSION_PATH = os.getenv("CORPUS_VERSION_PATH", "./vector_store/corpus_version")
+
 # Validate required environment variables
 if not SUPABASE_URL:
     raise ValueError("SUPABASE_URL environment variable is required")
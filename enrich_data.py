@@ -5,13 +5,19 @@ This script processes raw survey data to generate embeddings and thematic tags.
 
 import asyncio
 import logging
+import os
+import sys
 from typing import List, Dict, Any
 from supabase import create_client
 from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
 from langchain.prompts import PromptTemplate
-from config import SUPABASE_URL, SUPABASE_KEY, GOOGLE_API_KEY
+from config import SUPABASE_URL, SUPABASE_KEY, GOOGLE_API_KEY, EMBEDDING_CACHE_PATH, CORPUS_VERSION_PATH
 import json
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from impact.shared.utils.embedding_cache import EmbeddingCache
+from impact.shared.utils.answer_cache import bump_corpus_version
+
 logger = logging.getLogger(__name__)
 
 # Initialize clients
@@ -20,6 +26,7 @@ embeddings = GoogleGenerativeAIEmbeddings(
     model="models/embedding-001",
     google_api_key=GOOGLE_API_KEY
 )
+embedding_cache = EmbeddingCache(EMBEDDING_CACHE_PATH, "models/embedding-001")
 llm = ChatGoogleGenerativeAI(
     model="gemini-pro",
     google_api_key=GOOGLE_API_KEY,
@@ -101,9 +108,16 @@ Confidence should be 0.0-1.0 based on how clearly the themes are expressed in th
 async def generate_embedding(text: str) -> List[float]:
     """
     Generate vector embedding for a text.
+    Texts already embedded on a previous run are served from the on-disk cache.
     """
     try:
+        cached = embedding_cache.get(text)
+        if cached is not None:
+            return cached.tolist()
+        
         embedding_vector = await embeddings.aembed_query(text)
+        if embedding_vector:
+            embedding_cache.put(text, embedding_vector)
         return embedding_vector
     except Exception as e:
         logger.error(f"Error generating embedding: {str(e)}")
@@ -207,6 +221,11 @@ async def enrich_all_responses(batch_size: int = 10):
             await asyncio.sleep(1)
         
         logger.info(f"Enrichment complete: {successful} successful, {failed} failed")
+        logger.info(embedding_cache.summary())
+        
+        if successful:
+            # New embeddings change the corpus: stale answer caches and local indexes are dropped
+            logger.info(f"Corpus version bumped to {bump_corpus_version(CORPUS_VERSION_PATH)}")
         
     except Exception as e:
         logger.error(f"Error in enrich_all_responses: {str(e)}")
@@ -1,7 +1,10 @@
 from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import List
-from rag_logic import find_evidence_for_query
+from rag_logic import (
+    find_evidence_for_query, query_flights, filter_extractor, parameter_cache, speculation_stats,
+    schedule_filter_values_refresh, FILTER_FAST_PATH
+)
 import logging
 
 # Configure logging
@@ -14,6 +17,12 @@ app = FastAPI(
     version="1.0.0"
 )
 
+@app.on_event("startup")
+async def warm_filter_values():
+    """Load the filter gazetteer in the background so early queries skip the Supabase scan"""
+    if FILTER_FAST_PATH:
+        schedule_filter_values_refresh()
+
 class QueryRequest(BaseModel):
     question: str
     
@@ -76,7 +85,14 @@ async def search_impact_data(request: QueryRequest):
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "Impact Intelligence Platform"}
+    return {
+        "status": "healthy",
+        "service": "Impact Intelligence Platform",
+        "request_coalescing": query_flights.get_stats(),
+        "filter_extraction": filter_extractor.get_stats(),
+        "parameter_cache": parameter_cache.get_stats(),
+        "speculative_retrieval": speculation_stats
+    }
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
 from langchain_community.vectorstores import SupabaseVectorStore
 from langchain.tools import Tool
@@ -9,7 +9,28 @@ from langchain.prompts import PromptTemplate
 from supabase import create_client, Client
 import json
 import logging
-from config import SUPABASE_URL, SUPABASE_KEY, GOOGLE_API_KEY
+import os
+import sys
+import time
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import (
+    SUPABASE_URL, SUPABASE_KEY, GOOGLE_API_KEY, QUESTION_CACHE_TTL, FILTER_FAST_PATH,
+    PARAMETER_CACHE_PATH, PARAMETER_CACHE_MAX_ENTRIES,
+    RAG_BLOCKING_WORKERS, DECONSTRUCT_TIMEOUT, SEARCH_TIMEOUT, SYNTHESIS_TIMEOUT,
+    SPECULATIVE_RETRIEVAL, SPECULATIVE_K, SPECULATIVE_MIN_RESULTS,
+    LOCAL_INDEX_ENABLED, LOCAL_INDEX_PATH, CORPUS_VERSION_PATH
+)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from impact.advanced.numpy_vector_store import NumpyVectorStore
+from impact.shared.utils.question_catalog import QuestionCatalog, describe_questions, contextual_questions
+from impact.shared.utils.single_flight import AsyncSingleFlight, flight_key
+from impact.shared.utils.filter_extractor import FilterExtractor, FILTER_FIELDS
+from impact.shared.utils.parameter_cache import ParameterCache
+from impact.shared.utils.answer_cache import CorpusVersion
 
 logger = logging.getLogger(__name__)
 
@@ -36,39 +57,158 @@ vector_store = SupabaseVectorStore(
     query_name="match_responses"
 )
 
-async def get_contextual_questions() -> List[Dict[str, Any]]:
+# Bounded pool for the remaining blocking calls (supabase-py, vector search),
+# so they never run on the event loop and cannot pile up unbounded threads
+blocking_executor = ThreadPoolExecutor(max_workers=RAG_BLOCKING_WORKERS, thread_name_prefix="rag-blocking")
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call on the bounded executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(blocking_executor, functools.partial(func, *args, **kwargs))
+
+# Optional local mirror of the responses table. When LOCAL_INDEX_ENABLED is set
+# and the mirror was built at the current corpus version, filtered searches
+# intersect facet bitmaps locally and only score the matching responses.
+LOCAL_INDEX_NAME = "responses"
+# PostgREST returns at most 1000 rows per request, so the mirror is read in pages
+LOCAL_INDEX_PAGE_SIZE = 1000
+
+corpus_version = CorpusVersion(CORPUS_VERSION_PATH)
+
+def load_local_index() -> Optional[NumpyVectorStore]:
+    """Load the local responses index if it is enabled and has been built."""
+    if not LOCAL_INDEX_ENABLED or not NumpyVectorStore.exists(LOCAL_INDEX_PATH, LOCAL_INDEX_NAME):
+        return None
+    store = NumpyVectorStore.load(LOCAL_INDEX_PATH, LOCAL_INDEX_NAME)
+    logger.info(f"Loaded local responses index with {store.count()} documents "
+                f"(corpus version {store.metadata.get('corpus_version')})")
+    return store
+
+local_index: Optional[NumpyVectorStore] = load_local_index()
+local_index_rebuild: Optional[threading.Thread] = None
+local_index_lock = threading.Lock()
+
+def current_local_index() -> Optional[NumpyVectorStore]:
     """
-    Fetch contextual questions from Supabase to use in tool definition.
-    These serve as our 'ground truth' proxy questions.
+    The local index, if enabled and built at the current corpus version.
+    A missing or stale mirror is ignored (searches go to Supabase) while it is
+    rebuilt in the background.
     """
+    if not LOCAL_INDEX_ENABLED:
+        return None
+    store = local_index
+    if store is not None and store.metadata.get("corpus_version") == corpus_version.current():
+        return store
+    schedule_local_index_rebuild()
+    return None
+
+def schedule_local_index_rebuild():
+    """Start a background rebuild of the local index unless one is already running."""
+    global local_index_rebuild
+    with local_index_lock:
+        if local_index_rebuild is not None and local_index_rebuild.is_alive():
+            return
+        logger.info("Local responses index is missing or stale, rebuilding in the background")
+        local_index_rebuild = threading.Thread(target=rebuild_local_index, name="local-index-rebuild", daemon=True)
+        local_index_rebuild.start()
+
+def rebuild_local_index():
     try:
-        response = supabase.table("questions").select("*").eq("outcome_measured", "contextual").execute()
-        return response.data
+        build_local_index()
     except Exception as e:
-        logger.error(f"Error fetching contextual questions: {str(e)}")
-        return []
+        logger.error(f"Local responses index rebuild failed: {str(e) or type(e).__name__}")
+
+def build_local_index() -> int:
+    """
+    Mirror enriched responses (with their stored embeddings) from Supabase into
+    the local index used for facet-filtered search, stamped with the corpus
+    version read before the fetch. Returns the document count.
+    """
+    global local_index
+    
+    # Read the version first: a sync during the fetch bumps it and marks this build stale
+    version = corpus_version.current()
+    rows = []
+    start = 0
+    while True:
+        page = supabase.table("responses").select("*, questions(question_text)") \
+            .not_.is_("embedding", "null").order("response_id") \
+            .range(start, start + LOCAL_INDEX_PAGE_SIZE - 1).execute().data
+        rows.extend(page)
+        if len(page) < LOCAL_INDEX_PAGE_SIZE:
+            break
+        start += LOCAL_INDEX_PAGE_SIZE
+    logger.info(f"Fetched {len(rows)} embedded responses in {start // LOCAL_INDEX_PAGE_SIZE + 1} pages")
+    
+    ids, vectors, texts, metadatas = [], [], [], []
+    for row in rows:
+        embedding = row["embedding"]
+        if isinstance(embedding, str):
+            embedding = json.loads(embedding)
+        
+        ids.append(str(row["response_id"]))
+        vectors.append(embedding)
+        texts.append(row["response_value"])
+        metadatas.append({
+            "response_id": row["response_id"],
+            "participant_id": row.get("participant_id"),
+            "charity_name": row.get("charity_name"),
+            "age_group": row.get("age_group"),
+            "gender": row.get("gender"),
+            "question_id": row.get("question_id"),
+            "question_text": row["questions"]["question_text"] if row.get("questions") else None,
+            "thematic_tags": row.get("thematic_tags") or []
+        })
+    
+    store = NumpyVectorStore(LOCAL_INDEX_PATH, LOCAL_INDEX_NAME, metadata={"corpus_version": version})
+    store.add(ids=ids, embeddings=vectors, documents=texts, metadatas=metadatas)
+    store.flush()
+    local_index = store
+    
+    logger.info(f"Built local responses index with {store.count()} documents at corpus version {version}")
+    return store.count()
+
+def load_questions(validator: Optional[str]):
+    """
+    Fetch the questions table for the catalog cache.
+    When the table has an updated_at column, revalidation first checks the row
+    count and latest updated_at and skips the full fetch if neither changed.
+    """
+    if validator:
+        latest = supabase.table("questions").select("updated_at", count="exact").order("updated_at", desc=True).limit(1).execute()
+        if latest.data and f"{latest.count}|{latest.data[0]['updated_at']}" == validator:
+            return None, validator
+    
+    response = supabase.table("questions").select("*").execute()
+    questions = response.data
+    
+    stamps = [q["updated_at"] for q in questions if q.get("updated_at")]
+    return questions, (f"{len(questions)}|{max(stamps)}" if stamps else None)
+
+# Process-wide questions cache with prebuilt lookups
+question_catalog = QuestionCatalog(load_questions, ttl_seconds=QUESTION_CACHE_TTL)
+
+async def get_contextual_questions() -> List[Dict[str, Any]]:
+    """
+    Contextual questions to use in tool definition (served from the catalog cache).
+    These serve as our 'ground truth' proxy questions.
+    """
+    return await run_blocking(question_catalog.contextual)
 
 class SearchParameters(BaseModel):
     """Structured parameters for database search."""
-    charity_name: Optional[str] = Field(None, description="Filter by specific charity/organization")
-    age_group: Optional[str] = Field(None, description="Filter by participant age group")
+    charity_name: Optional[Union[str, List[str]]] = Field(None, description="Filter by charity/organization; a list matches any of them")
+    age_group: Optional[Union[str, List[str]]] = Field(None, description="Filter by participant age group; a list matches any of them")
     gender: Optional[str] = Field(None, description="Filter by participant gender")
-    question_ids: Optional[List[str]] = Field(None, description="List of specific question IDs to focus on")
+    question_ids: Optional[List[str]] = Field(None, description="List of specific question IDs to focus on (any of them)")
     thematic_query: Optional[str] = Field(None, description="Core concept/theme to search for (used for semantic similarity)")
 
-async def create_search_tool_schema() -> Dict[str, Any]:
+def build_search_tool_schema(questions: List[Dict[str, Any]]) -> Dict[str, Any]:
     """
-    Create a tool schema for LLM function calling.
+    Build the tool schema for LLM function calling.
     Dynamically includes contextual questions in the description.
     """
-    contextual_questions = await get_contextual_questions()
-    
-    # Build dynamic description including contextual questions
-    contextual_desc = "\n".join([
-        f"- {q['question_id']}: {q['question_text']}" + 
-        (f" (Options: {q['mcq_options']})" if q['mcq_options'] else "")
-        for q in contextual_questions
-    ])
+    contextual_desc = describe_questions(contextual_questions(questions), include_options=True)
     
     tool_schema = {
         "name": "search_database",
@@ -86,35 +226,134 @@ Focus on identifying relevant demographic filters and thematic concepts.
     
     return tool_schema
 
+async def create_search_tool_schema() -> Dict[str, Any]:
+    """Tool schema for LLM function calling, rebuilt only when the questions change."""
+    # Off the loop: an expired catalog revalidates against Supabase
+    return await run_blocking(question_catalog.derived, "search_tool_schema", build_search_tool_schema)
+
+def metadata_filter_to_where(metadata_filter: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Convert the flat metadata filter into a facet where clause (AND of fields, $in for lists)."""
+    clauses = [
+        {field: {"$in": value} if isinstance(value, list) else value}
+        for field, value in metadata_filter.items()
+    ]
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def search_local_index(index: NumpyVectorStore, query_text: str, where: Optional[Dict[str, Any]],
+                       k: int = 20) -> List[Document]:
+    """
+    Facet-filtered exact search over the local responses index.
+    The facet bitmaps are intersected first, so only matching responses are scored.
+    """
+    if query_text:
+        query_embedding = embeddings.embed_query(query_text)
+        results = index.query(query_embeddings=[query_embedding], n_results=k, where=where)
+        rows = zip(results["documents"][0], results["metadatas"][0], results["distances"][0])
+        return [
+            Document(page_content=text, metadata={**metadata, "similarity": 1 - distance})
+            for text, metadata, distance in rows
+        ]
+    
+    # No thematic query: filtered results in default order
+    results = index.get(where=where, limit=k)
+    return [
+        Document(page_content=text, metadata=metadata)
+        for text, metadata in zip(results["documents"], results["metadatas"])
+    ]
+
+def filter_values(value: Union[str, List[str], None]) -> List[str]:
+    """Distinct non-empty values of a single- or multi-valued parameter, in order."""
+    values = value if isinstance(value, list) else [value]
+    return list(dict.fromkeys(v for v in values if v))
+
+def build_metadata_filter(search_params: SearchParameters) -> Dict[str, Any]:
+    """
+    Flat filter from the extracted search parameters: fields are ANDed, and a
+    field with several values (e.g. question_ids) matches any of them.
+    """
+    metadata_filter = {}
+    for field, value in [
+        ("charity_name", search_params.charity_name),
+        ("age_group", search_params.age_group),
+        ("gender", search_params.gender),
+        ("question_id", search_params.question_ids),
+    ]:
+        values = filter_values(value)
+        if values:
+            metadata_filter[field] = values[0] if len(values) == 1 else values
+    return metadata_filter
+
+def search_vector_store(query_text: str, metadata_filter: Dict[str, Any], k: int = 20) -> List[Document]:
+    """Blocking vector search against the local index or SupabaseVectorStore."""
+    index = current_local_index()
+    if index is not None:
+        # Local facet index: intersect filter bitmaps, then score only the candidates
+        return search_local_index(index, query_text, metadata_filter_to_where(metadata_filter), k=k)
+    
+    # Always use vector store similarity search - it handles both cases:
+    # 1. With thematic_query: true semantic similarity search
+    # 2. Without thematic_query: filtered results with default ordering
+    return vector_store.similarity_search(
+        query=query_text,
+        k=k,  # Retrieve top 20 most relevant by default
+        filter=metadata_filter if metadata_filter else None
+    )
+
+async def search_with_filters(query_text: str, metadata_filter: Dict[str, Any], k: int = 20) -> List[Document]:
+    """
+    Filtered vector search in one call. Multi-valued filters are passed through
+    as lists: the local index evaluates them as $in, and match_responses binds
+    them as arrays and matches any value (match_filter_values).
+    """
+    logger.info(f"Search: {metadata_filter or 'unfiltered'}")
+    return await run_blocking(search_vector_store, query_text, metadata_filter, k)
+
+def search_database(search_params: SearchParameters) -> List[Document]:
+    """Blocking direct database query used when vector search fails (IN for multi-valued filters)."""
+    query = supabase.table("responses").select("*, questions(*)")
+    
+    metadata_filter = build_metadata_filter(search_params)
+    for field, value in metadata_filter.items():
+        query = query.in_(field, value) if isinstance(value, list) else query.eq(field, value)
+    logger.info(f"Fallback query: {metadata_filter or 'unfiltered'}")
+        
+    response = query.limit(20).execute()
+    
+    documents = []
+    for row in response.data:
+        doc = Document(
+            page_content=row["response_value"],
+            metadata={
+                "response_id": row["response_id"],
+                "participant_id": row["participant_id"],
+                "charity_name": row["charity_name"],
+                "age_group": row["age_group"],
+                "gender": row["gender"],
+                "question_id": row["question_id"],
+                "question_text": row["questions"]["question_text"] if row["questions"] else None,
+                "thematic_tags": row.get("thematic_tags", [])
+            }
+        )
+        documents.append(doc)
+    return documents
+
 async def execute_hybrid_search(search_params: SearchParameters) -> List[Document]:
     """
     Execute unified hybrid search using Langchain's SupabaseVectorStore.
     Always uses similarity_search with metadata filtering for consistent behavior.
+    Runs on the bounded executor with a SEARCH_TIMEOUT budget.
     """
     try:
-        # Build metadata filter
-        metadata_filter = {}
-        if search_params.charity_name:
-            metadata_filter["charity_name"] = search_params.charity_name
-        if search_params.age_group:
-            metadata_filter["age_group"] = search_params.age_group
-        if search_params.gender:
-            metadata_filter["gender"] = search_params.gender
-        if search_params.question_ids and len(search_params.question_ids) > 0:
-            # For multiple question IDs, take the first one
-            # TODO: Enhance to handle multiple question IDs with OR logic
-            metadata_filter["question_id"] = search_params.question_ids[0]
+        metadata_filter = build_metadata_filter(search_params)
         
         # Use thematic_query or empty string for unified search path
         query_text = search_params.thematic_query or ""
         
-        # Always use vector store similarity search - it handles both cases:
-        # 1. With thematic_query: true semantic similarity search
-        # 2. Without thematic_query: filtered results with default ordering
-        documents = vector_store.similarity_search(
-            query=query_text,
-            k=20,  # Retrieve top 20 most relevant
-            filter=metadata_filter if metadata_filter else None
+        documents = await asyncio.wait_for(
+            search_with_filters(query_text, metadata_filter),
+            timeout=SEARCH_TIMEOUT
         )
         
         logger.info(f"Retrieved {len(documents)} documents from hybrid search")
@@ -123,53 +362,125 @@ async def execute_hybrid_search(search_params: SearchParameters) -> List[Documen
         return documents
         
     except Exception as e:
-        logger.error(f"Error in hybrid search: {str(e)}")
+        logger.error(f"Error in hybrid search: {str(e) or type(e).__name__}")
         # Fallback to direct database query if vector search fails
         try:
             logger.info("Attempting fallback to direct database query")
-            query = supabase.table("responses").select("*, questions(*)")
-            
-            if search_params.charity_name:
-                query = query.eq("charity_name", search_params.charity_name)
-            if search_params.age_group:
-                query = query.eq("age_group", search_params.age_group)
-            if search_params.gender:
-                query = query.eq("gender", search_params.gender)
-            if search_params.question_ids and len(search_params.question_ids) > 0:
-                query = query.eq("question_id", search_params.question_ids[0])
-                
-            response = query.limit(20).execute()
-            
-            documents = []
-            for row in response.data:
-                doc = Document(
-                    page_content=row["response_value"],
-                    metadata={
-                        "response_id": row["response_id"],
-                        "participant_id": row["participant_id"],
-                        "charity_name": row["charity_name"],
-                        "age_group": row["age_group"],
-                        "gender": row["gender"],
-                        "question_id": row["question_id"],
-                        "question_text": row["questions"]["question_text"] if row["questions"] else None,
-                        "thematic_tags": row.get("thematic_tags", [])
-                    }
-                )
-                documents.append(doc)
+            documents = await asyncio.wait_for(
+                run_blocking(search_database, search_params),
+                timeout=SEARCH_TIMEOUT
+            )
             
             logger.info(f"Fallback query retrieved {len(documents)} documents")
             return documents
             
         except Exception as fallback_error:
-            logger.error(f"Fallback query also failed: {str(fallback_error)}")
+            logger.error(f"Fallback query also failed: {str(fallback_error) or type(fallback_error).__name__}")
             return []
 
+# Gazetteer and catalog question topics for the rule-based filter fast path,
+# loaded in the background and reloaded on the question catalog TTL. Until the
+# first load succeeds every question goes to the LLM.
+filter_extractor = FilterExtractor()
+filter_values_ready = False
+filter_values_loaded_at: Optional[float] = None
+filter_values_refresh: Optional[threading.Thread] = None
+filter_values_lock = threading.Lock()
+FILTER_VALUES_PAGE_SIZE = 1000
+
+def load_filter_values() -> Dict[str, List[str]]:
+    """Distinct charity/age/gender values, from the local index when built, else from Supabase."""
+    index = current_local_index()
+    if index is not None:
+        return {field: index.facets.values(field) for field in FILTER_FIELDS}
+    
+    values = {field: set() for field in FILTER_FIELDS}
+    start = 0
+    while True:
+        rows = supabase.table("responses").select(", ".join(FILTER_FIELDS)) \
+            .range(start, start + FILTER_VALUES_PAGE_SIZE - 1).execute().data
+        for row in rows:
+            for field in FILTER_FIELDS:
+                if row.get(field):
+                    values[field].add(row[field])
+        if len(rows) < FILTER_VALUES_PAGE_SIZE:
+            break
+        start += FILTER_VALUES_PAGE_SIZE
+    return {field: sorted(field_values) for field, field_values in values.items()}
+
+def refresh_filter_values():
+    """Reload the gazetteer and topics (on the refresh thread); keeps the old ones on error."""
+    global filter_values_ready, filter_values_loaded_at
+    
+    try:
+        filter_extractor.set_values(load_filter_values())
+        # Questions about a contextual question's topic need the LLM to target question_ids
+        filter_extractor.set_topics({q['question_id']: q['question_text'] for q in question_catalog.contextual()})
+        filter_values_ready = True
+    except Exception as e:
+        logger.error(f"Error loading filter values: {str(e)}")
+    finally:
+        filter_values_loaded_at = time.monotonic()
+
+def schedule_filter_values_refresh():
+    """
+    Start a background reload of the gazetteer when it has never been loaded or
+    QUESTION_CACHE_TTL has passed, unless one is already running. Call at
+    startup to warm it before the first request.
+    """
+    global filter_values_refresh
+    with filter_values_lock:
+        if filter_values_loaded_at is not None and time.monotonic() - filter_values_loaded_at < QUESTION_CACHE_TTL:
+            return
+        if filter_values_refresh is not None and filter_values_refresh.is_alive():
+            return
+        filter_values_refresh = threading.Thread(target=refresh_filter_values, name="filter-values-refresh", daemon=True)
+        filter_values_refresh.start()
+
+async def deconstruct_query(user_question: str) -> SearchParameters:
+    """
+    Structured parameters for a question. Common questions are resolved by the
+    local gazetteer rules in microseconds; the LLM is only called when they are
+    unsure or the question is about a contextual question, which it maps to question_ids.
+    """
+    if FILTER_FAST_PATH:
+        schedule_filter_values_refresh()
+        if not filter_values_ready:
+            logger.info("Filter fast path skipped: gazetteer still loading")
+        else:
+            extracted = filter_extractor.extract(user_question)
+            if extracted['confident']:
+                return SearchParameters(
+                    charity_name=extracted['charity_name'],
+                    age_group=extracted['age_group'],
+                    gender=extracted['gender'],
+                    thematic_query=" ".join(extracted['themes'])
+                )
+            logger.info(f"Filter fast path declined: {extracted['reason']}")
+    
+    return await deconstruct_query_with_llm(user_question)
+
+# Parsed SearchParameters for questions the LLM has already deconstructed
+parameter_cache = ParameterCache("rag_logic", PARAMETER_CACHE_PATH, PARAMETER_CACHE_MAX_ENTRIES)
+
+def remember_parameters(user_question: str, catalog_version: Optional[str], arguments: Dict[str, Any]) -> SearchParameters:
+    """Validate the LLM's arguments and cache the parsed parameters."""
+    params = SearchParameters(**arguments)
+    parameter_cache.put(user_question, catalog_version, params.model_dump())
+    return params
+
 async def deconstruct_query_with_llm(user_question: str) -> SearchParameters:
     """
     Use LLM with direct function calling to deconstruct user query into structured parameters.
     Modern approach using .bind() for more reliable function calling.
+    Repeat questions are served from the parameter cache until the contextual questions change.
     """
     try:
+        catalog_version = await run_blocking(question_catalog.contextual_version)
+        cached = parameter_cache.get(user_question, catalog_version)
+        if cached is not None:
+            return SearchParameters(**cached)
+        
         # Get the tool schema
         tool_schema = await create_search_tool_schema()
         
@@ -192,15 +503,15 @@ Examples:
 - "Show me stories about overcoming challenges" → thematic_query: "overcoming challenges resilience growth"
 """
         
-        # Invoke the LLM with function calling
-        response = llm_with_tools.invoke(prompt)
+        # Invoke the LLM with function calling (native async, bounded by DECONSTRUCT_TIMEOUT)
+        response = await asyncio.wait_for(llm_with_tools.ainvoke(prompt), timeout=DECONSTRUCT_TIMEOUT)
         
         # Extract function call arguments
         if hasattr(response, 'additional_kwargs') and 'function_call' in response.additional_kwargs:
             function_call = response.additional_kwargs['function_call']
             if function_call['name'] == 'search_database':
                 arguments = json.loads(function_call['arguments'])
-                return SearchParameters(**arguments)
+                return remember_parameters(user_question, catalog_version, arguments)
         
         # Fallback: try to parse from response content
         if hasattr(response, 'content'):
@@ -212,7 +523,7 @@ Examples:
                     end = content.rfind('}') + 1
                     json_str = content[start:end]
                     arguments = json.loads(json_str)
-                    return SearchParameters(**arguments)
+                    return remember_parameters(user_question, catalog_version, arguments)
             except:
                 pass
         
@@ -220,6 +531,9 @@ Examples:
         logger.warning(f"Could not extract structured parameters, using basic thematic query")
         return SearchParameters(thematic_query=user_question)
             
+    except asyncio.TimeoutError:
+        logger.warning(f"Query deconstruction timed out after {DECONSTRUCT_TIMEOUT}s, using basic thematic query")
+        return SearchParameters(thematic_query=user_question)
     except Exception as e:
         logger.error(f"Error in query deconstruction: {str(e)}")
         return SearchParameters(thematic_query=user_question)
@@ -279,16 +593,80 @@ Format your response as a professional briefing that demonstrates clear impact a
             evidence_count=len(evidence_docs)
         )
         
-        response = llm.invoke(formatted_prompt)
+        response = await asyncio.wait_for(llm.ainvoke(formatted_prompt), timeout=SYNTHESIS_TIMEOUT)
         return response.content
         
+    except asyncio.TimeoutError:
+        logger.error(f"Synthesis timed out after {SYNTHESIS_TIMEOUT}s")
+        return f"Based on {len(evidence_docs)} pieces of evidence, I found relevant information about your query, but the answer took too long to generate. Please try again."
     except Exception as e:
         logger.error(f"Error in synthesis: {str(e)}")
         return f"Based on {len(evidence_docs)} pieces of evidence, I found relevant information about your query, but encountered an error in synthesis. Please try again."
 
+def matches_metadata_filter(metadata: Dict[str, Any], metadata_filter: Dict[str, Any]) -> bool:
+    """Whether a document's metadata satisfies the flat filter (lists match any value)."""
+    return all(
+        metadata.get(field) in value if isinstance(value, list) else metadata.get(field) == value
+        for field, value in metadata_filter.items()
+    )
+
+speculation_stats = {"runs": 0, "hits": 0, "fallbacks": 0, "errors": 0}
+
+async def speculative_search(user_question: str) -> List[Document]:
+    """Unfiltered dense retrieval over the raw question, started before the filters are known."""
+    return await asyncio.wait_for(
+        run_blocking(search_vector_store, user_question, {}, k=SPECULATIVE_K),
+        timeout=SEARCH_TIMEOUT
+    )
+
+async def deconstruct_and_retrieve(user_question: str) -> tuple[SearchParameters, List[Document]]:
+    """
+    Deconstruct the question while an unfiltered search with SPECULATIVE_K results
+    runs alongside it. Once the filters are known the candidates are filtered
+    locally; a filtered search is only issued when fewer than
+    SPECULATIVE_MIN_RESULTS survive, so latency is max(extract, search) rather
+    than their sum in the common case.
+    """
+    speculative = asyncio.ensure_future(speculative_search(user_question))
+    try:
+        search_params = await deconstruct_query(user_question)
+    except BaseException:
+        speculative.cancel()
+        raise
+    logger.info(f"Extracted search parameters: {search_params.model_dump()}")
+    speculation_stats["runs"] += 1
+    
+    try:
+        candidates = await speculative
+    except Exception as e:
+        speculation_stats["errors"] += 1
+        logger.warning(f"Speculative search failed, running filtered search: {str(e) or type(e).__name__}")
+        return search_params, await execute_hybrid_search(search_params)
+    
+    metadata_filter = build_metadata_filter(search_params)
+    survivors = [doc for doc in candidates if matches_metadata_filter(doc.metadata, metadata_filter)]
+    if len(survivors) >= SPECULATIVE_MIN_RESULTS:
+        speculation_stats["hits"] += 1
+        logger.info(f"Speculative search kept {len(survivors)}/{len(candidates)} candidates")
+        return search_params, survivors[:20]
+    
+    speculation_stats["fallbacks"] += 1
+    logger.info(f"Only {len(survivors)} speculative candidates matched the filters, running filtered search")
+    return search_params, await execute_hybrid_search(search_params)
+
+# Identical questions arriving together (e.g. dashboard refreshes) share one pipeline run
+query_flights = AsyncSingleFlight()
+
 async def find_evidence_for_query(user_question: str) -> tuple[List[Document], str]:
     """
     Main RAG function that processes a user question and returns evidence + synthesized answer.
+    Concurrent identical questions are coalesced into one run of the pipeline.
+    """
+    return await query_flights.do(flight_key(user_question), lambda: run_evidence_pipeline(user_question))
+
+async def run_evidence_pipeline(user_question: str) -> tuple[List[Document], str]:
+    """
+    Run the RAG pipeline for one question.
     
     Steps:
     A. Query Deconstruction via Direct Function Calling
@@ -298,12 +676,16 @@ async def find_evidence_for_query(user_question: str) -> tuple[List[Document], s
     try:
         logger.info(f"Processing user question: {user_question}")
         
-        # Step A: Query Deconstruction using modern .bind() approach
-        search_params = await deconstruct_query_with_llm(user_question)
-        logger.info(f"Extracted search parameters: {search_params.model_dump()}")
-        
-        # Step B: Execute Unified Hybrid Search
-        evidence_documents = await execute_hybrid_search(search_params)
+        if SPECULATIVE_RETRIEVAL:
+            # Steps A+B: deconstruction overlapped with an unfiltered speculative search
+            search_params, evidence_documents = await deconstruct_and_retrieve(user_question)
+        else:
+            # Step A: Query Deconstruction (local rules, else .bind() function calling)
+            search_params = await deconstruct_query(user_question)
+            logger.info(f"Extracted search parameters: {search_params.model_dump()}")
+            
+            # Step B: Execute Unified Hybrid Search
+            evidence_documents = await execute_hybrid_search(search_params)
         
         # Step C: Synthesize Final Answer
         synthesized_answer = await synthesize_final_answer(user_question, evidence_documents)
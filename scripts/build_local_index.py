@@ -0,0 +1,24 @@
+"""
+Build or refresh the local NumPy mirror of the responses table.
+Run after enrichment or a sync; servers with LOCAL_INDEX_ENABLED=true also
+rebuild it in the background when the corpus version changes.
+"""
+
+import logging
+import sys
+import os
+
+# Add src to path for imports
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+from impact.simple.rag_engine import build_local_index, LOCAL_INDEX_PATH
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    
+    print(f"Building local responses index in {LOCAL_INDEX_PATH}...")
+    try:
+        count = build_local_index()
+        print(f"✅ Local index built with {count} responses")
+    except Exception as e:
+        print(f"❌ Local index build failed: {str(e)}")
+        sys.exit(1)
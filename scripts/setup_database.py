@@ -5,75 +5,45 @@ Migrated from setup_database.py with updated imports
 """
 
 from supabase import create_client
+import argparse
 import logging
 import sys
 import os
+from typing import Optional
 
 # Add src to path for imports
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 from impact.shared.config.base import SUPABASE_URL, SUPABASE_KEY
+from impact.shared.database.vector_search import vector_search_setup_sql, ivfflat_lists, VECTOR_INDEX_METHODS
+from impact.shared.database.change_feed import CHANGE_FEED_SQL
 
 logger = logging.getLogger(__name__)
 
-def setup_supabase_vector_search():
+def setup_supabase_vector_search(index_method: str = "hnsw", row_count: int = 0,
+                                 probes: Optional[int] = None) -> bool:
     """
     Set up Supabase for vector search functionality.
-    This creates the necessary database function for similarity search.
+    Creates btree indexes on the filter columns, an HNSW or IVFFlat index on the
+    embeddings and the match_responses function that uses them, plus the
+    updated_at column and index the incremental sync pages on.
     """
     supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
     
-    # SQL to create the vector search function
-    vector_search_function = \"\"\"
-    CREATE OR REPLACE FUNCTION match_responses (
-        query_embedding vector(768),
-        match_threshold float DEFAULT 0.78,
-        match_count int DEFAULT 10,
-        filter jsonb DEFAULT '{}'
-    )
-    RETURNS TABLE (
-        response_id int,
-        participant_id text,
-        charity_name text,
-        age_group text,
-        gender text,
-        question_id text,
-        response_value text,
-        thematic_tags text[],
-        similarity float
-    )
-    LANGUAGE plpgsql
-    AS $$
-    BEGIN
-        RETURN QUERY
-        SELECT
-            r.response_id,
-            r.participant_id,
-            r.charity_name,
-            r.age_group,
-            r.gender,
-            r.question_id,
-            r.response_value,
-            r.thematic_tags,
-            1 - (r.embedding <=> query_embedding) as similarity
-        FROM responses r
-        WHERE 1 - (r.embedding <=> query_embedding) > match_threshold
-        ORDER BY r.embedding <=> query_embedding
-        LIMIT match_count;
-    END;
-    $$;
-    \"\"\"
+    statements = CHANGE_FEED_SQL + vector_search_setup_sql(index_method, lists=ivfflat_lists(row_count), probes=probes)
+    for i, sql in enumerate(statements):
+        try:
+            supabase.rpc('exec_sql', {'sql': sql}).execute()
+        except Exception as e:
+            print(f"❌ Failed to set up vector search: {str(e)}")
+            print("Run the remaining SQL in your Supabase SQL editor:")
+            print("\n".join(statements[i:]))
+            return False
     
-    try:
-        # Execute the function creation
-        result = supabase.rpc('exec_sql', {'sql': vector_search_function}).execute()
-        print("✅ Vector search function created successfully")
-        return True
-    except Exception as e:
-        print(f"❌ Failed to create vector search function: {str(e)}")
-        return False
+    print(f"✅ Vector search function and {index_method} index created successfully")
+    return True
 
-def check_database_setup():
-    """Check if database tables exist and are accessible."""
+def check_database_setup() -> Optional[int]:
+    """Check if database tables exist and are accessible; returns the response count."""
     try:
         supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
         
@@ -89,23 +59,31 @@ def check_database_setup():
         print(f"   Questions: {questions_count} rows")
         print(f"   Responses: {responses_count} rows")
         
-        return True
+        return responses_count or 0
         
     except Exception as e:
         print(f"❌ Database access failed: {str(e)}")
-        return False
+        return None
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Set up vector search for the Impact Intelligence Platform")
+    parser.add_argument("--index-method", choices=VECTOR_INDEX_METHODS, default="hnsw",
+                        help="pgvector index on response embeddings (default: hnsw)")
+    parser.add_argument("--ivfflat-probes", type=int, default=None,
+                        help="IVFFlat lists searched per query (default: about sqrt(lists))")
+    args = parser.parse_args()
+    
     logging.basicConfig(level=logging.INFO)
     
     print("Checking database setup...")
-    if check_database_setup():
+    row_count = check_database_setup()
+    if row_count is not None:
         print("✅ Database tables accessible")
     else:
         print("❌ Database setup issues detected")
         
-    print("\\nSetting up vector search...")
-    if setup_supabase_vector_search():
+    print("\nSetting up vector search...")
+    if setup_supabase_vector_search(args.index_method, row_count or 0, args.ivfflat_probes):
         print("✅ Vector search function created")
     else:
         print("❌ Vector search setup failed")
\ No newline at end of file
@@ -5,94 +5,45 @@ This script helps initialize the Supabase database with proper vector extensions
 
 from supabase import create_client
 from config import SUPABASE_URL, SUPABASE_KEY
+import argparse
 import logging
+import sys
+import os
+from typing import Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from impact.shared.database.vector_search import vector_search_setup_sql, ivfflat_lists, VECTOR_INDEX_METHODS
+from impact.shared.database.change_feed import CHANGE_FEED_SQL
 
 logger = logging.getLogger(__name__)
 
-def setup_supabase_vector_search():
+def setup_supabase_vector_search(index_method: str = "hnsw", row_count: int = 0,
+                                 probes: Optional[int] = None) -> bool:
     """
     Set up Supabase for vector search functionality.
-    This creates the necessary database function for similarity search.
+    Creates btree indexes on the filter columns, an HNSW or IVFFlat index on the
+    embeddings and the match_responses function that uses them, plus the
+    updated_at column and index the incremental sync pages on.
     """
     supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
     
-    # SQL to create the vector search function
-    vector_search_function = """
-    CREATE OR REPLACE FUNCTION match_responses (
-        query_embedding vector(768),
-        match_threshold float DEFAULT 0.78,
-        match_count int DEFAULT 10,
-        filter jsonb DEFAULT '{}'
-    )
-    RETURNS TABLE (
-        response_id int,
-        participant_id text,
-        charity_name text,
-        age_group text,
-        gender text,
-        question_id text,
-        response_value text,
-        thematic_tags text[],
-        similarity float
-    )
-    LANGUAGE plpgsql
-    AS $$
-    DECLARE
-        filter_clause text := '';
-    BEGIN
-        -- Build dynamic filter clause
-        IF filter != '{}' THEN
-            filter_clause := 'AND ';
-            IF filter ? 'charity_name' THEN
-                filter_clause := filter_clause || 'charity_name = ''' || (filter->>'charity_name') || ''' AND ';
-            END IF;
-            IF filter ? 'age_group' THEN
-                filter_clause := filter_clause || 'age_group = ''' || (filter->>'age_group') || ''' AND ';
-            END IF;
-            IF filter ? 'gender' THEN
-                filter_clause := filter_clause || 'gender = ''' || (filter->>'gender') || ''' AND ';
-            END IF;
-            IF filter ? 'question_id' THEN
-                filter_clause := filter_clause || 'question_id = ''' || (filter->>'question_id') || ''' AND ';
-            END IF;
-            -- Remove trailing 'AND '
-            filter_clause := rtrim(filter_clause, 'AND ');
-        END IF;
-        
-        RETURN QUERY EXECUTE
-        'SELECT 
-            r.response_id,
-            r.participant_id,
-            r.charity_name,
-            r.age_group,
-            r.gender,
-            r.question_id,
-            r.response_value,
-            r.thematic_tags,
-            1 - (r.embedding <=> $1) as similarity
-        FROM responses r
-        WHERE 1 - (r.embedding <=> $1) > $2 ' || filter_clause || '
-        ORDER BY r.embedding <=> $1
-        LIMIT $3'
-        USING query_embedding, match_threshold, match_count;
-    END;
-    $$;
-    """
+    statements = CHANGE_FEED_SQL + vector_search_setup_sql(index_method, lists=ivfflat_lists(row_count), probes=probes)
+    for i, sql in enumerate(statements):
+        try:
+            supabase.rpc('exec_sql', {'sql': sql}).execute()
+        except Exception as e:
+            logger.error(f"Error setting up vector search: {str(e)}")
+            logger.info("You may need to run this SQL manually in your Supabase SQL editor:")
+            print("\n".join(statements[i:]))
+            return False
     
-    try:
-        # Execute the function creation
-        result = supabase.rpc('exec_sql', {'sql': vector_search_function}).execute()
-        logger.info("Vector search function created successfully")
-        return True
-    except Exception as e:
-        logger.error(f"Error creating vector search function: {str(e)}")
-        logger.info("You may need to run this SQL manually in your Supabase SQL editor:")
-        print(vector_search_function)
-        return False
+    logger.info(f"Vector search function and {index_method} index created successfully")
+    return True
 
-def check_database_setup():
+def check_database_setup() -> Optional[int]:
     """
     Check if the database has the required tables and extensions.
+    Returns the number of responses, or None when the tables are not accessible.
     """
     supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
     
@@ -104,22 +55,30 @@ def check_database_setup():
         logger.info(f"Questions table: {questions_result.count} rows")
         logger.info(f"Responses table: {responses_result.count} rows")
         
-        return True
+        return responses_result.count or 0
     except Exception as e:
         logger.error(f"Database check failed: {str(e)}")
-        return False
+        return None
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Set up vector search for the Impact Intelligence Platform")
+    parser.add_argument("--index-method", choices=VECTOR_INDEX_METHODS, default="hnsw",
+                        help="pgvector index on response embeddings (default: hnsw)")
+    parser.add_argument("--ivfflat-probes", type=int, default=None,
+                        help="IVFFlat lists searched per query (default: about sqrt(lists))")
+    args = parser.parse_args()
+    
     logging.basicConfig(level=logging.INFO)
     
     print("Checking database setup...")
-    if check_database_setup():
+    row_count = check_database_setup()
+    if row_count is not None:
         print("✅ Database tables accessible")
     else:
         print("❌ Database setup issues detected")
         
     print("\nSetting up vector search...")
-    if setup_supabase_vector_search():
+    if setup_supabase_vector_search(args.index_method, row_count or 0, args.ivfflat_probes):
         print("✅ Vector search function created")
     else:
         print("❌ Vector search setup failed - check logs above")
\ No newline at end of file
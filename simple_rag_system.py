@@ -3,14 +3,57 @@ Simplified RAG system that bypasses compatibility issues.
 Uses direct HTTP requests and Google AI API.
 """
 
-import requests
+import os
+import sys
 import json
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-from config import SUPABASE_URL, SUPABASE_KEY, GOOGLE_API_KEY
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlencode
+from config import (
+    SUPABASE_URL, SUPABASE_KEY, GOOGLE_API_KEY, QUESTION_CACHE_TTL, FILTER_FAST_PATH,
+    PARAMETER_CACHE_PATH, PARAMETER_CACHE_MAX_ENTRIES, CHANGE_FEED_OVERLAP_SECONDS
+)
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from impact.shared.utils.bm25_index import BM25Index
+from impact.shared.utils.question_catalog import QuestionCatalog
+from impact.shared.utils.http_client import get_transport, create_async_transport
+from impact.shared.utils.single_flight import SingleFlight, AsyncSingleFlight, flight_key
+from impact.shared.utils.filter_extractor import FilterExtractor
+from impact.shared.utils.parameter_cache import ParameterCache
+from impact.shared.database.change_feed import (
+    keyset_params, cursor_after, rewind, response_id_params, missing_column_error, CHANGE_FEED_PROBE
+)
 
 logger = logging.getLogger(__name__)
 
+# Page size for change feed fetches (Supabase default max rows)
+RESPONSE_PAGE_SIZE = 1000
+
+NO_EVIDENCE_ANSWER = "I couldn't find sufficient evidence to answer your question. Please try rephrasing or being more specific."
+
+def load_questions(etag: Optional[str]):
+    """Fetch the questions table, revalidating with If-None-Match when we hold an ETag."""
+    headers = {
+        'apikey': SUPABASE_KEY,
+        'Authorization': f'Bearer {SUPABASE_KEY}'
+    }
+    if etag:
+        headers['If-None-Match'] = etag
+    
+    response = get_transport().get(f"{SUPABASE_URL}/rest/v1/questions?select=*", headers=headers)
+    if response.status_code == 304:
+        return None, etag
+    response.raise_for_status()
+    return response.json(), response.headers.get('ETag')
+
+# Shared by every SimpleRAGSystem in the process
+question_catalog = QuestionCatalog(load_questions, ttl_seconds=QUESTION_CACHE_TTL)
+
+# LLM-parsed search parameters, reused for repeat questions until the contextual questions change
+parameter_cache = ParameterCache("simple_rag", PARAMETER_CACHE_PATH, PARAMETER_CACHE_MAX_ENTRIES)
+
 class SimpleRAGSystem:
     def __init__(self):
         self.supabase_headers = {
@@ -19,12 +62,29 @@ class SimpleRAGSystem:
             'Content-Type': 'application/json'
         }
         self.google_api_key = GOOGLE_API_KEY
+        self.http = get_transport()
+        
+        # Local lexical index over responses + question text
+        self.lexical_index = BM25Index()
+        self.indexed_responses: Dict[Any, Dict] = {}
+        self.questions_by_id: Dict[str, Dict] = {}
+        # (updated_at, response_id) position in the responses change feed
+        self.sync_cursor: Optional[Dict[str, Any]] = None
+        # Whether responses has the change-feed columns (None until probed)
+        self.change_feed: Optional[bool] = None
+        
+        # Gazetteer of the filter values seen in indexed responses
+        self.filter_extractor = FilterExtractor()
+        self.parameter_cache = parameter_cache
+        
+        # Identical concurrent queries share one run of the pipeline
+        self.query_flights = SingleFlight()
     
     def query_supabase(self, table: str, params: str = "") -> List[Dict]:
         """Query Supabase table via REST API."""
         try:
             url = f"{SUPABASE_URL}/rest/v1/{table}{params}"
-            response = requests.get(url, headers=self.supabase_headers)
+            response = self.http.get(url, headers=self.supabase_headers)
             
             if response.status_code == 200:
                 return response.json()
@@ -35,45 +95,50 @@ class SimpleRAGSystem:
             logger.error(f"Error querying Supabase: {str(e)}")
             return []
     
+    def google_ai_request(self, prompt: str) -> Tuple[str, Dict[str, Any]]:
+        """URL and payload for a Gemini generateContent call."""
+        url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={self.google_api_key}"
+        
+        payload = {
+            "contents": [{
+                "parts": [{
+                    "text": prompt
+                }]
+            }]
+        }
+        return url, payload
+    
+    def parse_google_ai_response(self, status_code: int, result: Any, text: str) -> str:
+        """Extract the generated text from a Gemini response."""
+        if status_code == 200:
+            if 'candidates' in result and len(result['candidates']) > 0:
+                return result['candidates'][0]['content']['parts'][0]['text']
+            else:
+                return "No response generated"
+        else:
+            logger.error(f"Google AI API failed: {status_code} - {text}")
+            return f"Error calling Google AI: {status_code}"
+    
     def call_google_ai(self, prompt: str) -> str:
         """Call Google AI API directly."""
         try:
-            url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={self.google_api_key}"
+            url, payload = self.google_ai_request(prompt)
             
-            payload = {
-                "contents": [{
-                    "parts": [{
-                        "text": prompt
-                    }]
-                }]
-            }
-            
-            response = requests.post(url, json=payload)
+            # Generation is safe to repeat, so retry on 429/5xx as well
+            response = self.http.post(url, json=payload, retry=True)
             
-            if response.status_code == 200:
-                result = response.json()
-                if 'candidates' in result and len(result['candidates']) > 0:
-                    return result['candidates'][0]['content']['parts'][0]['text']
-                else:
-                    return "No response generated"
-            else:
-                logger.error(f"Google AI API failed: {response.status_code} - {response.text}")
-                return f"Error calling Google AI: {response.status_code}"
+            result = response.json() if response.status_code == 200 else None
+            return self.parse_google_ai_response(response.status_code, result, response.text)
                 
         except Exception as e:
             logger.error(f"Error calling Google AI: {str(e)}")
             return f"Error: {str(e)}"
     
-    def extract_search_parameters(self, user_question: str) -> Dict[str, Any]:
-        """Use Google AI to extract search parameters from user question."""
+    def build_extraction_prompt(self, user_question: str) -> str:
+        """Prompt asking Google AI for search parameters."""
         
-        # Get contextual questions for context
-        questions = self.query_supabase("questions", "?outcome_measured=eq.contextual")
-        
-        contextual_desc = "\n".join([
-            f"- {q['question_id']}: {q['question_text']}"
-            for q in questions
-        ])
+        # Contextual questions description (cached process-wide)
+        contextual_desc = question_catalog.contextual_description()
         
         prompt = f"""
 Analyze this user question and extract search parameters: "{user_question}"
@@ -93,18 +158,26 @@ Examples:
 
 Return only valid JSON:
 """
-        
-        response = self.call_google_ai(prompt)
-        
+        return prompt
+    
+    def parse_parameters_json(self, response: str) -> Optional[Dict[str, Any]]:
+        """The JSON parameters in the model output, or None when there are none."""
         try:
             # Try to extract JSON from response
             if '{' in response and '}' in response:
                 start = response.find('{')
                 end = response.rfind('}') + 1
-                json_str = response[start:end]
-                return json.loads(json_str)
+                parsed = json.loads(response[start:end])
+                return parsed if isinstance(parsed, dict) else None
         except:
             pass
+        return None
+    
+    def parse_search_parameters(self, response: str, user_question: str) -> Dict[str, Any]:
+        """Parse the JSON parameters out of the model output."""
+        parsed = self.parse_parameters_json(response)
+        if parsed is not None:
+            return parsed
         
         # Fallback: basic keyword extraction
         return {
@@ -114,68 +187,179 @@ Return only valid JSON:
             "gender": None
         }
     
-    def search_responses(self, search_params: Dict[str, Any]) -> List[Dict]:
-        """Search responses based on extracted parameters."""
-        
-        # Build query parameters
-        query_parts = []
+    def fast_search_parameters(self, user_question: str) -> Optional[Dict[str, Any]]:
+        """Search parameters from the local rules, or None when the LLM is needed."""
+        if not FILTER_FAST_PATH:
+            return None
         
-        if search_params.get("charity_name"):
-            query_parts.append(f"charity_name=eq.{search_params['charity_name']}")
+        extracted = self.filter_extractor.extract(user_question)
+        if not extracted['confident']:
+            logger.info(f"Filter fast path declined: {extracted['reason']}")
+            return None
+        return {field: extracted[field] for field in ('charity_name', 'age_group', 'gender', 'themes')}
+    
+    def remember_search_parameters(self, user_question: str, catalog_version: Optional[str],
+                                   response: str) -> Dict[str, Any]:
+        """Parse the model output, caching it only when it held real parameters."""
+        parsed = self.parse_parameters_json(response)
+        if parsed is None:
+            return self.parse_search_parameters(response, user_question)
         
-        if search_params.get("age_group"):
-            query_parts.append(f"age_group=eq.{search_params['age_group']}")
-            
-        if search_params.get("gender"):
-            query_parts.append(f"gender=eq.{search_params['gender']}")
+        self.parameter_cache.put(user_question, catalog_version, parsed)
+        return parsed
+    
+    def extract_search_parameters(self, user_question: str) -> Dict[str, Any]:
+        """Use Google AI to extract search parameters from user question."""
+        fast = self.fast_search_parameters(user_question)
+        if fast is not None:
+            return fast
         
-        # Query responses without join first
-        query_params = "?select=*"
-        if query_parts:
-            query_params += "&" + "&".join(query_parts)
+        catalog_version = question_catalog.contextual_version()
+        cached = self.parameter_cache.get(user_question, catalog_version)
+        if cached is not None:
+            return cached
         
-        # Limit results
-        query_params += "&limit=20"
+        response = self.call_google_ai(self.build_extraction_prompt(user_question))
+        return self.remember_search_parameters(user_question, catalog_version, response)
+    
+    def refresh_lexical_index(self) -> int:
+        """Fetch responses added, edited or deleted since the last refresh and apply them."""
+        self.questions_by_id = question_catalog.by_id()
+        if self.change_feed is None:
+            self.change_feed = self.probe_change_feed()
+            if self.change_feed is None:
+                return 0
         
-        responses = self.query_supabase("responses", query_params)
+        new_responses = []
+        params = self.next_responses_params(first=True)
+        while True:
+            page = self.query_supabase("responses", params)
+            if not self.accept_responses_page(page, new_responses):
+                break
+            params = self.next_responses_params()
         
-        # Get questions separately and merge
-        questions = self.query_supabase("questions")
-        questions_dict = {q['question_id']: q for q in questions}
+        return self.finish_refresh(new_responses)
+    
+    def probe_change_feed(self) -> Optional[bool]:
+        """Check once whether responses has the change-feed columns."""
+        try:
+            response = self.http.get(f"{SUPABASE_URL}/rest/v1/responses?{urlencode(CHANGE_FEED_PROBE)}",
+                                     headers=self.supabase_headers)
+        except Exception as e:
+            logger.error(f"Error probing the responses change feed: {str(e)}")
+            return None
+        return self.change_feed_probe_result(response.status_code, response.text)
+    
+    def change_feed_probe_result(self, status_code: int, body: str) -> Optional[bool]:
+        """True if the change feed is available, False if its columns are missing, None if unknown."""
+        if status_code == 200:
+            return True
+        if missing_column_error(body):
+            logger.error("responses has no updated_at column: run setup_database.py to apply the change feed DDL. "
+                         "Paging by response_id until then, so edits and deletes are not picked up.")
+            return False
+        logger.error(f"Change feed probe failed: {status_code} - {body}")
+        return None
+    
+    def next_responses_params(self, first: bool = False) -> str:
+        """
+        Keyset page of the change feed after the last applied response. The first
+        page of a refresh re-reads a short overlap behind the cursor to catch
+        writes that committed late; unchanged rows are skipped when applied.
+        """
+        if not self.change_feed:
+            return "?" + urlencode(response_id_params(RESPONSE_PAGE_SIZE, self.sync_cursor))
+        if first and self.sync_cursor:
+            since = rewind(self.sync_cursor, CHANGE_FEED_OVERLAP_SECONDS)
+            return "?" + urlencode(keyset_params(RESPONSE_PAGE_SIZE, since=since))
+        return "?" + urlencode(keyset_params(RESPONSE_PAGE_SIZE, self.sync_cursor))
+    
+    def accept_responses_page(self, page: List[Dict], new_responses: List[Dict]) -> bool:
+        """Collect a fetched page; returns True if another page may follow."""
+        if page:
+            new_responses.extend(page)
+            self.sync_cursor = cursor_after(page)
+        return len(page) == RESPONSE_PAGE_SIZE
+    
+    def finish_refresh(self, new_responses: List[Dict]) -> int:
+        applied = self.index_responses(new_responses)
+        if applied:
+            logger.info(f"Applied {applied} changed responses ({len(self.lexical_index)} indexed)")
+        return applied
+    
+    def index_responses(self, responses: List[Dict], lexical_index: Optional[BM25Index] = None,
+                        indexed_responses: Optional[Dict[Any, Dict]] = None) -> int:
+        """
+        Add or replace responses in the lexical index, removing soft-deleted ones.
+        Writes to the given index and response map instead when passed.
+        Returns how many changed the index (overlap re-reads of applied rows do not).
+        """
+        if lexical_index is None:
+            lexical_index, indexed_responses = self.lexical_index, self.indexed_responses
         
-        # Add question info to responses
+        applied = 0
         for response in responses:
-            question_id = response.get('question_id')
-            if question_id in questions_dict:
-                response['questions'] = questions_dict[question_id]
-        
-        # If we have themes, do basic text filtering
-        if search_params.get("themes"):
-            themes = search_params["themes"]
-            filtered_responses = []
+            response_id = response.get('response_id')
+            if response.get('deleted_at'):
+                indexed_responses.pop(response_id, None)
+                if lexical_index.remove(response_id):
+                    applied += 1
+                continue
             
-            for response in responses:
-                response_text = response.get("response_value", "").lower()
-                question_text = ""
-                if response.get("questions"):
-                    question_text = response["questions"].get("question_text", "").lower()
-                
-                # Check if any theme appears in response or question
-                for theme in themes:
-                    if theme.lower() in response_text or theme.lower() in question_text:
-                        filtered_responses.append(response)
-                        break
+            indexed = indexed_responses.get(response_id)
+            if indexed is not None and indexed.get('updated_at') == response.get('updated_at'):
+                continue
+            
+            question = self.questions_by_id.get(response.get('question_id'))
+            if question:
+                response['questions'] = question
             
-            if filtered_responses:
-                responses = filtered_responses
+            question_text = question.get('question_text', '') if question else ''
+            indexed_responses[response_id] = response
+            self.filter_extractor.add_values(response)
+            lexical_index.add(response_id, f"{response.get('response_value', '')} {question_text}")
+            applied += 1
+        return applied
+    
+    def search_responses(self, search_params: Dict[str, Any]) -> List[Dict]:
+        """Search responses based on extracted parameters."""
         
-        return responses[:10]  # Limit to top 10
+        # Pick up any responses that arrived since the last search
+        self.refresh_lexical_index()
+        return self.rank_responses(search_params)
     
-    def synthesize_answer(self, user_question: str, responses: List[Dict]) -> str:
-        """Generate final answer using Google AI."""
+    def rank_responses(self, search_params: Dict[str, Any]) -> List[Dict]:
+        """Rank indexed responses against the extracted parameters."""
+        filters = {
+            field: search_params[field]
+            for field in ("charity_name", "age_group", "gender")
+            if search_params.get(field)
+        }
         
-        if not responses:
-            return "I couldn't find sufficient evidence to answer your question. Please try rephrasing or being more specific."
+        def matches_filters(response_id) -> bool:
+            response = self.indexed_responses[response_id]
+            return all(response.get(field) == value for field, value in filters.items())
+        
+        # If we have themes, rank the whole (filtered) corpus with BM25
+        if search_params.get("themes"):
+            ranked = self.lexical_index.search(
+                " ".join(search_params["themes"]),
+                k=10,
+                doc_filter=matches_filters if filters else None
+            )
+            if ranked:
+                return [self.indexed_responses[response_id] for response_id, _ in ranked]
+        
+        # No themes or no lexical match: filtered responses in id order
+        responses = [
+            self.indexed_responses[response_id]
+            for response_id in self.indexed_responses
+            if matches_filters(response_id)
+        ]
+        return responses[:10]  # Limit to top 10
+    
+    def build_synthesis_prompt(self, user_question: str, responses: List[Dict]) -> str:
+        """Prompt asking Google AI to synthesize an answer from the evidence."""
         
         # Prepare evidence context
         evidence_context = ""
@@ -213,11 +397,22 @@ Please provide a comprehensive answer following the "Quantify, then Qualify" pro
 
 Format your response as a professional briefing that demonstrates clear impact and evidence-based conclusions.
 """
+        return synthesis_prompt
+    
+    def synthesize_answer(self, user_question: str, responses: List[Dict]) -> str:
+        """Generate final answer using Google AI."""
+        
+        if not responses:
+            return NO_EVIDENCE_ANSWER
         
-        return self.call_google_ai(synthesis_prompt)
+        return self.call_google_ai(self.build_synthesis_prompt(user_question, responses))
     
     def process_query(self, user_question: str) -> Dict[str, Any]:
         """Main function to process a user query end-to-end."""
+        return self.query_flights.do(flight_key(user_question), lambda: self.answer_query(user_question))
+    
+    def answer_query(self, user_question: str) -> Dict[str, Any]:
+        """Run the full pipeline for one query (process_query coalesces duplicates)."""
         
         logger.info(f"Processing query: {user_question}")
         
@@ -233,6 +428,10 @@ Format your response as a professional briefing that demonstrates clear impact a
         answer = self.synthesize_answer(user_question, responses)
         
         # Step 4: Format source evidence
+        return self.format_result(answer, responses)
+    
+    def format_result(self, answer: str, responses: List[Dict]) -> Dict[str, Any]:
+        """Shape the answer and top evidence for the API response."""
         source_evidence = []
         for response in responses[:5]:
             demographics = f"{response.get('age_group', 'Unknown')} {response.get('gender', 'participant')}"
@@ -249,6 +448,153 @@ Format your response as a professional briefing that demonstrates clear impact a
             "source_evidence": source_evidence
         }
 
+class AsyncSimpleRAGSystem(SimpleRAGSystem):
+    """
+    Non-blocking SimpleRAGSystem for async servers.
+    Same prompts, index and ranking, but Supabase and Gemini calls are awaited
+    on a pooled async client and independent fetches run concurrently, so one
+    worker can keep many queries in flight. The network methods are coroutines.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.async_http = create_async_transport()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.query_flights = AsyncSingleFlight()
+    
+    async def query_supabase(self, table: str, params: str = "") -> List[Dict]:
+        """Query Supabase table via REST API."""
+        try:
+            url = f"{SUPABASE_URL}/rest/v1/{table}{params}"
+            response = await self.async_http.get(url, headers=self.supabase_headers)
+            
+            if response.status_code == 200:
+                return response.json()
+            else:
+                logger.error(f"Supabase query failed: {response.status_code} - {response.text}")
+                return []
+        except Exception as e:
+            logger.error(f"Error querying Supabase: {str(e)}")
+            return []
+    
+    async def call_google_ai(self, prompt: str) -> str:
+        """Call Google AI API directly."""
+        try:
+            url, payload = self.google_ai_request(prompt)
+            response = await self.async_http.post(url, json=payload, retry=True)
+            
+            result = response.json() if response.status_code == 200 else None
+            return self.parse_google_ai_response(response.status_code, result, response.text)
+        
+        except Exception as e:
+            logger.error(f"Error calling Google AI: {str(e)}")
+            return f"Error: {str(e)}"
+    
+    async def extract_search_parameters(self, user_question: str) -> Dict[str, Any]:
+        """Use Google AI to extract search parameters from user question."""
+        fast = self.fast_search_parameters(user_question)
+        if fast is not None:
+            return fast
+        
+        # Reading the catalog may revalidate it against Supabase; keep that off the loop
+        catalog_version = await asyncio.to_thread(question_catalog.contextual_version)
+        # The parameter cache reads and writes SQLite
+        cached = await asyncio.to_thread(self.parameter_cache.get, user_question, catalog_version)
+        if cached is not None:
+            return cached
+        
+        prompt = await asyncio.to_thread(self.build_extraction_prompt, user_question)
+        response = await self.call_google_ai(prompt)
+        return await asyncio.to_thread(self.remember_search_parameters, user_question, catalog_version, response)
+    
+    async def refresh_lexical_index(self) -> int:
+        """Fetch responses added, edited or deleted since the last refresh and apply them."""
+        # Queries arriving while a refresh is in flight share it rather than queueing another
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.ensure_future(self._refresh_lexical_index())
+        return await asyncio.shield(self._refresh_task)
+    
+    async def probe_change_feed(self) -> Optional[bool]:
+        """Check once whether responses has the change-feed columns."""
+        try:
+            response = await self.async_http.get(
+                f"{SUPABASE_URL}/rest/v1/responses?{urlencode(CHANGE_FEED_PROBE)}",
+                headers=self.supabase_headers
+            )
+        except Exception as e:
+            logger.error(f"Error probing the responses change feed: {str(e)}")
+            return None
+        return self.change_feed_probe_result(response.status_code, response.text)
+    
+    async def _refresh_lexical_index(self) -> int:
+        if self.change_feed is None:
+            self.change_feed = await self.probe_change_feed()
+            if self.change_feed is None:
+                return 0
+        
+        questions_by_id, page = await asyncio.gather(
+            asyncio.to_thread(question_catalog.by_id),
+            self.query_supabase("responses", self.next_responses_params(first=True))
+        )
+        self.questions_by_id = questions_by_id
+        
+        new_responses = []
+        while self.accept_responses_page(page, new_responses):
+            page = await self.query_supabase("responses", self.next_responses_params())
+        
+        if self.indexed_responses:
+            return self.finish_refresh(new_responses)
+        
+        # The first load indexes the whole table: build it off the loop, then
+        # swap it in so queries never rank against a half-built index
+        lexical_index, indexed_responses = BM25Index(), {}
+        applied = await asyncio.to_thread(self.index_responses, new_responses, lexical_index, indexed_responses)
+        self.lexical_index, self.indexed_responses = lexical_index, indexed_responses
+        logger.info(f"Indexed {applied} responses")
+        return applied
+    
+    async def search_responses(self, search_params: Dict[str, Any]) -> List[Dict]:
+        """Search responses based on extracted parameters."""
+        await self.refresh_lexical_index()
+        return self.rank_responses(search_params)
+    
+    async def synthesize_answer(self, user_question: str, responses: List[Dict]) -> str:
+        """Generate final answer using Google AI."""
+        if not responses:
+            return NO_EVIDENCE_ANSWER
+        
+        return await self.call_google_ai(self.build_synthesis_prompt(user_question, responses))
+    
+    async def process_query(self, user_question: str) -> Dict[str, Any]:
+        """Main function to process a user query end-to-end."""
+        return await self.query_flights.do(flight_key(user_question), lambda: self.answer_query(user_question))
+    
+    async def answer_query(self, user_question: str) -> Dict[str, Any]:
+        """Run the full pipeline for one query (process_query coalesces duplicates)."""
+        
+        logger.info(f"Processing query: {user_question}")
+        
+        # Steps 1 and 2 are independent: extract parameters (Gemini) while
+        # pulling new responses into the index (Supabase)
+        search_params, _ = await asyncio.gather(
+            self.extract_search_parameters(user_question),
+            self.refresh_lexical_index()
+        )
+        logger.info(f"Extracted parameters: {search_params}")
+        
+        responses = self.rank_responses(search_params)
+        logger.info(f"Found {len(responses)} relevant responses")
+        
+        # Step 3: Synthesize answer
+        answer = await self.synthesize_answer(user_question, responses)
+        
+        # Step 4: Format source evidence
+        return self.format_result(answer, responses)
+    
+    async def aclose(self):
+        """Close pooled connections (call on server shutdown)."""
+        await self.async_http.aclose()
+
 def test_system():
     """Test the RAG system with sample queries."""
     
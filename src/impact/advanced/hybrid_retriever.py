@@ -0,0 +1,122 @@
+"""
+Hybrid lexical + dense retriever
+Runs BM25 and vector similarity concurrently and fuses the two rankings,
+so fewer evidence documents are needed for the same recall
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Tuple
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun, AsyncCallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+
+from impact.shared.utils.bm25_index import BM25Index
+from impact.shared.utils.rank_fusion import reciprocal_rank_fusion, weighted_score_fusion, RRF_K
+
+# Shared by all retrievers so each query only pays for a task submit
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid-retriever")
+
+
+def document_key(doc: Document) -> str:
+    """
+    Identity used to match the same response across both legs: the response_id
+    written into the metadata at ingest, falling back to the text only when
+    there is none. Identical answers from different participants stay separate
+    documents. Document.id is not used: older langchain-core has no such field
+    and the Chroma wrapper does not fill it in.
+    """
+    response_id = doc.metadata.get('response_id')
+    if response_id is not None:
+        return f"id:{response_id}"
+    return f"text:{doc.metadata.get('question_text', '')}\x1f{doc.page_content}"
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    LangChain retriever fusing a BM25 leg over the corpus with the vector store's
+    similarity search. Each leg returns fetch_k candidates; the fused top k are
+    returned with their fusion score in metadata['fusion_score'].
+    """
+
+    vectorstore: VectorStore
+    lexical_index: BM25Index
+    documents: Dict[str, Document]
+    k: int = 4
+    fetch_k: int = 20
+    fusion: str = "rrf"  # "rrf" or "weighted"
+    weights: List[float] = [1.0, 1.0]  # dense, lexical
+    rrf_k: int = RRF_K
+
+    @classmethod
+    def from_vectorstore(cls, vectorstore: VectorStore, **kwargs) -> "HybridRetriever":
+        """Build the lexical leg from every document already in a Chroma vector store"""
+        stored = vectorstore.get(include=["documents", "metadatas"])
+
+        lexical_index = BM25Index()
+        documents: Dict[str, Document] = {}
+        # Keys come from the stored metadata, exactly as the dense leg sees it
+        for text, metadata in zip(stored["documents"], stored["metadatas"]):
+            doc = Document(page_content=text, metadata=metadata or {})
+            key = document_key(doc)
+            documents[key] = doc
+            lexical_index.add(key, f"{text} {doc.metadata.get('question_text', '')}")
+
+        print(f"✅ Built lexical index over {len(documents)} documents")
+        return cls(vectorstore=vectorstore, lexical_index=lexical_index, documents=documents, **kwargs)
+
+    def add_documents(self, docs: List[Document]):
+        """Keep the lexical leg in step with documents added to the vector store"""
+        for doc in docs:
+            key = document_key(doc)
+            self.documents[key] = doc
+            self.lexical_index.add(key, f"{doc.page_content} {doc.metadata.get('question_text', '')}")
+
+    def _dense_search(self, query: str) -> List[Tuple[Document, float]]:
+        return self.vectorstore.similarity_search_with_relevance_scores(query, k=self.fetch_k)
+
+    def _lexical_search(self, query: str) -> List[Tuple[str, float]]:
+        return self.lexical_index.search(query, k=self.fetch_k)
+
+    def _fuse(self, dense: List[Tuple[Document, float]], lexical: List[Tuple[str, float]]) -> List[Document]:
+        by_key = {document_key(doc): doc for doc, _ in dense}
+        dense_scored = [(document_key(doc), score) for doc, score in dense]
+
+        if self.fusion == "weighted":
+            fused = weighted_score_fusion([dense_scored, lexical], self.weights)
+        else:
+            fused = reciprocal_rank_fusion(
+                [[key for key, _ in dense_scored], [key for key, _ in lexical]],
+                self.weights,
+                k=self.rrf_k
+            )
+
+        results = []
+        for key, score in fused[:self.k]:
+            doc = by_key.get(key) or self.documents[key]
+            results.append(Document(page_content=doc.page_content,
+                                    metadata={**doc.metadata, "fusion_score": score}))
+        return results
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        # Dense leg on the pool, lexical leg on this thread
+        dense_future = _executor.submit(self._dense_search, query)
+        lexical = self._lexical_search(query)
+        return self._fuse(dense_future.result(), lexical)
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        dense, lexical = await asyncio.gather(
+            self.vectorstore.asimilarity_search_with_relevance_scores(query, k=self.fetch_k),
+            asyncio.to_thread(self._lexical_search, query)
+        )
+        return self._fuse(dense, lexical)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "fusion": self.fusion,
+            "k": self.k,
+            "fetch_k": self.fetch_k,
+            "lexical": self.lexical_index.get_stats()
+        }
@@ -0,0 +1,91 @@
+"""
+LangChain adapter for the in-process NumPy vector store
+Lets the LangChain RAG systems retrieve from the same NumpyVectorStore that
+VectorStoreManager populates when VECTOR_STORE_TYPE = "numpy"
+"""
+import uuid
+from typing import List, Dict, Any, Optional, Iterable, Sequence, Tuple, Callable
+
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from .numpy_vector_store import NumpyVectorStore
+
+
+class NumpyLangChainStore(VectorStore):
+    """
+    LangChain VectorStore over a NumpyVectorStore.
+
+    Scores are cosine distances from the store, converted to relevance with
+    1 - distance clamped to [0, 1]. add_texts records each id as
+    metadata['response_id'] (as ingest does) so the hybrid retriever can match
+    documents across legs.
+    """
+
+    def __init__(self, store: NumpyVectorStore, embedding: Any):
+        self.store = store
+        self.embedding = embedding
+        # Mirrors the Chroma wrapper so callers can report the document count
+        self._collection = store
+
+    @property
+    def embeddings(self) -> Any:
+        return self.embedding
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Any, metadatas: Optional[List[dict]] = None,
+                   *, path: str, collection_name: str = "survey_responses", **kwargs) -> "NumpyLangChainStore":
+        store = cls(NumpyVectorStore.load_or_create(path, collection_name), embedding)
+        store.add_texts(texts, metadatas, ids=kwargs.get("ids"))
+        return store
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  *, ids: Optional[List[str]] = None, **kwargs) -> List[str]:
+        texts = list(texts)
+        ids = list(ids) if ids else [str(uuid.uuid4()) for _ in texts]
+        metadatas = [
+            {'response_id': doc_id, **(metadata or {})}
+            for doc_id, metadata in zip(ids, metadatas or [None] * len(texts))
+        ]
+        self.store.upsert(
+            ids=ids,
+            embeddings=self.embedding.embed_documents(texts),
+            documents=texts,
+            metadatas=metadatas
+        )
+        self.store.flush()
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs) -> Optional[bool]:
+        self.store.delete(ids=ids, where=kwargs.get("where"))
+        self.store.flush()
+        return True
+
+    def get(self, ids: Optional[Sequence[str]] = None, where: Optional[Dict[str, Any]] = None,
+            limit: Optional[int] = None, include: Sequence[str] = ("documents", "metadatas")) -> Dict[str, Any]:
+        """Chroma-style get, used to build the hybrid retriever's lexical leg"""
+        return self.store.get(ids=ids, where=where, limit=limit, include=include)
+
+    def similarity_search_with_score(self, query: str, k: int = 4,
+                                     filter: Optional[Dict[str, Any]] = None,
+                                     **kwargs) -> List[Tuple[Document, float]]:
+        """Top-k documents with their cosine distance (lower is closer)"""
+        results = self.store.query(
+            [self.embedding.embed_query(query)],
+            n_results=k,
+            where=filter
+        )
+        return [
+            (Document(page_content=text, metadata=dict(metadata or {})), distance)
+            for text, metadata, distance in zip(
+                results["documents"][0], results["metadatas"][0], results["distances"][0]
+            )
+        ]
+
+    def similarity_search(self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None,
+                          **kwargs) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
+
+    def _select_relevance_score_fn(self) -> Callable[[float], float]:
+        # Clamp float rounding so identical vectors do not score just above 1
+        return lambda distance: min(1.0, max(0.0, 1.0 - distance))
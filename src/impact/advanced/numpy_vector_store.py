@@ -0,0 +1,418 @@
+"""
+In-process NumPy exact-search vector store
+Brute-force cosine search over a contiguous embedding matrix, exposing the
+subset of the ChromaDB collection API that the vector store managers use
+"""
+import os
+import json
+from typing import List, Dict, Any, Optional, Sequence
+
+import numpy as np
+
+from impact.shared.utils.facet_index import FacetIndex
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+INT8_SCALE = 127.0
+SCORE_CHUNK_ROWS = 65536
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize each row so dot products are cosine similarities"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class NumpyVectorStore:
+    """
+    Exact nearest-neighbour search for small and medium corpora.
+
+    Embeddings are normalized and held in one contiguous array (optionally
+    stored as float16 or int8), top-k is selected with argpartition and
+    metadata `where` clauses become boolean masks applied before ranking.
+    Distances are cosine distances, so `1 - distance` is cosine similarity.
+    Writes stay in memory until flush(), so a bulk load rewrites the files once
+    rather than once per batch. Appends go into a preallocated buffer that
+    doubles when full, so loading page by page copies each row O(1) times.
+    """
+
+    def __init__(self, path: str, name: str = "survey_responses",
+                 dtype: str = "float32", metadata: Optional[Dict[str, Any]] = None):
+        if dtype not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported dtype '{dtype}', expected one of {SUPPORTED_DTYPES}")
+
+        self.path = os.path.join(path, name)
+        self.name = name
+        self.dtype = dtype
+        self.metadata: Dict[str, Any] = dict(metadata or {})
+
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._matrix: Optional[np.ndarray] = None
+        # Row storage with spare capacity; _matrix is a view of its filled rows
+        self._buffer: Optional[np.ndarray] = None
+        self._id_positions: Dict[str, int] = {}
+        self._columns: Dict[str, np.ndarray] = {}
+        self._facets: Optional[FacetIndex] = None
+        self._dirty = False
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    @property
+    def _matrix_path(self) -> str:
+        return os.path.join(self.path, "embeddings.npy")
+
+    @property
+    def _records_path(self) -> str:
+        return os.path.join(self.path, "records.json")
+
+    @classmethod
+    def exists(cls, path: str, name: str = "survey_responses") -> bool:
+        return os.path.exists(os.path.join(path, name, "records.json"))
+
+    @classmethod
+    def load(cls, path: str, name: str = "survey_responses") -> "NumpyVectorStore":
+        """Load a persisted store; the embedding matrix is memory-mapped"""
+        store_path = os.path.join(path, name)
+        with open(os.path.join(store_path, "records.json"), "r") as f:
+            records = json.load(f)
+
+        store = cls(path, name, dtype=records.get("dtype", "float32"),
+                    metadata=records.get("metadata"))
+        store._ids = records["ids"]
+        store._documents = records["documents"]
+        store._metadatas = records["metadatas"]
+        store._id_positions = {doc_id: i for i, doc_id in enumerate(store._ids)}
+
+        if store._ids:
+            store._matrix = np.load(store._matrix_path, mmap_mode="r")
+        return store
+
+    @classmethod
+    def load_or_create(cls, path: str, name: str = "survey_responses",
+                       dtype: str = "float32", metadata: Optional[Dict[str, Any]] = None) -> "NumpyVectorStore":
+        if cls.exists(path, name):
+            return cls.load(path, name)
+        store = cls(path, name, dtype=dtype, metadata=metadata)
+        store.persist()
+        return store
+
+    def persist(self):
+        """Atomically write the embedding matrix and records to disk"""
+        os.makedirs(self.path, exist_ok=True)
+
+        if self._matrix is not None:
+            tmp_matrix = self._matrix_path + ".tmp.npy"
+            np.save(tmp_matrix, np.ascontiguousarray(self._matrix))
+            # Release the old memory map before replacing the file underneath it
+            if isinstance(self._matrix, np.memmap):
+                self._matrix = np.array(self._matrix)
+            os.replace(tmp_matrix, self._matrix_path)
+        elif os.path.exists(self._matrix_path):
+            os.remove(self._matrix_path)
+
+        tmp_records = self._records_path + ".tmp"
+        with open(tmp_records, "w") as f:
+            json.dump({
+                "name": self.name,
+                "dtype": self.dtype,
+                "metadata": self.metadata,
+                "ids": self._ids,
+                "documents": self._documents,
+                "metadatas": self._metadatas
+            }, f)
+        os.replace(tmp_records, self._records_path)
+        self._dirty = False
+
+    def flush(self):
+        """Persist pending writes, if there are any"""
+        if self._dirty:
+            self.persist()
+
+    # ------------------------------------------------------------------
+    # Storage helpers
+    # ------------------------------------------------------------------
+
+    def _encode_matrix(self, vectors: np.ndarray) -> np.ndarray:
+        """Normalize and convert embeddings to the storage dtype"""
+        vectors = normalize_rows(vectors)
+        if self.dtype == "int8":
+            return np.clip(np.rint(vectors * INT8_SCALE), -127, 127).astype(np.int8)
+        return vectors.astype(self.dtype)
+
+    def _decode_rows(self, rows: np.ndarray) -> np.ndarray:
+        rows = np.asarray(rows, dtype=np.float32)
+        if self.dtype == "int8":
+            rows = rows / INT8_SCALE
+        return rows
+
+    def _invalidate(self):
+        self._id_positions = {doc_id: i for i, doc_id in enumerate(self._ids)}
+        self._columns = {}
+        self._facets = None
+
+    @property
+    def facets(self) -> FacetIndex:
+        """Bitmap index over the filterable metadata fields, built on first use"""
+        if self._facets is None:
+            self._facets = FacetIndex.build(self._metadatas)
+        return self._facets
+
+    def _column(self, field: str) -> np.ndarray:
+        """Metadata values for one field as an object array, built on first use"""
+        if field not in self._columns:
+            column = np.empty(len(self._metadatas), dtype=object)
+            column[:] = [metadata.get(field) for metadata in self._metadatas]
+            self._columns[field] = column
+        return self._columns[field]
+
+    # ------------------------------------------------------------------
+    # Metadata filtering
+    # ------------------------------------------------------------------
+
+    def where_mask(self, where: Optional[Dict[str, Any]]) -> Optional[np.ndarray]:
+        """Evaluate a ChromaDB-style where clause into a boolean mask"""
+        if not where:
+            return None
+
+        mask = np.ones(len(self._ids), dtype=bool)
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self.where_mask(clause)
+            elif key == "$or":
+                any_mask = np.zeros(len(self._ids), dtype=bool)
+                for clause in condition:
+                    any_mask |= self.where_mask(clause)
+                mask &= any_mask
+            else:
+                mask &= self._field_mask(key, condition)
+        return mask
+
+    def _field_mask(self, field: str, condition: Any) -> np.ndarray:
+        column = self._column(field)
+
+        if not isinstance(condition, dict):
+            return column == condition
+
+        mask = np.ones(len(column), dtype=bool)
+        for op, value in condition.items():
+            if op == "$eq":
+                mask &= column == value
+            elif op == "$ne":
+                mask &= column != value
+            elif op == "$in":
+                mask &= self._membership(column, value)
+            elif op == "$nin":
+                mask &= ~self._membership(column, value)
+            else:
+                raise ValueError(f"Unsupported where operator: {op}")
+        return mask
+
+    @staticmethod
+    def _membership(column: np.ndarray, values: Sequence[Any]) -> np.ndarray:
+        values = set(values)
+        return np.fromiter((value in values for value in column), dtype=bool, count=len(column))
+
+    # ------------------------------------------------------------------
+    # ChromaDB collection API
+    # ------------------------------------------------------------------
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def add(self, ids: Sequence[str], embeddings: Sequence[Sequence[float]],
+            documents: Optional[Sequence[str]] = None,
+            metadatas: Optional[Sequence[Dict[str, Any]]] = None):
+        """Add new documents; existing ids are rejected like in ChromaDB"""
+        duplicates = [doc_id for doc_id in ids if doc_id in self._id_positions]
+        if duplicates:
+            raise ValueError(f"IDs already exist in collection: {duplicates[:5]}")
+        self._append(ids, embeddings, documents, metadatas)
+
+    def upsert(self, ids: Sequence[str], embeddings: Sequence[Sequence[float]],
+               documents: Optional[Sequence[str]] = None,
+               metadatas: Optional[Sequence[Dict[str, Any]]] = None):
+        """Insert new documents and replace existing ones"""
+        existing = [doc_id for doc_id in ids if doc_id in self._id_positions]
+        if existing:
+            self._remove(existing)
+        self._append(ids, embeddings, documents, metadatas)
+
+    def _append(self, ids, embeddings, documents, metadatas):
+        if len(ids) == 0:
+            return
+        matrix = self._encode_matrix(np.asarray(embeddings, dtype=np.float32))
+
+        rows = 0 if self._matrix is None else len(self._matrix)
+        if rows and matrix.shape[1] != self._matrix.shape[1]:
+            raise ValueError(
+                f"Embedding dimension {matrix.shape[1]} does not match store dimension {self._matrix.shape[1]}"
+            )
+
+        needed = rows + len(matrix)
+        if self._buffer is None or len(self._buffer) < needed or self._buffer.shape[1] != matrix.shape[1]:
+            # Grow geometrically; the first append after load() also moves off the memory map
+            buffer = np.empty((max(needed, 2 * rows), matrix.shape[1]), dtype=matrix.dtype)
+            if rows:
+                buffer[:rows] = self._matrix
+            self._buffer = buffer
+        # Rows past the current view are unused, so readers holding it are unaffected
+        self._buffer[rows:needed] = matrix
+        self._matrix = self._buffer[:needed]
+
+        self._ids.extend(str(doc_id) for doc_id in ids)
+        self._documents.extend(documents if documents is not None else [""] * len(ids))
+        self._metadatas.extend(dict(m or {}) for m in (metadatas if metadatas is not None else [{}] * len(ids)))
+        self._invalidate()
+        self._dirty = True
+
+    def delete(self, ids: Optional[Sequence[str]] = None, where: Optional[Dict[str, Any]] = None):
+        """Delete documents by id and/or metadata filter"""
+        to_delete = set(ids or [])
+        if where:
+            mask = self.where_mask(where)
+            to_delete.update(self._ids[i] for i in np.flatnonzero(mask))
+        if to_delete:
+            self._remove(to_delete)
+
+    def _remove(self, ids):
+        remove = {self._id_positions[doc_id] for doc_id in ids if doc_id in self._id_positions}
+        if not remove:
+            return
+        keep_mask = np.ones(len(self._ids), dtype=bool)
+        keep_mask[list(remove)] = False
+        keep = np.flatnonzero(keep_mask)
+
+        if len(keep):
+            # Copy into a fresh buffer of the same capacity: readers may still hold the old view
+            capacity = max(len(keep), 0 if self._buffer is None else len(self._buffer))
+            buffer = np.empty((capacity, self._matrix.shape[1]), dtype=self._matrix.dtype)
+            np.take(self._matrix, keep, axis=0, out=buffer[:len(keep)])
+            self._buffer = buffer
+            self._matrix = buffer[:len(keep)]
+        else:
+            self._matrix = None
+        self._ids = [self._ids[i] for i in keep]
+        self._documents = [self._documents[i] for i in keep]
+        self._metadatas = [self._metadatas[i] for i in keep]
+        self._invalidate()
+        self._dirty = True
+
+    def get(self, ids: Optional[Sequence[str]] = None, where: Optional[Dict[str, Any]] = None,
+            limit: Optional[int] = None, include: Sequence[str] = ("documents", "metadatas")) -> Dict[str, Any]:
+        """Fetch documents by id and/or metadata filter"""
+        if ids is not None:
+            positions = [self._id_positions[doc_id] for doc_id in ids if doc_id in self._id_positions]
+        else:
+            positions = None
+
+        if where:
+            positions = self._candidate_rows(where, positions).tolist()
+        elif positions is None:
+            positions = list(range(len(self._ids)))
+        if limit is not None:
+            positions = positions[:limit]
+
+        result: Dict[str, Any] = {"ids": [self._ids[i] for i in positions]}
+        result["documents"] = [self._documents[i] for i in positions] if "documents" in include else None
+        result["metadatas"] = [self._metadatas[i] for i in positions] if "metadatas" in include else None
+        if "embeddings" in include:
+            result["embeddings"] = (
+                self._decode_rows(np.asarray(self._matrix)[positions]).tolist() if positions else []
+            )
+        return result
+
+    def query(self, query_embeddings: Sequence[Sequence[float]], n_results: int = 10,
+              where: Optional[Dict[str, Any]] = None,
+              include: Sequence[str] = ("documents", "metadatas", "distances"),
+              candidates: Optional[np.ndarray] = None) -> Dict[str, List[List[Any]]]:
+        """
+        Exact top-k search for one or more query embeddings.
+        `candidates` optionally restricts scoring to the given row ordinals
+        (e.g. from a facet index); it is intersected with `where`.
+        """
+        queries = normalize_rows(np.asarray(query_embeddings, dtype=np.float32))
+        result: Dict[str, List[List[Any]]] = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+
+        rows = self._candidate_rows(where, candidates)
+        if self._matrix is None or len(rows) == 0:
+            for _ in range(len(queries)):
+                for key in result:
+                    result[key].append([])
+            return result
+
+        scores = self.score(queries, rows)
+        k = min(n_results, len(rows))
+
+        for q in range(len(queries)):
+            row_scores = scores[q]
+            if k < len(row_scores):
+                top = np.argpartition(-row_scores, k - 1)[:k]
+            else:
+                top = np.arange(len(row_scores))
+            top = top[np.argsort(-row_scores[top], kind="stable")]
+            ordinals = rows[top]
+
+            result["ids"].append([self._ids[i] for i in ordinals])
+            result["documents"].append([self._documents[i] for i in ordinals])
+            result["metadatas"].append([self._metadatas[i] for i in ordinals])
+            result["distances"].append((1.0 - row_scores[top]).tolist())
+
+        for key in ("documents", "metadatas", "distances"):
+            if key not in include:
+                result[key] = None
+        return result
+
+    def _candidate_rows(self, where, candidates) -> np.ndarray:
+        if candidates is None and not where:
+            return np.arange(len(self._ids))
+
+        if where and self.facets.covers(where):
+            # Bitmap intersection: cost follows the size of the matching sets
+            rows = self.facets.candidates(where).astype(np.int64)
+            if candidates is not None:
+                rows = np.intersect1d(rows, np.asarray(candidates, dtype=np.int64), assume_unique=True)
+            return rows
+
+        if candidates is not None:
+            rows = np.asarray(candidates, dtype=np.int64)
+            if where:
+                rows = rows[self.where_mask(where)[rows]]
+            return rows
+        return np.flatnonzero(self.where_mask(where))
+
+    def score(self, queries: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Cosine similarity of normalized queries against the stored rows (all rows by default)"""
+        matrix = self._matrix
+        if rows is not None and len(rows) != len(self._ids):
+            matrix = np.asarray(matrix)[rows]
+
+        if self.dtype == "float32":
+            return queries @ np.asarray(matrix).T
+
+        # Upcast quantized rows chunk by chunk to keep peak memory bounded
+        scores = np.empty((len(queries), len(matrix)), dtype=np.float32)
+        for start in range(0, len(matrix), SCORE_CHUNK_ROWS):
+            chunk = self._decode_rows(matrix[start:start + SCORE_CHUNK_ROWS])
+            scores[:, start:start + len(chunk)] = queries @ chunk.T
+        return scores
+
+    def modify(self, name: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None):
+        """Update collection metadata"""
+        if metadata is not None:
+            self.metadata = dict(metadata)
+            self._dirty = True
+
+    def reset(self):
+        """Remove every document from the store"""
+        self._ids, self._documents, self._metadatas = [], [], []
+        self._matrix = None
+        self._invalidate()
+        self._dirty = True
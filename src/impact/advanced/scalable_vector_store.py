@@ -3,26 +3,62 @@ Scalable Vector Store Implementation
 Addresses the scalability limitations of the JSON snapshot approach
 """
 import os
-import requests
 from typing import List, Dict, Any, Optional, Generator
 import chromadb
-from sentence_transformers import SentenceTransformer
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import hashlib
 import json
+import time
+import threading
 
 from impact.shared.config.advanced import *
+from impact.shared.utils.embedding_cache import CachedEncoder
+from impact.shared.utils.http_client import get_transport
+from impact.shared.utils.answer_cache import bump_corpus_version
+from impact.shared.utils.ingest_pipeline import run_pipeline
+from impact.shared.utils.embedding_pool import EmbeddingPool
+from impact.shared.utils.onnx_encoder import load_embedding_model, embedding_loader
+from impact.shared.database.change_feed import keyset_params, cursor_after, rewind
+from .numpy_vector_store import NumpyVectorStore
 
 class ScalableVectorStoreManager:
-    def __init__(self, batch_size: int = 100):
-        self.embedding_model = SentenceTransformer(EMBEDDING_MODEL)
-        self.client = chromadb.PersistentClient(path=VECTOR_DB_PATH)
+    def __init__(self, batch_size: int = 100, workers: int = EMBEDDING_WORKERS):
+        self.embedding_model = load_embedding_model(EMBEDDING_MODEL, EMBEDDING_BACKEND, ONNX_MODEL_PATH)
+        # Sharded across processes when workers > 1
+        self.embedding_pool = EmbeddingPool(
+            EMBEDDING_MODEL, workers, EMBEDDING_BATCH_SIZE, EMBEDDING_TOKEN_BUDGET,
+            loader=embedding_loader(EMBEDDING_BACKEND, ONNX_MODEL_PATH),
+            model=self.embedding_model
+        )
+        self.encoder = CachedEncoder(EMBEDDING_MODEL, EMBEDDING_CACHE_PATH, model=self.embedding_pool,
+                                     backend=EMBEDDING_BACKEND)
+        self.http = get_transport()
+        self.client = None
         self.collection = None
         self.batch_size = batch_size
+        self.last_page_timing: Dict[str, float] = {}
+        # The pipeline's embed (diff) and write stages share the collection;
+        # re-entrant so the write stage can re-diff while holding it
+        self.store_lock = threading.RLock()
         self.setup_collection()
     
     def setup_collection(self):
-        """Initialize ChromaDB collection with metadata tracking"""
+        """Initialize ChromaDB (or NumPy) collection with metadata tracking"""
+        if VECTOR_STORE_TYPE == "numpy":
+            self.collection = NumpyVectorStore.load_or_create(
+                os.path.join(VECTOR_DB_PATH, "numpy"),
+                "survey_responses",
+                dtype=NUMPY_STORE_DTYPE,
+                metadata={
+                    "description": "Survey responses with embeddings",
+                    "last_sync": None,
+                    "total_processed": 0
+                }
+            )
+            print(f"✅ Connected to NumPy store with {self.collection.count()} documents")
+            return
+        
+        self.client = chromadb.PersistentClient(path=VECTOR_DB_PATH)
         try:
             self.collection = self.client.get_collection("survey_responses")
             print(f"✅ Connected to existing collection with {self.collection.count()} documents")
@@ -37,11 +73,14 @@ class ScalableVectorStoreManager:
             )
             print("✅ Created new scalable collection")
     
-    def stream_supabase_data(self, 
-                           limit: int = 1000, 
-                           offset: int = 0,
+    def stream_supabase_data(self,
+                           limit: int = 1000,
+                           cursor: Optional[Dict[str, Any]] = None,
                            modified_since: Optional[str] = None) -> Generator[List[Dict], None, None]:
-        """Stream data from Supabase in batches"""
+        """
+        Stream responses from Supabase in keyset pages ordered by (updated_at, response_id),
+        starting after `cursor` or at `modified_since`
+        """
         headers = {
             "apikey": SUPABASE_KEY,
             "Authorization": f"Bearer {SUPABASE_KEY}",
@@ -49,21 +88,11 @@ class ScalableVectorStoreManager:
         }
         
         while True:
-            # Build query parameters
-            params = {
-                "select": "*",
-                "limit": limit,
-                "offset": offset,
-                "order": "created_at.asc"
-            }
-            
-            # Add timestamp filter for incremental updates
-            if modified_since:
-                params["created_at"] = f"gte.{modified_since}"
+            params = keyset_params(limit, cursor, modified_since)
             
-            print(f"📥 Fetching batch: offset={offset}, limit={limit}")
+            print(f"📥 Fetching batch after {cursor or modified_since or 'start'}, limit={limit}")
             
-            response = requests.get(
+            response = self.http.get(
                 f"{SUPABASE_URL}/rest/v1/responses",
                 headers=headers,
                 params=params
@@ -85,8 +114,78 @@ class ScalableVectorStoreManager:
             if len(batch) < limit:
                 break
                 
-            offset += limit    
-
+            cursor = cursor_after(batch)
+    
+    def load_sync_cursor(self) -> Optional[Dict[str, Any]]:
+        """Change-feed high-water mark stored in the collection metadata"""
+        metadata = self.collection.metadata or {}
+        if not metadata.get("sync_cursor_updated_at"):
+            return None
+        return {
+            "updated_at": metadata["sync_cursor_updated_at"],
+            "response_id": metadata["sync_cursor_response_id"]
+        }
+    
+    def update_collection_metadata(self, **values):
+        """Merge values into the collection metadata (modify replaces it wholesale)"""
+        metadata = {**(self.collection.metadata or {}), **values}
+        self.collection.modify(metadata={key: value for key, value in metadata.items() if value is not None})
+    
+    def flush_collection(self):
+        """Write pending NumPy store changes to disk (ChromaDB persists on every write)"""
+        if isinstance(self.collection, NumpyVectorStore):
+            self.collection.flush()
+    
+    def save_sync_cursor(self, cursor: Dict[str, Any]):
+        self.update_collection_metadata(
+            sync_cursor_updated_at=str(cursor["updated_at"]),
+            sync_cursor_response_id=int(cursor["response_id"])
+        )
+    
+    def sync_changes(self, cursor: Optional[Dict[str, Any]] = None,
+                     since: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Apply the change feed from a cursor or timestamp through the fetch -> embed
+        -> write pipeline, saving the cursor after every written page so an
+        interrupted sync resumes where it stopped. The NumPy store keeps pages
+        in memory and is flushed once, with the cursor, when the sync ends.
+        """
+        totals = {"processed": 0, "new_or_updated": 0, "cursor": cursor}
+        timing = {"diff_seconds": 0.0, "embed_seconds": 0.0, "write_seconds": 0.0}
+        
+        def write(page: Dict[str, Any]):
+            new_count = self.write_page(page)
+            batch = page['batch']
+            totals["processed"] += len(batch)
+            totals["new_or_updated"] += new_count
+            
+            totals["cursor"] = cursor_after(batch)
+            self.save_sync_cursor(totals["cursor"])
+            
+            page_timing = self.last_page_timing
+            for key in timing:
+                timing[key] += page_timing[key]
+            print(f"📊 Batch complete: {len(batch)} processed, {new_count} new/updated, "
+                  f"{page_timing['deleted']} deleted ({totals['processed']} total) - "
+                  f"diff {page_timing['diff_seconds'] * 1000:.0f}ms, embed {page_timing['embed_seconds'] * 1000:.0f}ms, "
+                  f"write {page_timing['write_seconds'] * 1000:.0f}ms")
+        
+        try:
+            pipeline = run_pipeline(
+                self.stream_supabase_data(limit=self.batch_size, cursor=cursor, modified_since=since),
+                self.embed_page,
+                write,
+                queue_depth=PIPELINE_QUEUE_DEPTH
+            )
+        finally:
+            self.flush_collection()
+            self.embedding_pool.close()
+        print(pipeline.summary())
+        print(self.embedding_pool.summary())
+        
+        return {**totals, "timing": timing, "pipeline": pipeline.get_stats(),
+                "embedding_pool": self.embedding_pool.get_stats()}
+    
     def get_document_hash(self, response_data: Dict) -> str:
         """Generate hash for change detection"""
         # Create hash from key fields to detect changes
@@ -97,143 +196,230 @@ class ScalableVectorStoreManager:
         }
         return hashlib.md5(json.dumps(key_data, sort_keys=True).encode()).hexdigest()
     
-    def process_batch_incremental(self, batch: List[Dict]) -> int:
-        """Process a batch with incremental updates"""
-        new_docs = []
-        updated_count = 0
+    def diff_batch(self, batch: List[Dict]) -> Dict[str, Any]:
+        """
+        Compare a page with the store using one get for all of its ids and the
+        doc hashes in memory. Returns the documents to upsert and the ids to delete.
+        """
+        started = time.perf_counter()
         
-        for item in batch:
-            response_id = str(item.get('response_id', item.get('id')))
+        # Later rows win if the page repeats an id
+        items = {str(item.get('response_id', item.get('id'))): item for item in batch}
+        with self.store_lock:
+            existing = self.collection.get(ids=list(items), include=["metadatas"])
+        stored_hashes = {
+            doc_id: (metadata or {}).get('doc_hash')
+            for doc_id, metadata in zip(existing['ids'], existing['metadatas'])
+        }
+        
+        upserts = []
+        tombstones = []
+        for response_id, item in items.items():
             doc_hash = self.get_document_hash(item)
+            if stored_hashes.get(response_id) == doc_hash:
+                continue  # No change, skip
             
-            # Check if document exists and has changed
-            try:
-                existing = self.collection.get(ids=[response_id])
-                if existing['ids'] and existing['metadatas'][0].get('doc_hash') == doc_hash:
-                    continue  # No change, skip
-                else:
-                    # Document changed, delete old version
-                    self.collection.delete(ids=[response_id])
-                    updated_count += 1
-            except:
-                pass  # New document
-            
-            # Prepare new document
-            response_text = item.get('response_value', '').strip()
-            if len(response_text) < 5:  # Skip very short responses
+            # Soft-deleted or now too short to be useful: drop any stored version
+            response_text = (item.get('response_value') or '').strip()
+            if item.get('deleted_at') or len(response_text) < 5:
+                if response_id in stored_hashes:
+                    tombstones.append(response_id)
                 continue
             
-            doc = {
+            upserts.append({
                 'id': response_id,
                 'text': response_text,
                 'metadata': {
+                    'response_id': response_id,
                     'charity_name': item.get('charity_name', ''),
                     'age_group': item.get('age_group', ''),
                     'question_id': item.get('question_id'),
                     'created_at': item.get('created_at'),
+                    'updated_at': item.get('updated_at'),
                     'doc_hash': doc_hash,
                     'processed_at': datetime.now().isoformat()
                 }
-            }
-            new_docs.append(doc)
+            })
         
-        # Add new documents in batch
-        if new_docs:
-            self.add_documents_batch(new_docs)
+        return {
+            'batch': batch,
+            'upserts': upserts,
+            'tombstones': tombstones,
+            'skipped': len(items) - len(upserts) - len(tombstones),
+            'diff_seconds': time.perf_counter() - started
+        }
+    
+    def embed_page(self, batch: List[Dict]) -> Dict[str, Any]:
+        """
+        Diff a page and embed its new or changed documents (the pipeline's embed
+        stage). This diff only picks what to embed: earlier pages may still be
+        queued for writing, so write_page diffs the page again before applying it.
+        """
+        page = self.diff_batch(batch)
+        
+        # Generate embeddings in batch (cached texts skip the model)
+        started = time.perf_counter()
+        texts = [doc['text'] for doc in page['upserts']]
+        page['embeddings'] = self.encoder.encode(texts).tolist() if texts else []
+        page['embed_seconds'] = time.perf_counter() - started
+        return page
+    
+    def write_page(self, page: Dict[str, Any]) -> int:
+        """
+        Apply an embedded page with one delete for tombstones and one upsert for
+        new or changed documents. The page is re-diffed under the store lock so
+        an id repeated across in-flight pages is compared with the state the
+        earlier page wrote. Per-page timings go to self.last_page_timing.
+        """
+        started = time.perf_counter()
+        with self.store_lock:
+            current = self.diff_batch(page['batch'])
+            
+            # Reuse the embed stage's vectors; encode only documents it skipped
+            embedded = {
+                (doc['id'], doc['text']): embedding
+                for doc, embedding in zip(page['upserts'], page['embeddings'])
+            }
+            missing = [doc for doc in current['upserts'] if (doc['id'], doc['text']) not in embedded]
+            embed_started = time.perf_counter()
+            if missing:
+                vectors = self.encoder.encode([doc['text'] for doc in missing]).tolist()
+                embedded.update({(doc['id'], doc['text']): vector for doc, vector in zip(missing, vectors)})
+            embed_seconds = time.perf_counter() - embed_started
+            
+            if current['tombstones']:
+                self.collection.delete(ids=current['tombstones'])
+            self.upsert_documents_batch(
+                current['upserts'],
+                [embedded[(doc['id'], doc['text'])] for doc in current['upserts']]
+            )
         
-        return len(new_docs)
+        self.last_page_timing = {
+            "rows": len(page['batch']),
+            "skipped": current['skipped'],
+            "upserted": len(current['upserts']),
+            "deleted": len(current['tombstones']),
+            "diff_seconds": page['diff_seconds'] + current['diff_seconds'],
+            "embed_seconds": page['embed_seconds'] + embed_seconds,
+            "write_seconds": time.perf_counter() - started - current['diff_seconds'] - embed_seconds
+        }
+        return len(current['upserts'])
     
-    def add_documents_batch(self, documents: List[Dict]):
-        """Add documents to vector store in batch"""
+    def process_batch_incremental(self, batch: List[Dict]) -> int:
+        """Process a batch with incremental updates: one get, one delete and one upsert"""
+        return self.write_page(self.embed_page(batch))
+    
+    def upsert_documents_batch(self, documents: List[Dict], embeddings: List[List[float]]):
+        """Upsert embedded documents in one store call (replaces stored versions)"""
         if not documents:
             return
         
-        ids = [doc['id'] for doc in documents]
-        texts = [doc['text'] for doc in documents]
-        metadatas = [doc['metadata'] for doc in documents]
-        
-        # Generate embeddings in batch
-        embeddings = self.embedding_model.encode(texts).tolist()
-        
-        # Add to ChromaDB
-        self.collection.add(
-            ids=ids,
-            documents=texts,
+        self.collection.upsert(
+            ids=[doc['id'] for doc in documents],
+            documents=[doc['text'] for doc in documents],
             embeddings=embeddings,
-            metadatas=metadatas
+            metadatas=[doc['metadata'] for doc in documents]
         )
         
-        print(f"✅ Added {len(documents)} documents to vector store")
+        print(f"✅ Upserted {len(documents)} documents to vector store")
     
     def sync_incremental(self, hours_back: int = 24) -> Dict[str, int]:
-        """Perform incremental sync of recent changes"""
-        print(f"🔄 Starting incremental sync (last {hours_back} hours)")
-        
-        # Calculate timestamp for incremental sync
-        since_time = datetime.now() - timedelta(hours=hours_back)
-        since_timestamp = since_time.isoformat()
-        
-        total_processed = 0
-        total_new = 0
-        
-        # Stream and process data in batches
-        for batch in self.stream_supabase_data(
-            limit=self.batch_size,
-            modified_since=since_timestamp
-        ):
-            new_count = self.process_batch_incremental(batch)
-            total_processed += len(batch)
-            total_new += new_count
-            
-            print(f"📊 Batch complete: {len(batch)} processed, {new_count} new/updated")
+        """
+        Sync responses created or edited since the stored cursor. Without a cursor
+        (first run) the window falls back to the last `hours_back` hours
+        """
+        cursor = self.load_sync_cursor()
+        if cursor:
+            # Re-read a short overlap to catch writes that committed behind the cursor
+            since = rewind(cursor, CHANGE_FEED_OVERLAP_SECONDS)
+            print(f"🔄 Starting incremental sync from cursor {cursor['updated_at']} #{cursor['response_id']}")
+        else:
+            since = (datetime.now(timezone.utc) - timedelta(hours=hours_back)).isoformat()
+            print(f"🔄 Starting incremental sync (no cursor yet, last {hours_back} hours)")
+        
+        changes = self.sync_changes(since=since)
         
         # Update collection metadata
-        self.collection.modify(metadata={
-            "last_sync": datetime.now().isoformat(),
-            "total_processed": self.collection.count()
-        })
+        self.update_collection_metadata(
+            last_sync=datetime.now().isoformat(),
+            total_processed=self.collection.count()
+        )
+        self.flush_collection()
+        
+        # Cached answers were generated from the previous corpus
+        corpus_version = bump_corpus_version(CORPUS_VERSION_PATH)
         
-        print(f"✅ Incremental sync complete: {total_new} documents updated")
+        print(f"✅ Incremental sync complete: {changes['new_or_updated']} documents updated")
+        print(self.encoder.summary())
+        print(self.http.summary())
         return {
-            "processed": total_processed,
-            "new_or_updated": total_new,
-            "total_in_store": self.collection.count()
+            "processed": changes["processed"],
+            "new_or_updated": changes["new_or_updated"],
+            "cursor": changes["cursor"],
+            "timing": changes["timing"],
+            "pipeline": changes["pipeline"],
+            "embedding_pool": changes["embedding_pool"],
+            "total_in_store": self.collection.count(),
+            "corpus_version": corpus_version,
+            "embedding_cache": self.encoder.get_stats(),
+            "http": self.http.get_stats()
         }
     
-    def sync_full_scalable(self) -> Dict[str, int]:
-        """Perform full sync using streaming approach"""
-        print("🔄 Starting full scalable sync")
+    def sync_full_scalable(self, resume: bool = False) -> Dict[str, int]:
+        """
+        Perform full sync using the keyset change feed from the beginning,
+        or from the stored cursor when resuming an interrupted run
+        """
+        cursor = self.load_sync_cursor() if resume else None
+        print(f"🔄 Starting full scalable sync{' from ' + str(cursor) if cursor else ''}")
         
-        total_processed = 0
-        
-        # Stream all data in batches
-        for batch in self.stream_supabase_data(limit=self.batch_size):
-            new_count = self.process_batch_incremental(batch)
-            total_processed += len(batch)
-            
-            print(f"📊 Progress: {total_processed} total processed")
+        changes = self.sync_changes(cursor=cursor)
         
         final_count = self.collection.count()
+        self.update_collection_metadata(last_sync=datetime.now().isoformat(), total_processed=final_count)
+        self.flush_collection()
+        corpus_version = bump_corpus_version(CORPUS_VERSION_PATH)
         print(f"✅ Full sync complete: {final_count} documents in vector store")
+        print(self.encoder.summary())
+        print(self.http.summary())
         
         return {
-            "processed": total_processed,
-            "final_count": final_count
+            "processed": changes["processed"],
+            "final_count": final_count,
+            "cursor": changes["cursor"],
+            "timing": changes["timing"],
+            "pipeline": changes["pipeline"],
+            "embedding_pool": changes["embedding_pool"],
+            "corpus_version": corpus_version,
+            "embedding_cache": self.encoder.get_stats(),
+            "http": self.http.get_stats()
         }
 
 # Usage example and comparison
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Sync the vector store from Supabase")
+    parser.add_argument("--workers", type=int, default=EMBEDDING_WORKERS,
+                        help="Embedding processes (0 = one per CPU)")
+    parser.add_argument("--full", action="store_true", help="Full sync instead of incremental")
+    args = parser.parse_args()
+    
     print("🚀 SCALABLE VECTOR STORE DEMO")
     print("=" * 50)
     
     # Initialize scalable manager
-    scalable_manager = ScalableVectorStoreManager(batch_size=50)
+    scalable_manager = ScalableVectorStoreManager(batch_size=50, workers=args.workers)
     
-    # Demonstrate incremental sync
-    result = scalable_manager.sync_incremental(hours_back=168)  # Last week
+    if args.full:
+        result = scalable_manager.sync_full_scalable()
+        document_count = result['final_count']
+    else:
+        # Demonstrate incremental sync
+        result = scalable_manager.sync_incremental(hours_back=168)  # Last week
+        document_count = result['total_in_store']
     
     print(f"\n📊 SCALABILITY COMPARISON:")
-    print(f"Current approach: {result['final_count']} documents")
+    print(f"Current approach: {document_count} documents")
     print(f"Memory usage: Streaming (low)")
     print(f"Update method: Incremental")
     print(f"Suitable for: 1M+ documents ✅")
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+Change feed over the responses table
+Responses are read in (updated_at, response_id) order with keyset cursors, so
+each page is an index range scan regardless of depth and rows inserted or
+edited mid-scan are neither skipped nor duplicated. The DDL adds the
+updated_at column, its trigger, the deleted_at soft-delete marker and the
+composite index the feed pages on. Tables without it can only be paged by
+response_id, which picks up inserts but not edits or deletes.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+CURSOR_ORDER = "updated_at.asc,response_id.asc"
+
+# One-row read that fails when the change-feed DDL has not been applied
+CHANGE_FEED_PROBE = {"select": "response_id,updated_at", "limit": 1}
+
+CHANGE_FEED_SQL = [
+    "ALTER TABLE responses ADD COLUMN IF NOT EXISTS created_at timestamptz NOT NULL DEFAULT now();",
+    "ALTER TABLE responses ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now();",
+    # Soft delete: set deleted_at (which bumps updated_at) so readers drop the row
+    "ALTER TABLE responses ADD COLUMN IF NOT EXISTS deleted_at timestamptz;",
+    """
+CREATE OR REPLACE FUNCTION set_updated_at()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$$;
+""",
+    "DROP TRIGGER IF EXISTS responses_set_updated_at ON responses;",
+    "CREATE TRIGGER responses_set_updated_at BEFORE UPDATE ON responses "
+    "FOR EACH ROW EXECUTE FUNCTION set_updated_at();",
+    "CREATE INDEX IF NOT EXISTS responses_updated_at_response_id_idx ON responses (updated_at, response_id);",
+]
+
+
+def cursor_after(batch: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Cursor positioned after the last row of a page"""
+    last = batch[-1]
+    return {"updated_at": last.get("updated_at"), "response_id": last["response_id"]}
+
+
+def keyset_params(limit: int, cursor: Optional[Dict[str, Any]] = None,
+                  since: Optional[str] = None) -> Dict[str, Any]:
+    """
+    PostgREST query parameters for the page after `cursor` (or from `since`):
+    updated_at > ts OR (updated_at = ts AND response_id > id)
+    """
+    params = {"select": "*", "order": CURSOR_ORDER, "limit": limit}
+    if cursor:
+        ts, response_id = cursor["updated_at"], int(cursor["response_id"])
+        params["or"] = f'(updated_at.gt."{ts}",and(updated_at.eq."{ts}",response_id.gt.{response_id}))'
+    elif since:
+        params["updated_at"] = f"gte.{since}"
+    return params
+
+
+def response_id_params(limit: int, cursor: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Fallback page after `cursor` in response_id order, for tables without the change feed"""
+    params = {"select": "*", "order": "response_id.asc", "limit": limit}
+    if cursor:
+        params["response_id"] = f"gt.{int(cursor['response_id'])}"
+    return params
+
+
+def missing_column_error(body: str) -> bool:
+    """PostgREST error body for a column that does not exist (Postgres 42703)"""
+    return "42703" in body or "does not exist" in body
+
+
+def rewind(cursor: Dict[str, Any], seconds: float) -> str:
+    """
+    Timestamp `seconds` before the cursor. updated_at is stamped when a write
+    starts, so a transaction committing late can land behind a saved cursor;
+    re-reading a short overlap picks it up (unchanged rows are skipped by hash).
+    """
+    stamp = datetime.fromisoformat(str(cursor["updated_at"]).replace("Z", "+00:00"))
+    return (stamp - timedelta(seconds=seconds)).isoformat()
@@ -0,0 +1,175 @@
+"""
+SQL for pgvector similarity search over the responses table
+Index DDL (HNSW or IVFFlat on the embedding, btree on the filter columns) and
+the match_responses function used by SupabaseVectorStore. Shared by both
+setup_database scripts and the pgvector integration tests.
+"""
+from typing import List, Optional
+
+EMBEDDING_DIMENSIONS = 768
+
+# Columns match_responses can filter on; each gets a btree index
+FILTER_COLUMNS = ("charity_name", "age_group", "gender", "question_id")
+
+VECTOR_INDEX_METHODS = ("hnsw", "ivfflat")
+
+# HNSW build parameters (pgvector defaults)
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 64
+
+
+def ivfflat_lists(row_count: int) -> int:
+    """pgvector's rule of thumb: rows / 1000 lists up to 1M rows, sqrt(rows) above"""
+    if row_count > 1_000_000:
+        return int(row_count ** 0.5)
+    return max(1, row_count // 1000)
+
+
+def ivfflat_probes(lists: int) -> int:
+    """pgvector's rule of thumb: probe about sqrt(lists) lists per query"""
+    return max(1, round(int(lists) ** 0.5))
+
+
+def vector_index_sql(method: str = "hnsw", lists: int = 100) -> str:
+    """Cosine-distance index on responses.embedding, matching the <=> operator"""
+    if method == "hnsw":
+        options = f"m = {HNSW_M}, ef_construction = {HNSW_EF_CONSTRUCTION}"
+    elif method == "ivfflat":
+        options = f"lists = {int(lists)}"
+    else:
+        raise ValueError(f"Unknown vector index method: {method} (expected one of {VECTOR_INDEX_METHODS})")
+
+    return (
+        f"CREATE INDEX IF NOT EXISTS responses_embedding_{method}_idx "
+        f"ON responses USING {method} (embedding vector_cosine_ops) WITH ({options});"
+    )
+
+
+def filter_index_sql() -> List[str]:
+    return [
+        f"CREATE INDEX IF NOT EXISTS responses_{column}_idx ON responses ({column});"
+        for column in FILTER_COLUMNS
+    ]
+
+
+# A filter value may be a string or a JSON array of strings (matched with OR);
+# a missing key means no filter on that column
+FILTER_VALUES_FUNCTION = """
+CREATE OR REPLACE FUNCTION match_filter_values(filter jsonb, key text)
+RETURNS text[]
+LANGUAGE sql IMMUTABLE
+AS $$
+    SELECT CASE jsonb_typeof(filter -> key)
+        WHEN 'array' THEN ARRAY(SELECT jsonb_array_elements_text(filter -> key))
+        WHEN 'string' THEN ARRAY[filter ->> key]
+        ELSE NULL
+    END;
+$$;
+"""
+
+
+# HNSW returns at most ef_search candidates per scan (pgvector default 40)
+HNSW_MIN_EF_SEARCH = 40
+
+
+def nearest_rows_sql(filtered: bool) -> str:
+    """
+    RETURN QUERY for match_responses. Unfiltered searches take the nearest
+    match_count rows from the vector index. Filtered searches order by an
+    expression the index cannot serve, so the planner uses the btree filter
+    indexes and ranks every matching row exactly: HNSW post-filters its
+    ef_search candidates and could return far fewer rows than requested.
+    """
+    if filtered:
+        where = """
+                AND (charity_names IS NULL OR r.charity_name = ANY (charity_names))
+                AND (age_groups IS NULL OR r.age_group = ANY (age_groups))
+                AND (genders IS NULL OR r.gender = ANY (genders))
+                AND (question_ids IS NULL OR r.question_id = ANY (question_ids))"""
+        order = "(r.embedding <=> query_embedding) + 0"
+    else:
+        where = ""
+        order = "r.embedding <=> query_embedding"
+
+    return f"""
+        RETURN QUERY
+        SELECT
+            nearest.response_id,
+            nearest.participant_id,
+            nearest.charity_name,
+            nearest.age_group,
+            nearest.gender,
+            nearest.question_id,
+            nearest.response_value,
+            nearest.thematic_tags,
+            1 - nearest.distance AS similarity
+        FROM (
+            SELECT r.*, r.embedding <=> query_embedding AS distance
+            FROM responses r
+            WHERE r.embedding IS NOT NULL{where}
+            ORDER BY {order}
+            LIMIT match_count
+        ) nearest
+        WHERE 1 - nearest.distance > match_threshold
+        ORDER BY nearest.distance;"""
+
+
+def match_responses_sql(dimensions: int = EMBEDDING_DIMENSIONS, probes: int = ivfflat_probes(100)) -> str:
+    """
+    match_responses with every value bound as a parameter (no SQL built from
+    filter text). The nearest match_count rows are taken by ORDER BY distance
+    LIMIT and the similarity threshold is applied to those rows afterwards.
+    Unfiltered, that top-k comes from the ANN index (approximate, with
+    hnsw.ef_search raised to match_count so it can return that many rows, and
+    ivfflat.probes set to `probes` instead of pgvector's default of one list);
+    filtered, it is an exact scan of the rows matching the filters.
+    """
+    return f"""
+CREATE OR REPLACE FUNCTION match_responses (
+    query_embedding vector({int(dimensions)}),
+    match_threshold float DEFAULT 0.78,
+    match_count int DEFAULT 10,
+    filter jsonb DEFAULT '{{}}'
+)
+RETURNS TABLE (
+    response_id int,
+    participant_id text,
+    charity_name text,
+    age_group text,
+    gender text,
+    question_id text,
+    response_value text,
+    thematic_tags text[],
+    similarity float
+)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    charity_names text[] := match_filter_values(filter, 'charity_name');
+    age_groups text[] := match_filter_values(filter, 'age_group');
+    genders text[] := match_filter_values(filter, 'gender');
+    question_ids text[] := match_filter_values(filter, 'question_id');
+BEGIN
+    IF charity_names IS NULL AND age_groups IS NULL AND genders IS NULL AND question_ids IS NULL THEN
+        PERFORM set_config('hnsw.ef_search', greatest(match_count, {HNSW_MIN_EF_SEARCH})::text, true);
+        PERFORM set_config('ivfflat.probes', '{int(probes)}', true);{nearest_rows_sql(False)}
+    ELSE{nearest_rows_sql(True)}
+    END IF;
+END;
+$$;
+"""
+
+
+def vector_search_setup_sql(method: str = "hnsw", lists: int = 100,
+                            dimensions: int = EMBEDDING_DIMENSIONS, probes: Optional[int] = None) -> List[str]:
+    """
+    Every statement needed for index-backed vector search, in order. IVFFlat
+    searches probe `probes` lists (default about sqrt(lists))
+    """
+    return [
+        "CREATE EXTENSION IF NOT EXISTS vector;",
+        *filter_index_sql(),
+        vector_index_sql(method, lists),
+        FILTER_VALUES_FUNCTION,
+        match_responses_sql(dimensions, probes or ivfflat_probes(lists)),
+    ]
@@ -0,0 +1,267 @@
+"""
+Semantic answer cache
+Serves a previous answer when a new question is a near-duplicate of one already
+answered (cosine similarity of the query embeddings), within the same filter
+scope and corpus version. Memory tier is LRU + TTL; an optional SQLite file
+keeps answers across restarts.
+"""
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLD = 0.92
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_TTL_SECONDS = 3600
+UNVERSIONED = "unversioned"
+
+
+def scope_key(scope: Optional[Dict[str, Any]], corpus_version: Optional[str]) -> str:
+    """Canonical key for a filter scope at a given corpus version"""
+    return json.dumps({"scope": scope or {}, "corpus": corpus_version or UNVERSIONED},
+                      sort_keys=True, default=str)
+
+
+def unit_vector(embedding: Sequence[float]) -> np.ndarray:
+    vector = np.asarray(embedding, dtype=np.float32).ravel()
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class CorpusVersion:
+    """
+    Version stamp of the indexed corpus, stored in a small file.
+
+    Sync jobs call bump() after writing to the vector store; readers call
+    current(), which costs one stat() unless the file changed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._stamp = None
+        self._version = UNVERSIONED
+
+    def current(self) -> str:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return UNVERSIONED
+        # bump() replaces the file, so the inode changes even when mtime does not
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        if stamp != self._stamp:
+            with open(self.path, "r") as f:
+                self._version = f.read().strip() or UNVERSIONED
+            self._stamp = stamp
+        return self._version
+
+    def bump(self) -> str:
+        """Write a fresh version stamp, invalidating cached answers everywhere"""
+        version = uuid.uuid4().hex
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(version)
+        os.replace(tmp_path, self.path)
+        return version
+
+
+def bump_corpus_version(path: str) -> str:
+    return CorpusVersion(path).bump()
+
+
+class SemanticAnswerCache:
+    """
+    Answer cache keyed by query embedding, filter scope and corpus version.
+
+    lookup() returns the most similar cached answer in the same scope when its
+    cosine similarity is at least `threshold`. Entries expire after
+    `ttl_seconds` and the least recently used entry is evicted beyond
+    `max_entries`. When `path` is set every entry is also written to SQLite and
+    reloaded on start-up. Several instances (servers, workers) may share the
+    file: SQLite assigns row ids, and a failing disk tier only costs cache
+    hits, never the query.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS, path: Optional[str] = None,
+                 clock: Callable[[], float] = time.time):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.path = path
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        # Disk rows are keyed by their SQLite rowid; memory-only entries get negative ids
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_local_id = -1
+        self._db: Optional[sqlite3.Connection] = None
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expirations": 0,
+                      "disk_errors": 0}
+
+        if path:
+            try:
+                self._open_disk_tier(path)
+            except (sqlite3.Error, OSError) as e:
+                self._disk_failed_locked(e)
+                self.close()
+
+    def _disk_failed_locked(self, error: Exception):
+        """Log a disk-tier failure; the memory tier keeps serving"""
+        self.stats["disk_errors"] += 1
+        logger.warning(f"Answer cache disk tier error ({self.path}): {error}")
+
+    def _open_disk_tier(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "id INTEGER PRIMARY KEY, scope_key TEXT NOT NULL, question TEXT NOT NULL, "
+            "vector BLOB NOT NULL, answer TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._db.execute("DELETE FROM answers WHERE created_at < ?", (self.clock() - self.ttl_seconds,))
+        rows = self._db.execute(
+            "SELECT id, scope_key, question, vector, answer, created_at FROM answers "
+            "ORDER BY created_at DESC LIMIT ?", (self.max_entries,)
+        ).fetchall()
+        self._db.execute("DELETE FROM answers WHERE id NOT IN (SELECT id FROM answers "
+                         "ORDER BY created_at DESC LIMIT ?)", (self.max_entries,))
+        self._db.commit()
+
+        # Oldest first, so the most recent answers end up most recently used
+        for entry_id, key, question, vector, answer, created_at in reversed(rows):
+            self._entries[entry_id] = {
+                "scope_key": key,
+                "question": question,
+                "vector": np.frombuffer(vector, dtype=np.float32),
+                "answer": json.loads(answer),
+                "created_at": created_at
+            }
+        if rows:
+            logger.info(f"Loaded {len(rows)} cached answers from {path}")
+
+    def _drop_locked(self, entry_ids: List[int]):
+        """Drop entries from memory only; other instances may still use the rows"""
+        for entry_id in entry_ids:
+            self._entries.pop(entry_id, None)
+
+    def _expire_locked(self):
+        cutoff = self.clock() - self.ttl_seconds
+        expired = [i for i, entry in self._entries.items() if entry["created_at"] < cutoff]
+        if expired:
+            self.stats["expirations"] += len(expired)
+            self._drop_locked(expired)
+            # Expired rows are stale for every instance, so the file can drop them too
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM answers WHERE created_at < ?", (cutoff,))
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    self._disk_failed_locked(e)
+
+    def lookup(self, embedding: Sequence[float], scope: Optional[Dict[str, Any]] = None,
+               corpus_version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Return {'answer', 'question', 'similarity'} for the best match, or None"""
+        key = scope_key(scope, corpus_version)
+        query = unit_vector(embedding)
+
+        with self._lock:
+            self._expire_locked()
+            candidates = [(i, entry) for i, entry in self._entries.items() if entry["scope_key"] == key]
+            if candidates:
+                matrix = np.stack([entry["vector"] for _, entry in candidates])
+                similarities = matrix @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    entry_id, entry = candidates[best]
+                    self._entries.move_to_end(entry_id)
+                    self.stats["hits"] += 1
+                    return {
+                        "answer": entry["answer"],
+                        "question": entry["question"],
+                        "similarity": float(similarities[best])
+                    }
+            self.stats["misses"] += 1
+            return None
+
+    def store(self, question: str, embedding: Sequence[float], answer: Dict[str, Any],
+              scope: Optional[Dict[str, Any]] = None, corpus_version: Optional[str] = None):
+        """Cache an answer payload (must be JSON-serializable when a disk tier is used)"""
+        entry = {
+            "scope_key": scope_key(scope, corpus_version),
+            "question": question,
+            "vector": unit_vector(embedding),
+            "answer": answer,
+            "created_at": self.clock()
+        }
+
+        with self._lock:
+            entry_id = None
+            if self._db is not None:
+                try:
+                    cursor = self._db.execute(
+                        "INSERT INTO answers (scope_key, question, vector, answer, created_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (entry["scope_key"], question, entry["vector"].tobytes(),
+                         json.dumps(answer, default=str), entry["created_at"])
+                    )
+                    entry_id = cursor.lastrowid
+                    # Keep the file to the newest max_entries rows across all instances
+                    self._db.execute("DELETE FROM answers WHERE id NOT IN (SELECT id FROM answers "
+                                     "ORDER BY created_at DESC LIMIT ?)", (self.max_entries,))
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    self._db.rollback()
+                    self._disk_failed_locked(e)
+                    entry_id = None
+            if entry_id is None:
+                entry_id = self._next_local_id
+                self._next_local_id -= 1
+            self._entries[entry_id] = entry
+            self.stats["stores"] += 1
+
+            overflow = len(self._entries) - self.max_entries
+            if overflow > 0:
+                self.stats["evictions"] += overflow
+                self._drop_locked(list(self._entries)[:overflow])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM answers")
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    self._disk_failed_locked(e)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "entries": len(self._entries),
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            "persistent": self._db is not None,
+            **self.stats
+        }
+
+    def summary(self) -> str:
+        stats = self.get_stats()
+        return (f"💾 Answer cache: {stats['hits']} hits, {stats['misses']} misses "
+                f"({stats['hit_rate']:.0%}), {stats['entries']} entries")
@@ -0,0 +1,72 @@
+"""
+Length-bucketed dynamic batching for encode calls
+A transformer batch is padded to its longest member, so mixing 20-character
+MCQ answers with multi-sentence stories wastes most of the compute on padding.
+Texts are sorted by token length and packed into batches whose padded size
+(batch size x longest text) stays under a token budget: many short texts per
+batch, few long ones. Callers scatter the results back to input order.
+"""
+from typing import Any, List, Optional, Sequence
+
+DEFAULT_TOKEN_BUDGET = 8192
+DEFAULT_MAX_BATCH_SIZE = 256
+
+# Rough characters per word-piece for English when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count, including the [CLS]/[SEP] pair"""
+    return len(text) // CHARS_PER_TOKEN + 2
+
+
+def token_lengths(model: Any, texts: Sequence[str], max_length: Optional[int] = None) -> List[int]:
+    """
+    Token count of each text with the model's own tokenizer when it exposes
+    one (sentence-transformers or OnnxEncoder), otherwise an estimate.
+    Capped at the model's max_seq_length, since longer inputs are truncated.
+    """
+    cap = max_length or getattr(model, "max_seq_length", None)
+    tokenizer = getattr(model, "tokenizer", None)
+    texts = [str(text).strip() for text in texts]
+
+    if tokenizer is not None and hasattr(tokenizer, "encode_batch"):
+        # tokenizers.Tokenizer, which may pad: count real tokens only
+        lengths = [sum(encoding.attention_mask) for encoding in tokenizer.encode_batch(texts)]
+    elif tokenizer is not None and callable(tokenizer):
+        # transformers tokenizer
+        encoded = tokenizer(texts, add_special_tokens=True, truncation=bool(cap), max_length=cap)
+        lengths = [len(ids) for ids in encoded["input_ids"]]
+    else:
+        lengths = [estimate_tokens(text) for text in texts]
+
+    return [min(length, cap) for length in lengths] if cap else lengths
+
+
+def token_budget_batches(lengths: Sequence[int], max_tokens: int = DEFAULT_TOKEN_BUDGET,
+                         max_batch_size: int = DEFAULT_MAX_BATCH_SIZE) -> List[List[int]]:
+    """
+    Input positions grouped into batches of similar length, shortest first.
+    A batch grows while (size + 1) x its longest length fits in max_tokens and
+    it has fewer than max_batch_size texts; a text over the budget on its own
+    gets a batch to itself.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches: List[List[int]] = []
+    current: List[int] = []
+
+    for i in order:
+        # Ascending order: the newest text is the longest in the batch
+        if current and ((len(current) + 1) * lengths[i] > max_tokens or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+        current.append(i)
+
+    if current:
+        batches.append(current)
+    return batches
+
+
+def padded_tokens(lengths: Sequence[int], batches: List[List[int]]) -> int:
+    """Tokens actually computed once every batch is padded to its longest member"""
+    return sum(len(batch) * max(lengths[i] for i in batch) for batch in batches)
@@ -0,0 +1,140 @@
+"""
+In-memory BM25 lexical index
+Inverted index over response text that can be updated one document at a time
+and ranks the whole corpus without any LLM or embedding calls
+"""
+import re
+import math
+import heapq
+from collections import Counter
+from typing import List, Dict, Any, Optional, Callable, Iterable, Tuple, Hashable
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a an and are as at be been but by do does did for from had has have he her him his how i if in into is it its
+me my of on or our she so than that the their them then there these they this to too us was we were what when
+where which who why will with you your
+""".split())
+
+
+def stem(token: str) -> str:
+    """Conservative suffix stripping so simple inflections share a term"""
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 5 and token.endswith("ing"):
+        return token[:-3]
+    if len(token) > 4 and token.endswith("ed"):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, split on non-alphanumerics, drop stopwords and stem"""
+    return [
+        stem(token)
+        for token in TOKEN_PATTERN.findall((text or "").lower())
+        if token not in STOPWORDS
+    ]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index of term -> {doc_id: term frequency}.
+
+    Documents can be added, replaced or removed at any time; corpus statistics
+    (document count, average length, document frequencies) are maintained
+    incrementally so there is no rebuild step.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[Hashable, int]] = {}
+        self._doc_terms: Dict[Hashable, Counter] = {}
+        self._doc_lengths: Dict[Hashable, int] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def __contains__(self, doc_id: Hashable) -> bool:
+        return doc_id in self._doc_lengths
+
+    @property
+    def average_length(self) -> float:
+        return self._total_length / len(self._doc_lengths) if self._doc_lengths else 0.0
+
+    def add(self, doc_id: Hashable, text: str):
+        """Index a document, replacing any previous version with the same id"""
+        if doc_id in self._doc_lengths:
+            self.remove(doc_id)
+
+        terms = Counter(tokenize(text))
+        for term, freq in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = freq
+
+        length = sum(terms.values())
+        self._doc_terms[doc_id] = terms
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+
+    def add_many(self, documents: Iterable[Tuple[Hashable, str]]) -> int:
+        """Index (doc_id, text) pairs; returns how many were indexed"""
+        count = 0
+        for doc_id, text in documents:
+            self.add(doc_id, text)
+            count += 1
+        return count
+
+    def remove(self, doc_id: Hashable) -> bool:
+        """Remove a document from the index"""
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return False
+
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+
+        self._total_length -= self._doc_lengths.pop(doc_id)
+        return True
+
+    def idf(self, term: str) -> float:
+        df = len(self._postings.get(term, ()))
+        n = len(self._doc_lengths)
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, k: int = 10,
+               doc_filter: Optional[Callable[[Hashable], bool]] = None) -> List[Tuple[Hashable, float]]:
+        """
+        Rank documents against the query.
+        Only the postings of the query terms are visited; documents rejected
+        by doc_filter are skipped before scoring.
+        """
+        avg_length = self.average_length or 1.0
+        scores: Dict[Hashable, float] = {}
+
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf(term)
+            for doc_id, freq in postings.items():
+                if doc_filter is not None and not doc_filter(doc_id):
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * freq * (self.k1 + 1) / (freq + norm)
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "documents": len(self._doc_lengths),
+            "terms": len(self._postings),
+            "average_length": self.average_length
+        }
@@ -0,0 +1,424 @@
+"""
+Persistent, content-addressed embedding cache
+Shared by every ingestion path so re-populating or migrating only embeds changed texts
+"""
+import os
+import json
+import hashlib
+import unicodedata
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, so only one process may write a cache dir
+    fcntl = None
+
+KEY_BYTES = 16
+INITIAL_CAPACITY = 1024
+
+# encode() kwargs that only change how the work is scheduled, not the vectors produced
+NON_SEMANTIC_ENCODE_KWARGS = frozenset({
+    "batch_size", "show_progress_bar", "device", "convert_to_numpy", "convert_to_tensor"
+})
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivial Unicode/whitespace differences share one cache entry"""
+    text = unicodedata.normalize("NFC", text or "")
+    return " ".join(text.split())
+
+
+def text_key(text: str) -> bytes:
+    """Compact content hash of the normalized text"""
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+
+def model_slug(model_name: str) -> str:
+    """Filesystem-safe name for a model's cache files"""
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in model_name)
+
+
+def encode_namespace(backend: str = "torch", **encode_kwargs) -> str:
+    """
+    Cache namespace for an encoder configuration.
+
+    The default torch backend with no output-affecting kwargs maps to the empty
+    namespace so existing caches keep working; anything else (another backend,
+    normalize_embeddings, precision, ...) gets its own files.
+    """
+    parts = [] if backend == "torch" else [backend]
+    for name in sorted(encode_kwargs):
+        if name not in NON_SEMANTIC_ENCODE_KWARGS:
+            parts.append(f"{name}={encode_kwargs[name]}")
+    return ",".join(parts)
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache for a single model.
+
+    Vectors live in a memory-mapped float32 slab (one row per entry) and the
+    key index is an append-only file of 16-byte content hashes, so opening the
+    cache only reads the keys and never the vectors themselves. The namespace
+    separates encoder configurations (backend, normalization) of one model.
+    Writes hold an exclusive lock on a sidecar .lock file and first pick up
+    rows other processes appended, so several processes can share a cache dir.
+    """
+
+    def __init__(self, cache_dir: str, model_name: str, dimension: Optional[int] = None,
+                 namespace: str = ""):
+        self.cache_dir = cache_dir
+        self.model_name = model_name
+        self.namespace = namespace
+        self.dimension = dimension
+
+        slug = model_slug(f"{model_name}@{namespace}" if namespace else model_name)
+        self.slab_path = os.path.join(cache_dir, f"{slug}.f32")
+        self.keys_path = os.path.join(cache_dir, f"{slug}.keys")
+        self.meta_path = os.path.join(cache_dir, f"{slug}.json")
+        self.lock_path = os.path.join(cache_dir, f"{slug}.lock")
+
+        self._index: Dict[bytes, int] = {}
+        self._count = 0
+        self._capacity = 0
+        self._slab: Optional[np.memmap] = None
+        self.stats = {"hits": 0, "misses": 0, "writes": 0}
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        """Load the key index and map the existing slab"""
+        if not os.path.exists(self.meta_path):
+            return
+
+        with open(self.meta_path, "r") as f:
+            meta = json.load(f)
+
+        if meta.get("model_name") != self.model_name or meta.get("namespace", "") != self.namespace:
+            raise ValueError(
+                f"Embedding cache at {self.cache_dir} belongs to {meta.get('model_name')} "
+                f"[{meta.get('namespace', '')}], not {self.model_name} [{self.namespace}]"
+            )
+        if self.dimension and meta["dimension"] != self.dimension:
+            raise ValueError(
+                f"Embedding cache dimension {meta['dimension']} does not match requested {self.dimension}"
+            )
+
+        self.dimension = meta["dimension"]
+        row_bytes = self.dimension * 4
+
+        # A crash between creating the slab and the key file leaves meta without
+        # keys; that is an empty cache, not a corrupt one
+        raw_keys = b""
+        if os.path.exists(self.keys_path):
+            with open(self.keys_path, "rb") as f:
+                raw_keys = f.read()
+
+        slab_rows = os.path.getsize(self.slab_path) // row_bytes if os.path.exists(self.slab_path) else 0
+
+        # Only trust rows that made it into all three files (a crash mid-append
+        # leaves the tail unreferenced and it is simply overwritten next time)
+        self._count = min(meta.get("count", 0), len(raw_keys) // KEY_BYTES, slab_rows)
+        self._capacity = slab_rows
+        self._index = {
+            raw_keys[i * KEY_BYTES:(i + 1) * KEY_BYTES]: i
+            for i in range(self._count)
+        }
+
+        if self._capacity:
+            self._slab = np.memmap(self.slab_path, dtype=np.float32, mode="r+",
+                                   shape=(self._capacity, self.dimension))
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive cross-process lock around appends and meta writes"""
+        with open(self.lock_path, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _sync_from_disk(self):
+        """Index rows that other processes appended since we last looked (lock held)"""
+        if not os.path.exists(self.meta_path):
+            return
+        with open(self.meta_path, "r") as f:
+            meta = json.load(f)
+        if self.dimension is None:
+            self.dimension = meta["dimension"]
+        elif meta["dimension"] != self.dimension:
+            raise ValueError(
+                f"Embedding cache dimension {meta['dimension']} does not match requested {self.dimension}"
+            )
+
+        # Same rule as _load: only rows present in all three files count
+        key_rows = os.path.getsize(self.keys_path) // KEY_BYTES if os.path.exists(self.keys_path) else 0
+        slab_rows = os.path.getsize(self.slab_path) // (self.dimension * 4) if os.path.exists(self.slab_path) else 0
+        count = min(meta.get("count", 0), key_rows, slab_rows)
+        if count <= self._count:
+            return
+
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._count * KEY_BYTES)
+            raw_keys = f.read((count - self._count) * KEY_BYTES)
+        if slab_rows > self._capacity:
+            self._slab = None
+            self._capacity = slab_rows
+            self._slab = np.memmap(self.slab_path, dtype=np.float32, mode="r+",
+                                   shape=(self._capacity, self.dimension))
+
+        for offset in range(len(raw_keys) // KEY_BYTES):
+            key = raw_keys[offset * KEY_BYTES:(offset + 1) * KEY_BYTES]
+            self._index.setdefault(key, self._count + offset)
+        self._count += len(raw_keys) // KEY_BYTES
+
+    def _ensure_capacity(self, needed: int):
+        """Grow the slab file geometrically and remap it"""
+        if needed <= self._capacity:
+            return
+
+        new_capacity = max(self._capacity or INITIAL_CAPACITY, INITIAL_CAPACITY)
+        while new_capacity < needed:
+            new_capacity *= 2
+
+        if self._slab is not None:
+            self._slab.flush()
+            del self._slab
+            self._slab = None
+
+        with open(self.slab_path, "ab") as f:
+            f.truncate(new_capacity * self.dimension * 4)
+
+        self._capacity = new_capacity
+        self._slab = np.memmap(self.slab_path, dtype=np.float32, mode="r+",
+                               shape=(self._capacity, self.dimension))
+
+    def _write_meta(self):
+        tmp_path = self.meta_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "model_name": self.model_name,
+                "namespace": self.namespace,
+                "dimension": self.dimension,
+                "count": self._count
+            }, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, text: str) -> bool:
+        return text_key(text) in self._index
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """Return the cached embedding for a text, or None"""
+        vectors, _ = self.get_many([text])
+        return vectors[0]
+
+    def get_many(self, texts: Sequence[str]) -> Tuple[List[Optional[np.ndarray]], List[int]]:
+        """
+        Look up several texts at once.
+        Returns (vectors, missing_positions) where vectors[i] is None for misses.
+        """
+        vectors: List[Optional[np.ndarray]] = []
+        missing: List[int] = []
+
+        for i, text in enumerate(texts):
+            row = self._index.get(text_key(text))
+            if row is None:
+                vectors.append(None)
+                missing.append(i)
+            else:
+                vectors.append(np.array(self._slab[row]))
+
+        self.stats["hits"] += len(texts) - len(missing)
+        self.stats["misses"] += len(missing)
+        return vectors, missing
+
+    def put(self, text: str, vector: Union[Sequence[float], np.ndarray]):
+        """Store a single embedding"""
+        self.put_many([text], [vector])
+
+    def put_many(self, texts: Sequence[str], vectors: Union[Sequence[Sequence[float]], np.ndarray]):
+        """Store embeddings for texts that are not already cached"""
+        if len(texts) == 0:
+            return
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(texts):
+            raise ValueError("put_many expects one embedding row per text")
+
+        keys = [text_key(text) for text in texts]
+        if all(key in self._index for key in keys):
+            return
+
+        with self._file_lock():
+            self._put_locked(keys, vectors)
+
+    def _put_locked(self, keys: List[bytes], vectors: np.ndarray):
+        # Another process may have appended (or already cached some of these) since we loaded
+        self._sync_from_disk()
+        if self.dimension is None:
+            self.dimension = int(vectors.shape[1])
+        elif vectors.shape[1] != self.dimension:
+            raise ValueError(
+                f"Embedding dimension {vectors.shape[1]} does not match cache dimension {self.dimension}"
+            )
+
+        new_keys: List[bytes] = []
+        new_rows: List[int] = []
+        seen = set()
+        for i, key in enumerate(keys):
+            if key in self._index or key in seen:
+                continue
+            seen.add(key)
+            new_keys.append(key)
+            new_rows.append(i)
+
+        if not new_keys:
+            return
+
+        start = self._count
+        self._ensure_capacity(start + len(new_keys))
+        self._slab[start:start + len(new_keys)] = vectors[new_rows]
+        self._slab.flush()
+
+        # Vectors first, then keys, then the count: a partial write is never visible
+        with open(self.keys_path, "r+b" if os.path.exists(self.keys_path) else "wb") as f:
+            f.seek(start * KEY_BYTES)
+            f.write(b"".join(new_keys))
+            f.truncate()
+
+        self._count = start + len(new_keys)
+        self.stats["writes"] += len(new_keys)
+        self._write_meta()
+
+        # Only publish the rows once they are durable, so a failed write never
+        # leaves keys in the index pointing at garbage rows
+        for offset, key in enumerate(new_keys):
+            self._index[key] = start + offset
+
+    def bytes_on_disk(self) -> int:
+        """Total size of the slab, key index and metadata files"""
+        return sum(
+            os.path.getsize(path)
+            for path in (self.slab_path, self.keys_path, self.meta_path)
+            if os.path.exists(path)
+        )
+
+    def hit_ratio(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        return {
+            "model_name": self.model_name,
+            "entries": self._count,
+            "dimension": self.dimension,
+            "hits": self.stats["hits"],
+            "misses": self.stats["misses"],
+            "writes": self.stats["writes"],
+            "hit_ratio": self.hit_ratio(),
+            "bytes_on_disk": self.bytes_on_disk()
+        }
+
+    def summary(self) -> str:
+        """One-line human readable summary for progress output"""
+        return cache_summary(self.get_stats())
+
+
+def cache_summary(stats: Dict[str, Any]) -> str:
+    lookups = stats["hits"] + stats["misses"]
+    return (
+        f"💾 Embedding cache: {stats['hits']}/{lookups} hits ({stats['hit_ratio']:.1%}), "
+        f"{stats['entries']} entries, {stats['bytes_on_disk'] / (1024 * 1024):.2f} MB on disk"
+    )
+
+
+class CachedEncoder:
+    """
+    Drop-in replacement for SentenceTransformer.encode that consults an
+    EmbeddingCache first and only runs the model on texts it has not seen.
+    The model is loaded lazily, so a fully cached run never imports torch.
+    Each backend / encode-kwargs combination reads and writes its own namespace.
+    """
+
+    def __init__(self, model_name: str, cache_dir: str, model: Any = None, backend: str = "torch"):
+        self.model_name = model_name
+        self.cache_dir = cache_dir
+        self.backend = backend
+        self._model = model
+        self._caches: Dict[str, EmbeddingCache] = {}
+        self.cache = self._cache_for({})
+
+    def _cache_for(self, encode_kwargs: Dict[str, Any]) -> EmbeddingCache:
+        namespace = encode_namespace(self.backend, **encode_kwargs)
+        cache = self._caches.get(namespace)
+        if cache is None:
+            cache = EmbeddingCache(self.cache_dir, self.model_name, namespace=namespace)
+            self._caches[namespace] = cache
+        return cache
+
+    @property
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name)
+        return self._model
+
+    def encode(self, texts: Union[str, Sequence[str]], **kwargs) -> np.ndarray:
+        """Encode texts, returning a float32 array in input order"""
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+        texts = list(texts)
+
+        cache = self._cache_for(kwargs)
+        if not texts:
+            return np.zeros((0, cache.dimension or 0), dtype=np.float32)
+
+        vectors, missing = cache.get_many(texts)
+
+        if missing:
+            # Deduplicate by content hash so repeated texts are embedded once
+            unique: Dict[bytes, str] = {}
+            for i in missing:
+                unique.setdefault(text_key(texts[i]), texts[i])
+            to_encode = list(unique.values())
+
+            encoded = np.asarray(self.model.encode(to_encode, **kwargs), dtype=np.float32)
+            cache.put_many(to_encode, encoded)
+
+            by_key = {key: encoded[j] for j, key in enumerate(unique)}
+            for i in missing:
+                vectors[i] = by_key[text_key(texts[i])]
+
+        result = np.vstack(vectors).astype(np.float32, copy=False)
+        return result[0] if single else result
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Totals across every namespace this encoder has used, plus each namespace's stats"""
+        namespaces = {namespace: cache.get_stats() for namespace, cache in self._caches.items()}
+        totals = {
+            field: sum(stats[field] for stats in namespaces.values())
+            for field in ("entries", "hits", "misses", "writes", "bytes_on_disk")
+        }
+        lookups = totals["hits"] + totals["misses"]
+        return {
+            "model_name": self.model_name,
+            "dimension": self.cache.dimension,
+            **totals,
+            "hit_ratio": totals["hits"] / lookups if lookups else 0.0,
+            "namespaces": namespaces
+        }
+
+    def summary(self) -> str:
+        return cache_summary(self.get_stats())
@@ -0,0 +1,163 @@
+"""
+Multi-process embedding pool for bulk (re)indexing
+Texts are sorted by token length and packed into batches under a token budget
+(see batching.py), and the batches are spread across worker processes that
+each load the model once. Results come back in input order. Exposes the same encode() as
+SentenceTransformer, so it can sit behind a CachedEncoder.
+"""
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .batching import token_lengths, token_budget_batches, padded_tokens, DEFAULT_TOKEN_BUDGET
+
+DEFAULT_BATCH_SIZE = 256
+
+# Model loaded once per worker process by _init_worker
+_worker_model = None
+
+
+def load_sentence_transformer(model_name: str, threads: Optional[int] = None):
+    """Default model loader (runs inside each worker with its share of the cores)"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    if threads:
+        torch.set_num_threads(threads)
+    return SentenceTransformer(model_name, device="cpu")
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """0 or None means one worker per CPU"""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def _init_worker(loader: Callable[..., Any], model_name: str, threads: int):
+    global _worker_model
+    # Split the cores between workers instead of every worker using all of them;
+    # the loader applies the limit to its own runtime (torch or onnxruntime)
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    _worker_model = loader(model_name, threads=threads)
+
+
+def _encode_batch(texts: List[str], kwargs: Dict[str, Any]) -> np.ndarray:
+    return np.asarray(_worker_model.encode(texts, batch_size=len(texts), **kwargs), dtype=np.float32)
+
+
+class EmbeddingPool:
+    """
+    Shards encode() calls across `workers` processes. Each batch holds at most
+    `batch_size` texts and `token_budget` padded tokens. With one worker the
+    model runs in-process (still batched by length), reusing `model` if one is
+    already loaded; its tokenizer also sizes the batches. Processes start on the first encode() and stay up until
+    close().
+    """
+
+    def __init__(self, model_name: str, workers: Optional[int] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 loader: Callable[..., Any] = load_sentence_transformer, model: Any = None):
+        self.model_name = model_name
+        self.workers = resolve_workers(workers)
+        self.batch_size = batch_size
+        self.token_budget = token_budget
+        self.loader = loader
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._model = model
+        self.stats = {"calls": 0, "texts": 0, "batches": 0, "tokens": 0, "padded_tokens": 0, "seconds": 0.0}
+
+    @property
+    def model(self):
+        """In-process model, used when there is a single worker"""
+        if self._model is None:
+            self._model = self.loader(self.model_name)
+        return self._model
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            # spawn: forking a parent that already has torch/tokenizer threads can deadlock
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.loader, self.model_name, threads)
+            )
+        return self._executor
+
+    def encode(self, texts: Union[str, Sequence[str]], batch_size: Optional[int] = None, **kwargs) -> np.ndarray:
+        """Encode texts, returning a float32 array in input order"""
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        started = time.perf_counter()
+        # Without a local model (workers only) lengths are estimated from characters
+        lengths = token_lengths(self.model if self.workers == 1 else self._model, texts)
+        buckets = token_budget_batches(lengths, self.token_budget, batch_size or self.batch_size)
+        batches = [[texts[i] for i in bucket] for bucket in buckets]
+
+        if self.workers == 1:
+            encoded = [
+                np.asarray(self.model.encode(batch, batch_size=len(batch), **kwargs), dtype=np.float32)
+                for batch in batches
+            ]
+        else:
+            encoded = list(self._get_executor().map(_encode_batch, batches, repeat(kwargs)))
+
+        result = np.empty((len(texts), encoded[0].shape[1]), dtype=np.float32)
+        for bucket, vectors in zip(buckets, encoded):
+            result[bucket] = vectors
+
+        self.stats["calls"] += 1
+        self.stats["texts"] += len(texts)
+        self.stats["batches"] += len(batches)
+        self.stats["tokens"] += sum(lengths)
+        self.stats["padded_tokens"] += padded_tokens(lengths, buckets)
+        self.stats["seconds"] += time.perf_counter() - started
+        return result[0] if single else result
+
+    def close(self):
+        """Stop the worker processes (they restart on the next encode)"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        seconds = self.stats["seconds"]
+        return {
+            "model_name": self.model_name,
+            "workers": self.workers,
+            "batch_size": self.batch_size,
+            "token_budget": self.token_budget,
+            "calls": self.stats["calls"],
+            "texts": self.stats["texts"],
+            "batches": self.stats["batches"],
+            "tokens": self.stats["tokens"],
+            "padding_ratio": round(1 - self.stats["tokens"] / self.stats["padded_tokens"], 3)
+            if self.stats["padded_tokens"] else 0.0,
+            "seconds": round(seconds, 3),
+            "texts_per_second": round(self.stats["texts"] / seconds, 1) if seconds else 0.0
+        }
+
+    def summary(self) -> str:
+        stats = self.get_stats()
+        return (f"🧠 Embedding pool: {stats['texts']} texts in {stats['seconds']:.1f}s "
+                f"({stats['texts_per_second']:.0f}/s, {stats['workers']} workers, "
+                f"{stats['batches']} batches, {stats['padding_ratio']:.0%} padding)")
@@ -0,0 +1,258 @@
+"""
+Metadata facet index
+Maps each value of the filterable metadata fields to a compressed bitmap of
+document ordinals, so filtered searches only touch the matching documents
+"""
+import json
+from typing import List, Dict, Any, Optional, Iterable, Sequence
+
+import numpy as np
+
+FACET_FIELDS = ("charity_name", "age_group", "gender", "question_id", "thematic_tags")
+
+
+class Bitmap:
+    """
+    Set of document ordinals in one of two containers, whichever is smaller:
+    a sorted uint32 array for sparse sets or a packed bitset for dense ones.
+    Operations between sparse sets cost time proportional to their sizes.
+    """
+
+    __slots__ = ("universe", "ordinals", "bits")
+
+    def __init__(self, universe: int, ordinals: Optional[np.ndarray] = None, bits: Optional[np.ndarray] = None):
+        self.universe = universe
+        self.ordinals = ordinals
+        self.bits = bits
+
+    @classmethod
+    def from_ordinals(cls, ordinals: Iterable[int], universe: int) -> "Bitmap":
+        if not isinstance(ordinals, np.ndarray):
+            ordinals = list(ordinals)
+        ordinals = np.unique(np.asarray(ordinals, dtype=np.uint32))
+        return cls._compact(cls(universe, ordinals=ordinals))
+
+    @classmethod
+    def full(cls, universe: int) -> "Bitmap":
+        bits = np.packbits(np.ones(universe, dtype=bool))
+        return cls(universe, bits=bits)
+
+    @classmethod
+    def empty(cls, universe: int) -> "Bitmap":
+        return cls(universe, ordinals=np.zeros(0, dtype=np.uint32))
+
+    @staticmethod
+    def _prefers_bits(cardinality: int, universe: int) -> bool:
+        # 4 bytes per ordinal vs one bit per document
+        return cardinality * 32 > universe
+
+    @classmethod
+    def _compact(cls, bitmap: "Bitmap") -> "Bitmap":
+        """Switch to the smaller container for the current cardinality"""
+        if bitmap.ordinals is not None and cls._prefers_bits(len(bitmap.ordinals), bitmap.universe):
+            return cls(bitmap.universe, bits=bitmap._bits())
+        if bitmap.bits is not None and not cls._prefers_bits(bitmap.cardinality(), bitmap.universe):
+            return cls(bitmap.universe, ordinals=bitmap.to_ordinals())
+        return bitmap
+
+    def _bits(self) -> np.ndarray:
+        if self.bits is not None:
+            return self.bits
+        mask = np.zeros(self.universe, dtype=bool)
+        mask[self.ordinals] = True
+        return np.packbits(mask)
+
+    def contains_many(self, ordinals: np.ndarray) -> np.ndarray:
+        """Vectorized membership test for a batch of ordinals"""
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        if self.bits is not None:
+            return ((self.bits[ordinals >> 3] >> (7 - (ordinals & 7))) & 1).astype(bool)
+        return np.isin(ordinals, self.ordinals, assume_unique=False)
+
+    def to_ordinals(self) -> np.ndarray:
+        if self.ordinals is not None:
+            return self.ordinals
+        return np.flatnonzero(np.unpackbits(self.bits, count=self.universe)).astype(np.uint32)
+
+    def cardinality(self) -> int:
+        if self.ordinals is not None:
+            return len(self.ordinals)
+        return int(np.unpackbits(self.bits, count=self.universe).sum())
+
+    def nbytes(self) -> int:
+        return int(self.ordinals.nbytes if self.ordinals is not None else self.bits.nbytes)
+
+    def __len__(self) -> int:
+        return self.cardinality()
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        if self.ordinals is not None and other.ordinals is not None:
+            return Bitmap(self.universe, ordinals=np.intersect1d(self.ordinals, other.ordinals, assume_unique=True))
+        if self.ordinals is not None:
+            return Bitmap(self.universe, ordinals=self.ordinals[other.contains_many(self.ordinals)])
+        if other.ordinals is not None:
+            return Bitmap(self.universe, ordinals=other.ordinals[self.contains_many(other.ordinals)])
+        return Bitmap._compact(Bitmap(self.universe, bits=self.bits & other.bits))
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        if self.ordinals is not None and other.ordinals is not None:
+            return Bitmap._compact(Bitmap(self.universe, ordinals=np.union1d(self.ordinals, other.ordinals)))
+        return Bitmap._compact(Bitmap(self.universe, bits=self._bits() | other._bits()))
+
+    def __sub__(self, other: "Bitmap") -> "Bitmap":
+        """Ordinals in self but not in other (AND NOT)"""
+        if self.ordinals is not None:
+            if other.ordinals is not None:
+                return Bitmap(self.universe, ordinals=np.setdiff1d(self.ordinals, other.ordinals, assume_unique=True))
+            return Bitmap(self.universe, ordinals=self.ordinals[~other.contains_many(self.ordinals)])
+        return Bitmap._compact(Bitmap(self.universe, bits=self.bits & ~other._bits()))
+
+
+class FacetIndex:
+    """
+    Inverted index from (field, value) to a Bitmap of document ordinals.
+
+    Filters use the same where-clause language as the vector stores
+    ({field: value}, {field: {"$in"/"$nin"/"$ne": ...}}, "$and", "$or")
+    plus "$not" for negating a sub-clause. List-valued fields such as
+    thematic_tags match when any element equals the requested value.
+    """
+
+    def __init__(self, fields: Sequence[str] = FACET_FIELDS):
+        self.fields = tuple(fields)
+        self.universe = 0
+        self._postings: Dict[str, Dict[Any, List[int]]] = {field: {} for field in self.fields}
+        self._bitmaps: Dict[str, Dict[Any, Bitmap]] = {}
+
+    @classmethod
+    def build(cls, metadatas: Sequence[Dict[str, Any]], fields: Sequence[str] = FACET_FIELDS) -> "FacetIndex":
+        index = cls(fields)
+        for metadata in metadatas:
+            index.add(metadata)
+        return index
+
+    @staticmethod
+    def _values(value: Any) -> List[Any]:
+        if value is None or value == "":
+            return []
+        if isinstance(value, str) and value.startswith("["):
+            # Tags stored as JSON strings (e.g. Pinecone/Chroma scalar metadata)
+            try:
+                value = json.loads(value)
+            except ValueError:
+                return [value]
+        if isinstance(value, (list, tuple, set)):
+            return [v for v in value if v is not None and v != ""]
+        return [value]
+
+    def add(self, metadata: Dict[str, Any]) -> int:
+        """Index the next document ordinal; returns the ordinal"""
+        ordinal = self.universe
+        for field in self.fields:
+            for value in self._values(metadata.get(field)):
+                self._postings[field].setdefault(value, []).append(ordinal)
+        self.universe += 1
+        self._bitmaps = {}
+        return ordinal
+
+    def _field_bitmaps(self, field: str) -> Dict[Any, Bitmap]:
+        if field not in self._bitmaps:
+            self._bitmaps[field] = {
+                value: Bitmap.from_ordinals(np.asarray(ordinals, dtype=np.uint32), self.universe)
+                for value, ordinals in self._postings[field].items()
+            }
+        return self._bitmaps[field]
+
+    def values(self, field: str) -> List[Any]:
+        """Distinct indexed values for a field"""
+        return list(self._postings.get(field, {}).keys())
+
+    def lookup(self, field: str, value: Any) -> Bitmap:
+        if field not in self._postings:
+            raise KeyError(f"Field '{field}' is not indexed")
+        bitmap = self._field_bitmaps(field).get(value)
+        return bitmap if bitmap is not None else Bitmap.empty(self.universe)
+
+    def lookup_any(self, field: str, values: Iterable[Any]) -> Bitmap:
+        result = Bitmap.empty(self.universe)
+        for value in values:
+            result = result | self.lookup(field, value)
+        return result
+
+    def covers(self, where: Optional[Dict[str, Any]]) -> bool:
+        """True if every field referenced by the clause is indexed"""
+        if not where:
+            return True
+        for key, condition in where.items():
+            if key in ("$and", "$or"):
+                if not all(self.covers(clause) for clause in condition):
+                    return False
+            elif key == "$not":
+                if not self.covers(condition):
+                    return False
+            elif key not in self._postings:
+                return False
+        return True
+
+    def evaluate(self, where: Optional[Dict[str, Any]]) -> Bitmap:
+        """Evaluate a where clause into the bitmap of matching ordinals"""
+        if not where:
+            return Bitmap.full(self.universe)
+
+        positives: List[Bitmap] = []
+        negatives: List[Bitmap] = []
+
+        for key, condition in where.items():
+            if key == "$and":
+                positives.extend(self.evaluate(clause) for clause in condition)
+            elif key == "$or":
+                any_match = Bitmap.empty(self.universe)
+                for clause in condition:
+                    any_match = any_match | self.evaluate(clause)
+                positives.append(any_match)
+            elif key == "$not":
+                negatives.append(self.evaluate(condition))
+            elif not isinstance(condition, dict):
+                positives.append(self.lookup(key, condition))
+            else:
+                for op, value in condition.items():
+                    if op == "$eq":
+                        positives.append(self.lookup(key, value))
+                    elif op == "$in":
+                        positives.append(self.lookup_any(key, value))
+                    elif op == "$ne":
+                        negatives.append(self.lookup(key, value))
+                    elif op == "$nin":
+                        negatives.append(self.lookup_any(key, value))
+                    else:
+                        raise ValueError(f"Unsupported where operator: {op}")
+
+        # Intersect smallest sets first and subtract negatives from the result,
+        # so the work tracks the selective filters rather than the corpus size
+        if positives:
+            positives.sort(key=Bitmap.nbytes)
+            result = positives[0]
+            for bitmap in positives[1:]:
+                result = result & bitmap
+        else:
+            result = Bitmap.full(self.universe)
+
+        for bitmap in negatives:
+            result = result - bitmap
+        return result
+
+    def candidates(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Sorted ordinals matching the clause"""
+        return self.evaluate(where).to_ordinals()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "documents": self.universe,
+            "fields": {
+                field: {
+                    "values": len(self._postings[field]),
+                    "bytes": sum(b.nbytes() for b in self._field_bitmaps(field).values())
+                }
+                for field in self.fields
+            }
+        }
@@ -0,0 +1,273 @@
+"""
+Rule-based search filter extraction
+Resolves charity_name / age_group / gender from a question using a gazetteer
+of the values actually present in the responses table (plus aliases such as
+"girls" -> Female, "teenagers" -> 15-17 and fuzzy charity names). Callers fall
+back to the LLM only when the result is not confident, which includes questions
+about a catalog question topic (the LLM resolves those to question ids).
+"""
+import re
+import threading
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+from .bm25_index import STOPWORDS, tokenize
+from .embedding_cache import normalize_text
+
+FILTER_FIELDS = ("charity_name", "age_group", "gender")
+
+# Fuzzy charity matches at or above this ratio are accepted; between the
+# two thresholds the question is handed to the LLM instead of guessing
+FUZZY_ACCEPT = 0.88
+FUZZY_REVIEW = 0.72
+
+# Alias -> canonical gender, matched case-insensitively against the gazetteer
+GENDER_ALIASES = {
+    **dict.fromkeys(["female", "females", "girl", "girls", "woman", "women", "young women",
+                     "daughter", "daughters"], "female"),
+    **dict.fromkeys(["male", "males", "boy", "boys", "man", "men", "young men",
+                     "lad", "lads", "son", "sons"], "male"),
+}
+
+# Alias -> representative age, resolved to whichever age group contains it
+AGE_ALIASES = {
+    **dict.fromkeys(["teenager", "teenagers", "teens", "teen", "teenage", "adolescents"], 15),
+    **dict.fromkeys(["children", "kids", "pre-teens", "preteens", "tweens"], 12),
+    **dict.fromkeys(["young adults", "adults", "over 18s", "over-18s"], 18),
+}
+
+AGE_NUMBER_PATTERN = re.compile(r"\b(\d{1,2})[\s-]*(?:year|yr)s?[\s-]*olds?\b|\baged?\s+(\d{1,2})\b")
+
+# Words that signal intent the rules cannot resolve on their own
+COMPARISON_CUES = re.compile(r"\b(compare|comparing|comparison|versus|vs|differ|differs|difference|between)\b")
+CHARITY_CUES = re.compile(r"\b(charity|charities|organisation|organisations|organization|organizations|provider)\b")
+AGE_CUES = re.compile(r"\b(age|ages|aged|year olds?|years old)\b")
+
+WORD_RE = re.compile(r"[a-z0-9][a-z0-9+'-]*")
+
+# Survey boilerplate shared by most question texts; matching it says nothing about the topic
+TOPIC_FILLER = frozenset(tokenize(
+    "feel feeling felt think much many often rate scale agree disagree programme program project "
+    "session sessions young people person part taking take since start"
+))
+
+
+def normalize_question(text: str) -> str:
+    return normalize_text(text).casefold()
+
+
+def phrase_pattern(phrases: Iterable[str]) -> Optional[Pattern]:
+    """One alternation matching any phrase on word boundaries, longest first"""
+    phrases = sorted(set(phrases), key=len, reverse=True)
+    if not phrases:
+        return None
+    return re.compile(r"(?<![a-z0-9])(" + "|".join(re.escape(p) for p in phrases) + r")(?![a-z0-9])")
+
+
+GENDER_PATTERN = phrase_pattern(GENDER_ALIASES)
+AGE_ALIAS_PATTERN = phrase_pattern(AGE_ALIASES)
+
+
+def parse_age_range(age_group: str) -> Optional[Tuple[int, int]]:
+    """'12-14' -> (12, 14), '18+' -> (18, 200); other formats only match literally"""
+    match = re.fullmatch(r"\s*(\d{1,2})\s*-\s*(\d{1,2})\s*", age_group)
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    match = re.fullmatch(r"\s*(\d{1,2})\s*\+\s*", age_group)
+    if match:
+        return int(match.group(1)), 200
+    return None
+
+
+class FilterExtractor:
+    """
+    Gazetteer-backed extractor for the structured search filters.
+
+    add_values()/set_values() feed it the distinct values seen in the data and
+    set_topics() the catalog questions that need LLM targeting; extract() returns the filters, themes and whether the rules are confident
+    enough to skip the LLM.
+    """
+
+    def __init__(self, fuzzy_accept: float = FUZZY_ACCEPT, fuzzy_review: float = FUZZY_REVIEW):
+        self.fuzzy_accept = fuzzy_accept
+        self.fuzzy_review = fuzzy_review
+        self._lock = threading.Lock()
+        self._values: Dict[str, set] = {field: set() for field in FILTER_FIELDS}
+        self._topic_terms: Dict[str, set] = {}
+        self._rebuild()
+        self.stats = {"queries": 0, "fast_path": 0, "fallbacks": 0}
+
+    def add_values(self, row: Dict[str, Any]):
+        """Add the filter values of one response (a no-op for values already known)"""
+        new = {
+            field: row[field] for field in FILTER_FIELDS
+            if isinstance(row.get(field), str) and row[field].strip() and row[field] not in self._values[field]
+        }
+        if new:
+            with self._lock:
+                for field, value in new.items():
+                    self._values[field].add(value)
+                self._rebuild()
+
+    def set_values(self, values: Dict[str, Iterable[str]]):
+        """Replace the gazetteer with the given distinct values per field"""
+        with self._lock:
+            self._values = {
+                field: {v for v in values.get(field, []) if isinstance(v, str) and v.strip()}
+                for field in FILTER_FIELDS
+            }
+            self._rebuild()
+
+    def set_topics(self, questions: Dict[str, str]):
+        """Replace the catalog question topics ({question_id: question_text})"""
+        topic_terms = {
+            question_id: set(tokenize(text)) - TOPIC_FILLER
+            for question_id, text in questions.items()
+        }
+        with self._lock:
+            self._topic_terms = {question_id: terms for question_id, terms in topic_terms.items() if terms}
+
+    def values(self, field: str) -> List[str]:
+        return sorted(self._values[field])
+
+    def _rebuild(self):
+        charities = {normalize_question(name): name for name in self._values["charity_name"]}
+        self._charity_by_text = charities
+        self._charity_pattern = phrase_pattern(charities)
+        self._fuzzy_charities = [(text, len(text.split())) for text in charities if len(text) >= 4]
+
+        groups = {group.casefold(): group for group in self._values["age_group"]}
+        self._age_group_by_text = groups
+        self._age_group_pattern = phrase_pattern(groups)
+        self._age_ranges = [(group, parse_age_range(group)) for group in self._values["age_group"]]
+        self._age_ranges = [(group, age_range) for group, age_range in self._age_ranges if age_range]
+
+        self._gender_by_name = {value.casefold(): value for value in self._values["gender"]}
+
+    def _age_group_for(self, age: int) -> Optional[str]:
+        for group, (low, high) in self._age_ranges:
+            if low <= age <= high:
+                return group
+        return None
+
+    def _fuzzy_charity(self, words: List[re.Match]) -> Tuple[float, Optional[str], Tuple[int, int]]:
+        """Best charity for any window of question words with the same word count as the name"""
+        best = (0.0, None, (0, 0))
+        for normalized, size in self._fuzzy_charities:
+            for start in range(len(words) - size + 1):
+                window = " ".join(match.group() for match in words[start:start + size])
+                # Length alone bounds the ratio; skip hopeless windows cheaply
+                if 2 * min(len(window), len(normalized)) / (len(window) + len(normalized)) < self.fuzzy_review:
+                    continue
+                matcher = SequenceMatcher(None, window, normalized)
+                if matcher.quick_ratio() < self.fuzzy_review:
+                    continue
+                ratio = matcher.ratio()
+                if ratio > best[0]:
+                    span = (words[start].start(), words[start + size - 1].end())
+                    best = (ratio, self._charity_by_text[normalized], span)
+        return best
+
+    def extract(self, question: str) -> Dict[str, Any]:
+        """
+        Returns {'charity_name', 'age_group', 'gender', 'themes', 'confident', 'reason'}.
+        'reason' explains a fallback and is None on the fast path.
+        """
+        text = normalize_question(question)
+        found = {field: set() for field in FILTER_FIELDS}
+        spans: List[Tuple[int, int]] = []
+        reasons = []
+
+        def resolve(field: str, value: Optional[str], match: re.Match, missing: str):
+            if value:
+                found[field].add(value)
+                spans.append(match.span())
+            else:
+                reasons.append(missing)
+
+        with self._lock:
+            if not any(self._values.values()):
+                reasons.append("empty gazetteer")
+
+            if self._charity_pattern:
+                for match in self._charity_pattern.finditer(text):
+                    resolve("charity_name", self._charity_by_text[match.group(1)], match, "")
+                if not found["charity_name"]:
+                    ratio, name, span = self._fuzzy_charity(list(WORD_RE.finditer(text)))
+                    if ratio >= self.fuzzy_accept:
+                        found["charity_name"].add(name)
+                        spans.append(span)
+                    elif ratio >= self.fuzzy_review:
+                        reasons.append(f"uncertain charity match '{name}' ({ratio:.2f})")
+
+            for match in GENDER_PATTERN.finditer(text):
+                alias = match.group(1)
+                resolve("gender", self._gender_by_name.get(GENDER_ALIASES[alias]), match,
+                        f"no gender value for '{alias}'")
+
+            if self._age_group_pattern:
+                for match in self._age_group_pattern.finditer(text):
+                    resolve("age_group", self._age_group_by_text[match.group(1)], match, "")
+            for match in AGE_ALIAS_PATTERN.finditer(text):
+                alias = match.group(1)
+                resolve("age_group", self._age_group_for(AGE_ALIASES[alias]), match,
+                        f"no age group for '{alias}'")
+            for match in AGE_NUMBER_PATTERN.finditer(text):
+                age = int(match.group(1) or match.group(2))
+                resolve("age_group", self._age_group_for(age), match, f"no age group contains {age}")
+
+        for field, values in found.items():
+            if len(values) > 1:
+                reasons.append(f"several {field} values {sorted(values)}")
+        if COMPARISON_CUES.search(text):
+            reasons.append("comparison")
+        if CHARITY_CUES.search(text) and not found["charity_name"]:
+            reasons.append("unresolved charity reference")
+        if AGE_CUES.search(text) and not found["age_group"]:
+            reasons.append("unresolved age reference")
+
+        # Themes: content words outside the spans resolved to filters
+        themes = [
+            match.group() for match in WORD_RE.finditer(text)
+            if match.group() not in STOPWORDS and len(match.group()) > 2
+            and not any(start <= match.start() < end for start, end in spans)
+        ]
+
+        theme_terms = set(tokenize(" ".join(themes)))
+        with self._lock:
+            topics = sorted(
+                question_id for question_id, terms in self._topic_terms.items() if terms & theme_terms
+            )
+            if topics:
+                reasons.append(f"matches catalog questions {topics}")
+
+            confident = not reasons
+            self.stats["queries"] += 1
+            self.stats["fast_path" if confident else "fallbacks"] += 1
+
+        return {
+            "charity_name": next(iter(found["charity_name"])) if len(found["charity_name"]) == 1 else None,
+            "age_group": next(iter(found["age_group"])) if len(found["age_group"]) == 1 else None,
+            "gender": next(iter(found["gender"])) if len(found["gender"]) == 1 else None,
+            "themes": themes or [text],
+            "confident": confident,
+            "reason": "; ".join(reasons) or None
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            gazetteer = {field: len(values) for field, values in self._values.items()}
+            topics = len(self._topic_terms)
+        queries = stats["queries"]
+        return {
+            "fast_path_rate": stats["fast_path"] / queries if queries else 0.0,
+            "gazetteer": gazetteer,
+            "topics": topics,
+            **stats
+        }
+
+    def summary(self) -> str:
+        stats = self.get_stats()
+        return (f"⚡ Filter extraction: {stats['fast_path']}/{stats['queries']} queries on the fast path "
+                f"({stats['fast_path_rate']:.0%})")
@@ -0,0 +1,308 @@
+"""
+Shared HTTP transport for Supabase REST and Gemini calls
+One pooled keep-alive session per process with per-host timeouts,
+retries with exponential backoff and jitter, and connection reuse statistics
+"""
+import os
+import time
+import asyncio
+import random
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple, Callable, Iterable
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_CONNECTIONS = 10  # Distinct hosts kept in the pool manager
+DEFAULT_POOL_MAXSIZE = 20  # Keep-alive connections per host
+DEFAULT_TIMEOUT = (3.05, 30.0)  # (connect, read) seconds
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5
+DEFAULT_BACKOFF_MAX = 10.0
+
+# Generation calls legitimately take longer than a REST read
+DEFAULT_HOST_TIMEOUTS = {
+    "generativelanguage.googleapis.com": (3.05, 60.0)
+}
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+DEFAULT_ASYNC_MAX_CONNECTIONS = 100  # In-flight requests across all hosts
+
+
+def backoff_delay(attempt: int, factor: float, cap: float, retry_after: Optional[str] = None) -> float:
+    """Delay before the given retry attempt (1-based), honouring Retry-After seconds"""
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), cap)
+    # Full jitter: uniform over [0, factor * 2^(attempt-1)]
+    return random.uniform(0, min(cap, factor * (2 ** (attempt - 1))))
+
+
+def _new_host_stats() -> Dict[str, float]:
+    return {"requests": 0, "retries": 0, "errors": 0, "elapsed_seconds": 0.0}
+
+
+class HttpTransport:
+    """
+    Pooled requests session shared by every caller in the process.
+
+    Idempotent requests are retried on connection errors, timeouts and
+    429/5xx responses; other methods only when the caller passes retry=True.
+    Backoff is exponential with full jitter and honours Retry-After. After the
+    last attempt the final response is returned so callers keep their own
+    status-code handling.
+    """
+
+    def __init__(self,
+                 pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+                 host_timeouts: Optional[Dict[str, Tuple[float, float]]] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                 backoff_max: float = DEFAULT_BACKOFF_MAX,
+                 retry_statuses: Iterable[int] = RETRY_STATUSES,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.timeout = timeout
+        self.host_timeouts = dict(DEFAULT_HOST_TIMEOUTS if host_timeouts is None else host_timeouts)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.retry_statuses = frozenset(retry_statuses)
+        self.sleep = sleep
+
+        # Retries are handled here rather than by urllib3 so they can be counted
+        self.adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                                   max_retries=0, pool_block=False)
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+
+        self._lock = threading.Lock()
+        self._host_stats: Dict[str, Dict[str, float]] = {}
+
+    def timeout_for(self, host: str) -> Tuple[float, float]:
+        return self.host_timeouts.get(host, self.timeout)
+
+    def backoff(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Delay before the given retry attempt (1-based)"""
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        return backoff_delay(attempt, self.backoff_factor, self.backoff_max, retry_after)
+
+    def _record(self, host: str, field: str, amount: float = 1):
+        with self._lock:
+            stats = self._host_stats.setdefault(host, _new_host_stats())
+            stats[field] += amount
+
+    def request(self, method: str, url: str, retry: Optional[bool] = None, **kwargs) -> requests.Response:
+        """Send a request through the pooled session"""
+        method = method.upper()
+        host = urlsplit(url).hostname or ""
+        kwargs.setdefault("timeout", self.timeout_for(host))
+        can_retry = method in IDEMPOTENT_METHODS if retry is None else retry
+        attempts = 1 + (self.max_retries if can_retry else 0)
+
+        for attempt in range(1, attempts + 1):
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(host, "errors")
+                if attempt == attempts:
+                    raise
+                delay = self.backoff(attempt)
+                logger.warning(f"{method} {host} failed ({e.__class__.__name__}), retry {attempt} in {delay:.2f}s")
+            else:
+                self._record(host, "requests")
+                self._record(host, "elapsed_seconds", time.perf_counter() - started)
+                if response.status_code not in self.retry_statuses or attempt == attempts:
+                    return response
+                delay = self.backoff(attempt, response)
+                logger.warning(f"{method} {host} returned {response.status_code}, retry {attempt} in {delay:.2f}s")
+                response.close()
+
+            self._record(host, "retries")
+            self.sleep(delay)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def patch(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PATCH", url, **kwargs)
+
+    def _pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """Connections opened vs requests served by each urllib3 host pool"""
+        pools: Dict[str, Dict[str, int]] = {}
+        poolmanager = self.adapter.poolmanager
+        for key in list(poolmanager.pools.keys()):
+            pool = poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            stats = pools.setdefault(pool.host, {"connections_opened": 0, "pooled_requests": 0})
+            stats["connections_opened"] += pool.num_connections
+            stats["pooled_requests"] += pool.num_requests
+        return pools
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-host request, retry and connection reuse statistics"""
+        pools = self._pool_stats()
+        with self._lock:
+            hosts = {host: dict(stats) for host, stats in self._host_stats.items()}
+
+        for host, stats in hosts.items():
+            pool = pools.get(host, {"connections_opened": 0, "pooled_requests": 0})
+            opened = pool["connections_opened"]
+            served = pool["pooled_requests"]
+            stats.update(pool)
+            stats["connections_reused"] = max(served - opened, 0)
+            stats["reuse_ratio"] = stats["connections_reused"] / served if served else 0.0
+            stats["avg_latency_ms"] = 1000 * stats["elapsed_seconds"] / stats["requests"] if stats["requests"] else 0.0
+        return hosts
+
+    def summary(self) -> str:
+        """One line per host for progress output"""
+        lines = [
+            f"🔌 {host}: {stats['requests']} requests, {stats['connections_opened']} connections "
+            f"({stats['reuse_ratio']:.0%} reused), {stats['retries']} retries, "
+            f"{stats['avg_latency_ms']:.0f} ms avg"
+            for host, stats in self.get_stats().items()
+        ]
+        return "\n".join(lines) if lines else "🔌 No HTTP requests yet"
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncHttpTransport:
+    """
+    Async counterpart of HttpTransport on a pooled httpx.AsyncClient, with the
+    same per-host timeouts, retry policy and per-host statistics. Bound to the
+    event loop it is first used on; close it with aclose() on shutdown.
+    """
+
+    def __init__(self,
+                 max_connections: int = DEFAULT_ASYNC_MAX_CONNECTIONS,
+                 max_keepalive: int = DEFAULT_POOL_MAXSIZE,
+                 timeout: Tuple[float, float] = DEFAULT_TIMEOUT,
+                 host_timeouts: Optional[Dict[str, Tuple[float, float]]] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+                 backoff_max: float = DEFAULT_BACKOFF_MAX,
+                 retry_statuses: Iterable[int] = RETRY_STATUSES,
+                 sleep: Callable[[float], Any] = asyncio.sleep):
+        import httpx
+
+        self.httpx = httpx
+        self.timeout = timeout
+        self.host_timeouts = dict(DEFAULT_HOST_TIMEOUTS if host_timeouts is None else host_timeouts)
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.retry_statuses = frozenset(retry_statuses)
+        self.sleep = sleep
+
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive),
+            headers={"Accept-Encoding": "gzip, deflate"}
+        )
+        self._host_stats: Dict[str, Dict[str, float]] = {}
+
+    def timeout_for(self, host: str):
+        connect, read = self.host_timeouts.get(host, self.timeout)
+        return self.httpx.Timeout(read, connect=connect)
+
+    def _record(self, host: str, field: str, amount: float = 1):
+        # Single event loop, no lock needed
+        self._host_stats.setdefault(host, _new_host_stats())[field] += amount
+
+    async def request(self, method: str, url: str, retry: Optional[bool] = None, **kwargs):
+        """Send a request through the pooled async client"""
+        method = method.upper()
+        host = self.httpx.URL(url).host
+        kwargs.setdefault("timeout", self.timeout_for(host))
+        can_retry = method in IDEMPOTENT_METHODS if retry is None else retry
+        attempts = 1 + (self.max_retries if can_retry else 0)
+
+        for attempt in range(1, attempts + 1):
+            started = time.perf_counter()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except (self.httpx.TransportError, self.httpx.TimeoutException) as e:
+                self._record(host, "errors")
+                if attempt == attempts:
+                    raise
+                delay = backoff_delay(attempt, self.backoff_factor, self.backoff_max)
+                logger.warning(f"{method} {host} failed ({e.__class__.__name__}), retry {attempt} in {delay:.2f}s")
+            else:
+                self._record(host, "requests")
+                self._record(host, "elapsed_seconds", time.perf_counter() - started)
+                if response.status_code not in self.retry_statuses or attempt == attempts:
+                    return response
+                delay = backoff_delay(attempt, self.backoff_factor, self.backoff_max,
+                                      response.headers.get("Retry-After"))
+                logger.warning(f"{method} {host} returned {response.status_code}, retry {attempt} in {delay:.2f}s")
+
+            self._record(host, "retries")
+            await self.sleep(delay)
+
+    async def get(self, url: str, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        hosts = {host: dict(stats) for host, stats in self._host_stats.items()}
+        for stats in hosts.values():
+            stats["avg_latency_ms"] = 1000 * stats["elapsed_seconds"] / stats["requests"] if stats["requests"] else 0.0
+        return hosts
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+def transport_settings() -> Dict[str, Any]:
+    """Shared transport settings from HTTP_* environment variables"""
+    return {
+        "timeout": (
+            float(os.getenv("HTTP_CONNECT_TIMEOUT", DEFAULT_TIMEOUT[0])),
+            float(os.getenv("HTTP_READ_TIMEOUT", DEFAULT_TIMEOUT[1]))
+        ),
+        "max_retries": int(os.getenv("HTTP_MAX_RETRIES", DEFAULT_MAX_RETRIES))
+    }
+
+
+def create_async_transport() -> AsyncHttpTransport:
+    """New async transport configured like the process-wide sync one"""
+    return AsyncHttpTransport(
+        max_connections=int(os.getenv("HTTP_ASYNC_MAX_CONNECTIONS", DEFAULT_ASYNC_MAX_CONNECTIONS)),
+        max_keepalive=int(os.getenv("HTTP_POOL_MAXSIZE", DEFAULT_POOL_MAXSIZE)),
+        **transport_settings()
+    )
+
+
+_transport: Optional[HttpTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> HttpTransport:
+    """Process-wide transport, configured from HTTP_* environment variables"""
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = HttpTransport(
+                    pool_connections=int(os.getenv("HTTP_POOL_CONNECTIONS", DEFAULT_POOL_CONNECTIONS)),
+                    pool_maxsize=int(os.getenv("HTTP_POOL_MAXSIZE", DEFAULT_POOL_MAXSIZE)),
+                    **transport_settings()
+                )
+    return _transport
@@ -0,0 +1,174 @@
+"""
+Three-stage ingestion pipeline
+fetch -> embed -> write, each stage on its own thread and joined by bounded
+queues, so the next page downloads and the previous batch is written while the
+current batch is embedding. A full queue blocks the stage feeding it
+(backpressure), and a rebuild takes about as long as its slowest stage.
+"""
+import time
+import queue
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+
+DEFAULT_QUEUE_DEPTH = 2
+
+_DONE = object()
+
+
+class StageStats:
+    """Throughput counters for one pipeline stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.batches = 0
+        self.records = 0
+        self.busy_seconds = 0.0
+        self.wait_seconds = 0.0
+
+    def record(self, records: int, busy: float):
+        self.batches += 1
+        self.records += records
+        self.busy_seconds += busy
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "records": self.records,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "wait_seconds": round(self.wait_seconds, 3),
+            "records_per_second": round(self.records / self.busy_seconds, 1) if self.busy_seconds else 0.0
+        }
+
+
+class IngestPipeline:
+    """
+    Runs `source` (an iterable of fetched batches), `embed` and `write` as three
+    overlapping stages. Batches reach `write` in source order. Record counts
+    are taken from the fetched batch (len, or 1 for unsized batches). The first
+    exception from any stage stops the others and is re-raised by run().
+    """
+
+    def __init__(self, source: Iterable[Any], embed: Callable[[Any], Any], write: Callable[[Any], Any],
+                 queue_depth: int = DEFAULT_QUEUE_DEPTH):
+        self.source = source
+        self.embed = embed
+        self.write = write
+        self.queue_depth = max(1, queue_depth)
+
+        self.stages = {name: StageStats(name) for name in ("fetch", "embed", "write")}
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+        self.elapsed_seconds = 0.0
+
+    def _put(self, out: queue.Queue, item: Any, stats: StageStats) -> bool:
+        """Blocking put that gives up once another stage has failed"""
+        started = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                stats.wait_seconds += time.perf_counter() - started
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, inbox: queue.Queue, stats: StageStats) -> Any:
+        started = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                item = inbox.get(timeout=0.1)
+                stats.wait_seconds += time.perf_counter() - started
+                return item
+            except queue.Empty:
+                continue
+        return _DONE
+
+    def _fail(self, error: BaseException):
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+
+    def _fetch(self, out: queue.Queue):
+        stats = self.stages["fetch"]
+        try:
+            batches = iter(self.source)
+            while not self._stop.is_set():
+                started = time.perf_counter()
+                try:
+                    batch = next(batches)
+                except StopIteration:
+                    break
+                records = len(batch) if hasattr(batch, "__len__") else 1
+                stats.record(records, time.perf_counter() - started)
+                if not self._put(out, (records, batch), stats):
+                    return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put(out, _DONE, stats)
+
+    def _stage(self, name: str, fn: Callable[[Any], Any], inbox: queue.Queue, out: Optional[queue.Queue]):
+        stats = self.stages[name]
+        try:
+            while True:
+                item = self._get(inbox, stats)
+                if item is _DONE:
+                    break
+                records, payload = item
+                started = time.perf_counter()
+                result = fn(payload)
+                stats.record(records, time.perf_counter() - started)
+                if out is not None and not self._put(out, (records, result), stats):
+                    return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            if out is not None:
+                self._put(out, _DONE, stats)
+
+    def run(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        fetched: queue.Queue = queue.Queue(maxsize=self.queue_depth)
+        embedded: queue.Queue = queue.Queue(maxsize=self.queue_depth)
+
+        threads = [
+            threading.Thread(target=self._fetch, args=(fetched,), name="ingest-fetch", daemon=True),
+            threading.Thread(target=self._stage, args=("embed", self.embed, fetched, embedded),
+                             name="ingest-embed", daemon=True),
+            threading.Thread(target=self._stage, args=("write", self.write, embedded, None),
+                             name="ingest-write", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.elapsed_seconds = time.perf_counter() - started
+        if self._error is not None:
+            raise self._error
+        return self.get_stats()
+
+    def get_stats(self) -> Dict[str, Any]:
+        busy = {name: stats.busy_seconds for name, stats in self.stages.items()}
+        return {
+            "elapsed_seconds": round(self.elapsed_seconds, 3),
+            "bottleneck": max(busy, key=busy.get) if any(busy.values()) else None,
+            "queue_depth": self.queue_depth,
+            **{name: stats.get_stats() for name, stats in self.stages.items()}
+        }
+
+    def summary(self) -> str:
+        stats = self.get_stats()
+        stages = ", ".join(
+            f"{name} {stats[name]['busy_seconds']:.1f}s" for name in ("fetch", "embed", "write")
+        )
+        return (f"🏭 Ingest pipeline: {stats['write']['records']} records in {stats['elapsed_seconds']:.1f}s "
+                f"({stages}; bottleneck: {stats['bottleneck']})")
+
+
+def run_pipeline(source: Iterable[Any], embed: Callable[[Any], Any], write: Callable[[Any], Any],
+                 queue_depth: int = DEFAULT_QUEUE_DEPTH) -> IngestPipeline:
+    """Run a pipeline to completion and return it (for stats and summary)"""
+    pipeline = IngestPipeline(source, embed, write, queue_depth)
+    pipeline.run()
+    return pipeline
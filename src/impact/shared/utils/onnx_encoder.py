@@ -0,0 +1,259 @@
+"""
+ONNX Runtime embedding backend
+Exports a sentence-transformers model once to ONNX with dynamic int8
+quantization, then serves encode() through onnxruntime and the fast tokenizer,
+so encoding neither imports torch nor runs full-precision matmuls. The export
+is checked against the PyTorch model: vectors must stay within MIN_COSINE of
+the originals so indexes built with either backend remain interchangeable.
+
+Export once (needs torch, transformers and onnxruntime):
+    python -m impact.shared.utils.onnx_encoder --output ./cache/onnx
+"""
+import os
+import json
+from functools import partial
+from typing import Any, Callable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .embedding_cache import model_slug
+from .batching import token_lengths, token_budget_batches, DEFAULT_TOKEN_BUDGET, DEFAULT_MAX_BATCH_SIZE
+
+DEFAULT_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+# Lowest per-text cosine similarity to the PyTorch embedding an export may have
+MIN_COSINE = 0.99
+
+FP32_FILE = "model.onnx"
+INT8_FILE = "model_int8.onnx"
+META_FILE = "export.json"
+TOKENIZER_FILE = "tokenizer.json"
+
+BACKENDS = ("torch", "onnx")
+
+# Mixed-length sample used to check an export against PyTorch
+VERIFY_TEXTS = [
+    "Selected: Resilience/confidence",
+    "Selected: Yes",
+    "I feel more confident speaking in front of people since joining the programme.",
+    "The coaches helped me with my anger and now I talk to someone instead of fighting.",
+    "Before I came here I didn't leave the house much. Now I come every week, I've made friends "
+    "and I'm thinking about going to college to study sport science, which I never thought I could do.",
+    "Not sure",
+]
+
+
+def export_dir(root: str, model_name: str) -> str:
+    """Directory holding one model's export under `root`"""
+    return os.path.join(root, model_slug(model_name))
+
+
+def mean_pool(token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+    """Average token embeddings over real (unpadded) tokens"""
+    mask = attention_mask[..., None].astype(np.float32)
+    summed = (token_embeddings * mask).sum(axis=1)
+    return summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.clip(norms, 1e-12, None)
+
+
+def cosine_agreement(reference: np.ndarray, candidate: np.ndarray) -> np.ndarray:
+    """Row-wise cosine similarity between two embedding matrices"""
+    return (l2_normalize(np.asarray(reference, dtype=np.float32)) *
+            l2_normalize(np.asarray(candidate, dtype=np.float32))).sum(axis=1)
+
+
+def export_onnx(model_name: str, output_dir: str, quantize: bool = True) -> str:
+    """
+    Export the transformer of a sentence-transformers model to ONNX (and an
+    int8 copy with dynamically quantized weights). Pooling and normalization
+    are read from the model so OnnxEncoder reproduces them. Returns output_dir.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st_model = SentenceTransformer(model_name, device="cpu")
+    transformer, pooling = st_model[0], st_model[1]
+    if not getattr(pooling, "pooling_mode_mean_tokens", False):
+        raise ValueError(f"{model_name} does not use mean pooling; only mean pooling is supported")
+    normalize = any(type(module).__name__ == "Normalize" for module in st_model)
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = st_model.tokenizer
+    tokenizer.save_pretrained(output_dir)
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    # Positional order of BertModel.forward
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]}
+
+    fp32_path = os.path.join(output_dir, FP32_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer.auto_model.eval(),
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(fp32_path, os.path.join(output_dir, INT8_FILE), weight_type=QuantType.QInt8)
+
+    with open(os.path.join(output_dir, META_FILE), "w") as f:
+        json.dump({
+            "model_name": model_name,
+            "max_seq_length": st_model.max_seq_length,
+            "normalize": normalize,
+            "pad_token": tokenizer.pad_token,
+            "pad_token_id": tokenizer.pad_token_id,
+            "quantized": quantize
+        }, f, indent=2)
+
+    return output_dir
+
+
+class OnnxEncoder:
+    """
+    encode() compatible with SentenceTransformer.encode, backed by an export
+    from export_onnx: fast tokenizer -> onnxruntime -> mean pooling -> L2
+    normalization (when the original model normalizes).
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = True, threads: Optional[int] = None):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, META_FILE), "r") as f:
+            self.meta = json.load(f)
+        self.model_name = self.meta["model_name"]
+        self.max_seq_length = self.meta["max_seq_length"]
+        self.normalize = self.meta["normalize"]
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self.tokenizer.enable_padding(pad_id=self.meta["pad_token_id"], pad_token=self.meta["pad_token"])
+
+        model_file = INT8_FILE if quantized and self.meta.get("quantized") else FP32_FILE
+        options = ort.SessionOptions()
+        # EmbeddingPool workers get their share of the cores through OMP_NUM_THREADS
+        threads = threads or int(os.environ.get("OMP_NUM_THREADS", 0))
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(os.path.join(model_dir, model_file), options,
+                                            providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    def encode_batch(self, texts: List[str]) -> np.ndarray:
+        # sentence-transformers strips inputs before tokenizing
+        encodings = self.tokenizer.encode_batch([str(text).strip() for text in texts])
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feed = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": attention_mask
+        }
+        if "token_type_ids" in self.input_names:
+            feed["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self.session.run(["last_hidden_state"], feed)[0]
+        vectors = mean_pool(token_embeddings, attention_mask)
+        return l2_normalize(vectors) if self.normalize else vectors
+
+    def encode(self, texts: Union[str, Sequence[str]], batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+               token_budget: int = DEFAULT_TOKEN_BUDGET, **kwargs) -> np.ndarray:
+        """Encode texts in length-bucketed batches, returning a float32 array in input order"""
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        batches = token_budget_batches(token_lengths(self, texts), token_budget, batch_size)
+        encoded = [self.encode_batch([texts[i] for i in batch]) for batch in batches]
+
+        result = np.empty((len(texts), encoded[0].shape[1]), dtype=np.float32)
+        for batch, vectors in zip(batches, encoded):
+            result[batch] = vectors
+        return result[0] if single else result
+
+
+def verify_export(model_name: str, model_dir: str, texts: Sequence[str] = VERIFY_TEXTS,
+                  min_cosine: float = MIN_COSINE, quantized: bool = True) -> float:
+    """Compare an export with the PyTorch model; returns the lowest cosine, raising if under min_cosine"""
+    from sentence_transformers import SentenceTransformer
+
+    reference = SentenceTransformer(model_name, device="cpu").encode(list(texts))
+    candidate = OnnxEncoder(model_dir, quantized=quantized).encode(list(texts))
+    worst = float(cosine_agreement(reference, candidate).min())
+    if worst < min_cosine:
+        raise ValueError(f"ONNX export of {model_name} drifts from PyTorch: min cosine {worst:.4f} < {min_cosine}")
+    return worst
+
+
+def load_embedding_model(model_name: str, backend: str = "torch", onnx_dir: Optional[str] = None,
+                         threads: Optional[int] = None) -> Any:
+    """
+    Embedding model for the configured backend. The ONNX backend exports (and
+    verifies) the model under onnx_dir on first use. `threads` caps the
+    backend's intra-op threads (torch.set_num_threads or onnxruntime's
+    intra_op_num_threads); only the torch backend imports torch.
+    """
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+        return SentenceTransformer(model_name)
+    if backend != "onnx":
+        raise ValueError(f"Unknown embedding backend: {backend} (expected one of {BACKENDS})")
+
+    model_dir = export_dir(onnx_dir or "./cache/onnx", model_name)
+    if not os.path.exists(os.path.join(model_dir, META_FILE)):
+        print(f"🔧 Exporting {model_name} to ONNX (int8) in {model_dir}...")
+        export_onnx(model_name, model_dir)
+        try:
+            worst = verify_export(model_name, model_dir)
+        except ValueError:
+            # Leave no usable export behind so the next start retries
+            os.remove(os.path.join(model_dir, META_FILE))
+            raise
+        print(f"✅ ONNX export verified (min cosine {worst:.4f})")
+    return OnnxEncoder(model_dir, threads=threads)
+
+
+def embedding_loader(backend: str = "torch", onnx_dir: Optional[str] = None) -> Callable[[str], Any]:
+    """Picklable model loader for EmbeddingPool workers"""
+    return partial(load_embedding_model, backend=backend, onnx_dir=onnx_dir)
+
+
+class EncoderEmbeddings:
+    """LangChain-style embed_documents/embed_query over any encode() model"""
+
+    def __init__(self, model: Any):
+        self.model = model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.encode(list(texts)).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.encode([text])[0].tolist()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Export a sentence-transformers model to int8 ONNX")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--output", default="./cache/onnx", help="Export root (one directory per model)")
+    parser.add_argument("--no-quantize", action="store_true", help="Keep full-precision weights only")
+    args = parser.parse_args()
+
+    model_dir = export_onnx(args.model, export_dir(args.output, args.model), quantize=not args.no_quantize)
+    worst = verify_export(args.model, model_dir, quantized=not args.no_quantize)
+    print(f"✅ Exported {args.model} to {model_dir} (min cosine vs PyTorch {worst:.4f})")
@@ -0,0 +1,130 @@
+"""
+Memo cache for LLM-parsed search parameters
+Maps (normalized question, question catalog version) to the parsed parameter
+dict so a repeated question skips the deconstruction LLM call. Size-bounded
+LRU in memory, written through to SQLite so it survives restarts.
+"""
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .single_flight import normalize_query
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 2048
+
+
+class ParameterCache:
+    """
+    Persistent LRU of parsed parameters.
+
+    `namespace` separates callers whose parameter shapes differ (e.g. the
+    SimpleRAGSystem dict and rag_logic's SearchParameters). Only parsed
+    objects should be stored, never raw LLM text or fallback guesses.
+    """
+
+    def __init__(self, namespace: str, path: Optional[str] = None, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.namespace = namespace
+        self.path = path
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+        if path:
+            self._open(path)
+
+    def _open(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS parameters ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        rows = self._db.execute(
+            "SELECT key, value FROM parameters WHERE namespace = ? ORDER BY last_used DESC LIMIT ?",
+            (self.namespace, self.max_entries)
+        ).fetchall()
+        for key, value in reversed(rows):
+            self._entries[key] = json.loads(value)
+        if rows:
+            logger.info(f"Loaded {len(rows)} cached {self.namespace} parameters from {path}")
+
+    @staticmethod
+    def key(question: str, version: Optional[str]) -> str:
+        return json.dumps([normalize_query(question), version])
+
+    def get(self, question: str, version: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Parsed parameters for a question at a catalog version, or None"""
+        key = self.key(question, version)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            if self._db is not None:
+                self._db.execute("UPDATE parameters SET last_used = ? WHERE namespace = ? AND key = ?",
+                                 (time.time(), self.namespace, key))
+                self._db.commit()
+            # Callers may mutate what they get back
+            return dict(value)
+
+    def put(self, question: str, version: Optional[str], parameters: Dict[str, Any]):
+        key = self.key(question, version)
+        with self._lock:
+            self._entries[key] = dict(parameters)
+            self._entries.move_to_end(key)
+            self.stats["stores"] += 1
+
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+            self.stats["evictions"] += len(evicted)
+
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO parameters (namespace, key, value, last_used) VALUES (?, ?, ?, ?)",
+                    (self.namespace, key, json.dumps(parameters, default=str), time.time())
+                )
+                self._db.executemany("DELETE FROM parameters WHERE namespace = ? AND key = ?",
+                                     [(self.namespace, k) for k in evicted])
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM parameters WHERE namespace = ?", (self.namespace,))
+                self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "entries": len(self._entries),
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0,
+            **self.stats
+        }
+
+    def summary(self) -> str:
+        stats = self.get_stats()
+        return (f"🧩 Parameter cache ({self.namespace}): {stats['hits']} hits, {stats['misses']} misses, "
+                f"{stats['entries']}/{self.max_entries} entries")
@@ -0,0 +1,146 @@
+"""
+Process-wide cache of the questions table
+Holds the rows plus structures derived from them (question_id map, contextual
+description, tool schema) and revalidates them cheaply once a TTL expires
+"""
+import time
+import json
+import hashlib
+import logging
+import threading
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = 300
+
+# loader(validator) -> (rows, validator); rows is None when the server reports
+# the cached validator (ETag or latest updated_at) is still current
+QuestionLoader = Callable[[Optional[str]], Tuple[Optional[List[Dict[str, Any]]], Optional[str]]]
+
+
+def describe_questions(questions: List[Dict[str, Any]], include_options: bool = False) -> str:
+    """One line per question: '- <id>: <text>' with optional MCQ options"""
+    return "\n".join([
+        f"- {q['question_id']}: {q['question_text']}" +
+        (f" (Options: {q['mcq_options']})" if include_options and q.get('mcq_options') else "")
+        for q in questions
+    ])
+
+
+def contextual_questions(questions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Questions used as proxies for the outcome being asked about"""
+    return [q for q in questions if q.get('outcome_measured') == 'contextual']
+
+
+def fingerprint_questions(questions: List[Dict[str, Any]]) -> str:
+    """Order-independent content hash, used as the catalog version"""
+    rows = sorted(json.dumps(q, sort_keys=True, default=str) for q in questions)
+    return hashlib.blake2b("\n".join(rows).encode("utf-8"), digest_size=8).hexdigest()
+
+
+class QuestionCatalog:
+    """
+    TTL cache over the questions table.
+
+    Within the TTL every accessor is served from memory. After it expires the
+    loader is asked to revalidate with the last validator; an unchanged table
+    costs one conditional request and keeps every derived structure. If the
+    table did change, or the loader fails, derived structures are rebuilt or
+    the stale copy is kept respectively.
+    """
+
+    def __init__(self, loader: QuestionLoader, ttl_seconds: float = DEFAULT_TTL_SECONDS,
+                 clock: Callable[[], float] = time.monotonic):
+        self.loader = loader
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._questions: List[Dict[str, Any]] = []
+        self._validator: Optional[str] = None
+        self._version: Optional[str] = None
+        self._expires_at = 0.0
+        self._derived: Dict[str, Any] = {}
+        self.stats = {"hits": 0, "revalidations": 0, "not_modified": 0, "reloads": 0, "errors": 0}
+
+    def _refresh_locked(self):
+        self.stats["revalidations"] += 1
+        try:
+            rows, validator = self.loader(self._validator if self._version else None)
+        except Exception as e:
+            # Serve the stale copy and try again after another TTL
+            self.stats["errors"] += 1
+            logger.error(f"Error refreshing question catalog: {str(e)}")
+            self._expires_at = self.clock() + self.ttl_seconds
+            return
+
+        self._expires_at = self.clock() + self.ttl_seconds
+        if rows is None:
+            self.stats["not_modified"] += 1
+            return
+
+        self._validator = validator
+        version = fingerprint_questions(rows)
+        if version == self._version:
+            self.stats["not_modified"] += 1
+            return
+
+        self.stats["reloads"] += 1
+        self._questions = rows
+        self._version = version
+        self._derived = {}
+        logger.info(f"Loaded question catalog with {len(rows)} questions (version {version})")
+
+    def _ensure_fresh(self):
+        if self._version is not None and self.clock() < self._expires_at:
+            self.stats["hits"] += 1
+            return
+        with self._lock:
+            if self._version is None or self.clock() >= self._expires_at:
+                self._refresh_locked()
+
+    def invalidate(self):
+        """Force revalidation on the next access"""
+        self._expires_at = 0.0
+
+    @property
+    def version(self) -> Optional[str]:
+        """Content fingerprint of the current questions"""
+        self._ensure_fresh()
+        return self._version
+
+    def questions(self) -> List[Dict[str, Any]]:
+        self._ensure_fresh()
+        return self._questions
+
+    def derived(self, name: str, builder: Callable[[List[Dict[str, Any]]], Any]) -> Any:
+        """Memoize a structure built from the questions until they change"""
+        self._ensure_fresh()
+        derived = self._derived
+        if name not in derived:
+            derived[name] = builder(self._questions)
+        return derived[name]
+
+    def by_id(self) -> Dict[str, Dict[str, Any]]:
+        return self.derived("by_id", lambda questions: {q['question_id']: q for q in questions})
+
+    def contextual(self) -> List[Dict[str, Any]]:
+        return self.derived("contextual", contextual_questions)
+
+    def contextual_version(self) -> Optional[str]:
+        """Fingerprint of the contextual questions alone, for caches built from prompts that list them"""
+        return self.derived("contextual_version", lambda questions: fingerprint_questions(contextual_questions(questions)))
+
+    def contextual_description(self, include_options: bool = False) -> str:
+        return self.derived(
+            f"contextual_description:{include_options}",
+            lambda questions: describe_questions(contextual_questions(questions), include_options)
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "questions": len(self._questions),
+            "version": self._version,
+            **self.stats
+        }
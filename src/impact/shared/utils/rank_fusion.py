@@ -0,0 +1,51 @@
+"""
+Rank fusion helpers
+Merge ranked result lists from independent retrievers into one ranking
+"""
+from typing import List, Dict, Hashable, Optional, Sequence, Tuple
+
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Hashable]],
+                           weights: Optional[Sequence[float]] = None,
+                           k: int = RRF_K) -> List[Tuple[Hashable, float]]:
+    """
+    Reciprocal-rank fusion: score(d) = sum_i weight_i / (k + rank_i(d)).
+    Only ranks are used, so legs with incomparable score scales (BM25 vs
+    cosine) can be merged without normalization. Ties keep first-seen order.
+    """
+    weights = weights or [1.0] * len(rankings)
+    if len(weights) != len(rankings):
+        raise ValueError("reciprocal_rank_fusion expects one weight per ranking")
+
+    scores: Dict[Hashable, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, key in enumerate(ranking, 1):
+            scores[key] = scores.get(key, 0.0) + weight / (k + rank)
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def weighted_score_fusion(scored: Sequence[Sequence[Tuple[Hashable, float]]],
+                          weights: Optional[Sequence[float]] = None) -> List[Tuple[Hashable, float]]:
+    """
+    Convex combination of min-max normalized scores from each leg.
+    A document missing from a leg contributes 0 for that leg.
+    """
+    weights = weights or [1.0] * len(scored)
+    if len(weights) != len(scored):
+        raise ValueError("weighted_score_fusion expects one weight per result list")
+
+    scores: Dict[Hashable, float] = {}
+    for results, weight in zip(scored, weights):
+        if not results:
+            continue
+        values = [score for _, score in results]
+        low, high = min(values), max(values)
+        span = (high - low) or 1.0
+        for key, score in results:
+            normalized = (score - low) / span if high != low else 1.0
+            scores[key] = scores.get(key, 0.0) + weight * normalized
+
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,115 @@
+"""
+Request coalescing (single-flight)
+Concurrent calls with the same key share one in-flight computation: the first
+caller runs it, the others wait for and receive the same result (or exception).
+Nothing is cached once the computation finishes.
+"""
+import json
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from .embedding_cache import normalize_text
+
+
+def normalize_query(query: str) -> str:
+    """Case, whitespace and trailing punctuation do not change a query"""
+    return normalize_text(query).casefold().rstrip("?!. ")
+
+
+def flight_key(query: str, filters: Optional[Dict[str, Any]] = None) -> str:
+    """Key identical requests: normalized query plus canonical filters"""
+    return json.dumps([normalize_query(query), filters or {}], sort_keys=True, default=str)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "waiters")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class _FlightStats:
+    def __init__(self):
+        self.stats = {"requests": 0, "executions": 0, "collapsed": 0, "max_waiters": 0}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"in_flight": len(self._calls), **self.stats}
+
+    def summary(self) -> str:
+        return (f"🔀 Request coalescing: {self.stats['requests']} requests, "
+                f"{self.stats['executions']} executed, {self.stats['collapsed']} collapsed")
+
+
+class SingleFlight(_FlightStats):
+    """Thread-based single-flight for synchronous servers and handlers"""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.stats["requests"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.stats["executions"] += 1
+            else:
+                call.waiters += 1
+                self.stats["collapsed"] += 1
+                self.stats["max_waiters"] = max(self.stats["max_waiters"], call.waiters)
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+class AsyncSingleFlight(_FlightStats):
+    """
+    asyncio single-flight. The computation runs as its own task, so a caller
+    that disconnects (is cancelled) does not cancel it for the others.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[str, int] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        self.stats["requests"] += 1
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(fn())
+            self._waiters[key] = 0
+            self.stats["executions"] += 1
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            self._waiters[key] += 1
+            self.stats["collapsed"] += 1
+            self.stats["max_waiters"] = max(self.stats["max_waiters"], self._waiters[key])
+
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Future):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            del self._waiters[key]
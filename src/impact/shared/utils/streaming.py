@@ -0,0 +1,50 @@
+"""
+Wire formats for streamed answers
+A streamed answer is a sequence of (event, data) pairs: one 'evidence' event
+with the retrieved sources, 'token' events as the LLM produces text, then a
+'done' (or 'error') event. These helpers encode that sequence as Server-Sent
+Events or newline-delimited JSON.
+"""
+import json
+from typing import Any, Dict, Iterable, Iterator, Tuple
+
+StreamEvent = Tuple[str, Dict[str, Any]]
+
+SSE_MEDIA_TYPE = "text/event-stream"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Headers that stop proxies (nginx, Vercel) from buffering the stream
+STREAM_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Event; data is always a single JSON line"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def ndjson_line(event: str, data: Dict[str, Any]) -> str:
+    """Encode one event as a JSON line: {"event": ..., "data": ...}"""
+    return json.dumps({"event": event, "data": data}, default=str) + "\n"
+
+
+STREAM_FORMATS = {
+    "sse": (sse_event, SSE_MEDIA_TYPE),
+    "ndjson": (ndjson_line, NDJSON_MEDIA_TYPE),
+}
+
+
+def media_type_for(fmt: str) -> str:
+    if fmt not in STREAM_FORMATS:
+        raise ValueError(f"Unknown stream format '{fmt}', expected one of {sorted(STREAM_FORMATS)}")
+    return STREAM_FORMATS[fmt][1]
+
+
+def encode_stream(events: Iterable[StreamEvent], fmt: str = "sse") -> Iterator[str]:
+    """Encode (event, data) pairs lazily so each one is flushed as it is produced"""
+    media_type_for(fmt)
+    encode = STREAM_FORMATS[fmt][0]
+    for event, data in events:
+        yield encode(event, data)
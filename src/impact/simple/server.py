@@ -9,7 +9,7 @@ from typing import List
 import logging
 
 # Updated import path
-from .simple_rag import SimpleRAGSystem
+from .simple_rag import AsyncSimpleRAGSystem
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,8 +21,13 @@ app = FastAPI(
     version="1.0.0"
 )
 
-# Initialize RAG system
-rag_system = SimpleRAGSystem()
+# Initialize RAG system (non-blocking, so one worker serves many queries at once)
+rag_system = AsyncSimpleRAGSystem()
+
+@app.on_event("shutdown")
+async def close_rag_system():
+    """Release pooled HTTP connections"""
+    await rag_system.aclose()
 
 class QueryRequest(BaseModel):
     question: str
@@ -48,7 +53,7 @@ async def search_impact_data(request: QueryRequest):
         logger.info(f"Processing query: {request.question}")
         
         # Process query through RAG system
-        result = rag_system.process_query(request.question)
+        result = await rag_system.process_query(request.question)
         
         # Format source evidence
         source_evidence = []
@@ -73,7 +78,13 @@ async def search_impact_data(request: QueryRequest):
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy", "service": "Impact Intelligence Platform - Simple System"}
+    return {
+        "status": "healthy",
+        "service": "Impact Intelligence Platform - Simple System",
+        "request_coalescing": rag_system.query_flights.get_stats(),
+        "filter_extraction": rag_system.filter_extractor.get_stats(),
+        "parameter_cache": rag_system.parameter_cache.get_stats()
+    }
 
 @app.get("/")
 async def root():
@@ -0,0 +1,157 @@
+"""
+Unit tests for SemanticAnswerCache
+Tests similarity matching, scoping, LRU/TTL eviction and the on-disk tier
+"""
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+
+import numpy as np
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from impact.shared.utils.answer_cache import SemanticAnswerCache, CorpusVersion, UNVERSIONED
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def near(vector, noise=0.05, seed=0):
+    """A vector close to `vector` (cosine ~0.99)"""
+    rng = np.random.default_rng(seed)
+    return np.asarray(vector) + noise * rng.standard_normal(len(vector))
+
+
+class TestSemanticAnswerCache(unittest.TestCase):
+    """Test cases for SemanticAnswerCache"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.clock = FakeClock()
+        rng = np.random.default_rng(42)
+        self.confidence = rng.standard_normal(16)
+        self.friendship = rng.standard_normal(16)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def make_cache(self, **kwargs):
+        kwargs.setdefault("threshold", 0.95)
+        return SemanticAnswerCache(clock=self.clock, **kwargs)
+
+    def test_near_duplicate_hits(self):
+        """Test a reworded question above the threshold reuses the answer"""
+        cache = self.make_cache()
+        cache.store("How do programs build confidence?", self.confidence, {"answer": "A"})
+
+        hit = cache.lookup(near(self.confidence))
+        self.assertEqual(hit["answer"], {"answer": "A"})
+        self.assertEqual(hit["question"], "How do programs build confidence?")
+        self.assertGreater(hit["similarity"], 0.95)
+
+        self.assertIsNone(cache.lookup(self.friendship))
+        self.assertEqual((cache.stats["hits"], cache.stats["misses"]), (1, 1))
+
+    def test_scope_and_corpus_version_isolation(self):
+        """Test answers never cross filter scopes or corpus versions"""
+        cache = self.make_cache()
+        cache.store("q", self.confidence, {"answer": "girls"}, scope={"gender": "Female"}, corpus_version="v1")
+
+        self.assertIsNone(cache.lookup(self.confidence, scope={"gender": "Male"}, corpus_version="v1"))
+        self.assertIsNone(cache.lookup(self.confidence, scope={"gender": "Female"}, corpus_version="v2"))
+        self.assertIsNotNone(cache.lookup(self.confidence, scope={"gender": "Female"}, corpus_version="v1"))
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted at capacity"""
+        cache = self.make_cache(max_entries=2)
+        cache.store("confidence", self.confidence, {"answer": "A"})
+        cache.store("friendship", self.friendship, {"answer": "B"})
+        cache.lookup(self.confidence)  # confidence is now most recently used
+
+        third = np.random.default_rng(7).standard_normal(16)
+        cache.store("third", third, {"answer": "C"})
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.lookup(self.friendship))
+        self.assertIsNotNone(cache.lookup(self.confidence))
+        self.assertEqual(cache.stats["evictions"], 1)
+
+    def test_ttl_expiry(self):
+        """Test entries older than the TTL are not served"""
+        cache = self.make_cache(ttl_seconds=60)
+        cache.store("q", self.confidence, {"answer": "A"})
+
+        self.clock.now += 61
+        self.assertIsNone(cache.lookup(self.confidence))
+        self.assertEqual(cache.stats["expirations"], 1)
+        self.assertEqual(len(cache), 0)
+
+    def test_disk_tier_survives_restart(self):
+        """Test answers are reloaded from SQLite and expired rows are dropped"""
+        path = os.path.join(self.temp_dir, "answers.sqlite3")
+        cache = self.make_cache(path=path, ttl_seconds=60)
+        cache.store("old", self.friendship, {"answer": "stale"})
+        self.clock.now += 30
+        cache.store("q", self.confidence, {"answer": "A", "evidence_count": 3}, corpus_version="v1")
+        cache.close()
+
+        self.clock.now += 40  # first entry is now past its TTL
+        reopened = self.make_cache(path=path, ttl_seconds=60)
+        self.assertEqual(len(reopened), 1)
+        hit = reopened.lookup(near(self.confidence), corpus_version="v1")
+        self.assertEqual(hit["answer"], {"answer": "A", "evidence_count": 3})
+
+        # New ids must not collide with reloaded rows
+        reopened.store("another", self.friendship, {"answer": "B"})
+        reopened.close()
+        self.assertEqual(len(self.make_cache(path=path, ttl_seconds=60)), 2)
+
+    def test_instances_share_disk_tier(self):
+        """Test two instances on one file store without id collisions or deleting each other's rows"""
+        path = os.path.join(self.temp_dir, "answers.sqlite3")
+        first = self.make_cache(path=path, max_entries=1)
+        second = self.make_cache(path=path, max_entries=1)
+        first.store("confidence", self.confidence, {"answer": "A"})
+        self.clock.now += 1
+        second.store("friendship", self.friendship, {"answer": "B"})
+        first.store("again", near(self.confidence), {"answer": "C"})  # evicts from memory only
+
+        self.assertIsNotNone(second.lookup(self.friendship))
+        first.close()
+        second.close()
+
+    def test_disk_failure_is_a_miss(self):
+        """Test a broken disk tier logs and falls back to memory instead of raising"""
+        cache = self.make_cache(path=os.path.join(self.temp_dir, "answers.sqlite3"))
+        cache._db.execute("DROP TABLE answers")
+
+        with self.assertLogs("impact.shared.utils.answer_cache", level="WARNING"):
+            cache.store("q", self.confidence, {"answer": "A"})
+        self.assertEqual(cache.lookup(self.confidence)["answer"], {"answer": "A"})
+        self.assertEqual(cache.get_stats()["disk_errors"], 1)
+        cache.close()
+
+    def test_corpus_version(self):
+        """Test bumping the stamp changes the version readers see"""
+        version = CorpusVersion(os.path.join(self.temp_dir, "stamp", "corpus_version"))
+        self.assertEqual(version.current(), UNVERSIONED)
+
+        first = version.bump()
+        self.assertEqual(version.current(), first)
+
+        reader = CorpusVersion(version.path)
+        second = version.bump()
+        self.assertNotEqual(first, second)
+        self.assertEqual(reader.current(), second)
+
+
+if __name__ == '__main__':
+    unittest.main()
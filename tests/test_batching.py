@@ -0,0 +1,93 @@
+"""
+Unit tests for length-bucketed dynamic batching
+Tests the token budget, batch size cap, order coverage and token counting
+"""
+import unittest
+import os
+import sys
+from types import SimpleNamespace
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from impact.shared.utils.batching import (
+    token_budget_batches, token_lengths, padded_tokens, estimate_tokens
+)
+
+
+class FastTokenizer:
+    """tokenizers.Tokenizer stand-in that pads every encoding to the longest"""
+
+    def encode_batch(self, texts):
+        width = max(len(t.split()) for t in texts) + 2
+        return [SimpleNamespace(attention_mask=[1] * (len(t.split()) + 2) + [0] * (width - len(t.split()) - 2))
+                for t in texts]
+
+
+class HFTokenizer:
+    """transformers tokenizer stand-in: one id per word plus two special tokens"""
+
+    def __call__(self, texts, add_special_tokens=True, truncation=False, max_length=None):
+        ids = [[0] * (len(t.split()) + 2) for t in texts]
+        if truncation:
+            ids = [row[:max_length] for row in ids]
+        return {"input_ids": ids}
+
+
+class TestTokenBudgetBatches(unittest.TestCase):
+    """Test cases for token_budget_batches"""
+
+    def test_covers_every_position_once(self):
+        """Test every input lands in exactly one batch"""
+        lengths = [5, 120, 7, 300, 5, 64, 9, 12]
+        batches = token_budget_batches(lengths, max_tokens=256, max_batch_size=4)
+        self.assertEqual(sorted(i for batch in batches for i in batch), list(range(len(lengths))))
+
+    def test_budget_and_cap(self):
+        """Test padded batch size stays within the budget and the batch size cap"""
+        lengths = [8] * 100 + [60] * 10 + [200] * 3
+        batches = token_budget_batches(lengths, max_tokens=512, max_batch_size=32)
+        for batch in batches:
+            self.assertLessEqual(len(batch), 32)
+            self.assertLessEqual(len(batch) * max(lengths[i] for i in batch), 512)
+        # Short texts fill whole batches, long ones get small batches
+        self.assertEqual(len(batches[0]), 32)
+        self.assertEqual([len(b) for b in batches[-2:]], [2, 1])
+
+    def test_oversized_text_alone(self):
+        """Test a text over the budget gets a batch to itself"""
+        batches = token_budget_batches([10, 1000, 10], max_tokens=100)
+        self.assertEqual(batches, [[0, 2], [1]])
+
+    def test_less_padding_than_fixed_batches(self):
+        """Test sorted budget batches compute fewer padded tokens than fixed input-order batches"""
+        lengths = [6, 180, 7, 5, 150, 8] * 20
+        fixed = [list(range(i, min(i + 32, len(lengths)))) for i in range(0, len(lengths), 32)]
+        budget = token_budget_batches(lengths, max_tokens=4096, max_batch_size=256)
+        self.assertLess(padded_tokens(lengths, budget), padded_tokens(lengths, fixed) / 2)
+
+    def test_empty(self):
+        self.assertEqual(token_budget_batches([]), [])
+
+
+class TestTokenLengths(unittest.TestCase):
+    """Test cases for token_lengths"""
+
+    def test_fast_tokenizer_counts_real_tokens(self):
+        """Test padding is not counted for tokenizers.Tokenizer"""
+        model = SimpleNamespace(tokenizer=FastTokenizer(), max_seq_length=None)
+        self.assertEqual(token_lengths(model, ["one", "one two three"]), [3, 5])
+
+    def test_transformers_tokenizer_capped(self):
+        """Test lengths are capped at max_seq_length"""
+        model = SimpleNamespace(tokenizer=HFTokenizer(), max_seq_length=4)
+        self.assertEqual(token_lengths(model, ["one", "one two three four"]), [3, 4])
+
+    def test_estimate_without_tokenizer(self):
+        """Test models without a tokenizer fall back to the character estimate"""
+        self.assertEqual(token_lengths(None, ["x" * 40]), [estimate_tokens("x" * 40)])
+        self.assertEqual(estimate_tokens(""), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,229 @@
+"""
+Unit tests for BM25Index
+Tests tokenization, ranking, incremental updates and filtered search
+"""
+import unittest
+import os
+import sys
+import asyncio
+import threading
+from unittest import mock
+from urllib.parse import parse_qs
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# The config module requires these; no network calls are made
+for name in ("SUPABASE_URL", "SUPABASE_KEY", "GOOGLE_API_KEY"):
+    os.environ.setdefault(name, "test")
+
+from impact.shared.utils.bm25_index import BM25Index, tokenize
+from impact.simple import simple_rag
+
+
+class TestBM25Index(unittest.TestCase):
+    """Test cases for BM25Index"""
+
+    def setUp(self):
+        self.index = BM25Index()
+        self.index.add_many([
+            (1, "The music project made me more confident on stage"),
+            (2, "I learned resilience when things got hard at football"),
+            (3, "Football training every week helped my fitness"),
+            (4, "Resilience means not giving up, resilience is everything"),
+            (5, "I made new friends in the creative writing group"),
+        ])
+
+    def test_tokenize(self):
+        """Test stopwords are dropped and simple inflections are merged"""
+        self.assertEqual(tokenize("The Friends were helping!"), ["friend", "help"])
+        self.assertEqual(tokenize("stories"), ["story"])
+        self.assertEqual(tokenize(""), [])
+
+    def test_ranking(self):
+        """Test documents with more matches rank higher"""
+        results = self.index.search("resilience", k=5)
+        self.assertEqual([doc_id for doc_id, _ in results], [4, 2])
+        self.assertGreater(results[0][1], results[1][1])
+
+    def test_rare_terms_weigh_more(self):
+        """Test IDF favours the rarer query term"""
+        results = self.index.search("football fitness", k=5)
+        self.assertEqual(results[0][0], 3)
+
+    def test_no_match(self):
+        """Test unknown terms return nothing"""
+        self.assertEqual(self.index.search("astronomy"), [])
+
+    def test_incremental_add_and_replace(self):
+        """Test new and replaced documents are searchable immediately"""
+        self.index.add(6, "Astronomy club showed me the stars")
+        self.assertEqual(self.index.search("astronomy")[0][0], 6)
+
+        self.index.add(6, "Chess club taught me patience")
+        self.assertEqual(self.index.search("astronomy"), [])
+        self.assertEqual(len(self.index), 6)
+
+    def test_remove(self):
+        """Test removed documents no longer match and stats are updated"""
+        total_before = self.index.average_length * len(self.index)
+        self.assertTrue(self.index.remove(4))
+        self.assertFalse(self.index.remove(4))
+        self.assertEqual([doc_id for doc_id, _ in self.index.search("resilience")], [2])
+        self.assertLess(self.index.average_length * len(self.index), total_before)
+
+    def test_doc_filter(self):
+        """Test filtered search skips rejected documents"""
+        results = self.index.search("resilience", doc_filter=lambda doc_id: doc_id != 4)
+        self.assertEqual([doc_id for doc_id, _ in results], [2])
+
+
+class FakeChangeFeed:
+    """Serves responses rows in (updated_at, response_id) order after the requested cursor"""
+
+    def __init__(self):
+        self.rows = []
+        self.requests = []
+
+    def __call__(self, table, params=""):
+        query = {key: values[0] for key, values in parse_qs(params.lstrip("?")).items()}
+        self.requests.append(query)
+        if query['order'] == "response_id.asc":
+            rows = sorted(self.rows, key=lambda row: row['response_id'])
+            if 'response_id' in query:
+                rows = [row for row in rows if row['response_id'] > int(query['response_id'][len("gt."):])]
+            return rows[:int(query['limit'])]
+
+        rows = sorted(self.rows, key=lambda row: (row['updated_at'], row['response_id']))
+        if 'or' in query:
+            cursor = self.requests_cursor(query['or'])
+            rows = [row for row in rows if (row['updated_at'], row['response_id']) > cursor]
+        elif 'updated_at' in query:
+            rows = [row for row in rows if row['updated_at'] >= query['updated_at'][len("gte."):]]
+        return rows[:int(query['limit'])]
+
+    @staticmethod
+    def requests_cursor(clause):
+        ts = clause.split('updated_at.gt."')[1].split('"')[0]
+        response_id = int(clause.split('response_id.gt.')[1].rstrip('))'))
+        return ts, response_id
+
+
+class TestSimpleRAGRefresh(unittest.TestCase):
+    """Test cases for the change-feed refresh of SimpleRAGSystem's lexical index"""
+
+    def setUp(self):
+        self.feed = FakeChangeFeed()
+        self.rag = simple_rag.SimpleRAGSystem()
+        self.rag.query_supabase = self.feed
+        self.rag.change_feed = True
+        patcher = mock.patch.object(simple_rag.question_catalog, 'by_id', return_value={})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def row(self, response_id, text, updated_at, deleted_at=None):
+        return {'response_id': response_id, 'response_value': text, 'updated_at': updated_at,
+                'deleted_at': deleted_at, 'charity_name': 'YCUK'}
+
+    def test_edits_and_tombstones_are_applied(self):
+        self.feed.rows = [
+            self.row(1, "music made me confident", "2026-01-01T00:00:00"),
+            self.row(2, "football taught resilience", "2026-01-01T00:00:00"),
+        ]
+        self.assertEqual(self.rag.refresh_lexical_index(), 2)
+
+        # Response 1 is edited and response 2 soft-deleted after the first refresh
+        self.feed.rows = [
+            self.row(1, "drama made me brave", "2026-01-02T00:00:00"),
+            self.row(2, "football taught resilience", "2026-01-02T00:00:00", deleted_at="2026-01-02T00:00:00"),
+        ]
+        self.assertEqual(self.rag.refresh_lexical_index(), 2)
+
+        self.assertEqual(self.rag.lexical_index.search("confident"), [])
+        self.assertEqual(self.rag.lexical_index.search("brave")[0][0], 1)
+        self.assertNotIn(2, self.rag.lexical_index)
+        self.assertNotIn(2, self.rag.indexed_responses)
+        self.assertEqual(self.rag.sync_cursor, {'updated_at': "2026-01-02T00:00:00", 'response_id': 2})
+
+    def test_pages_with_keyset_cursor(self):
+        self.feed.rows = [self.row(i, f"response {i}", "2026-01-01T00:00:00") for i in range(1, 6)]
+        with mock.patch.object(simple_rag, 'RESPONSE_PAGE_SIZE', 2):
+            self.assertEqual(self.rag.refresh_lexical_index(), 5)
+            self.assertEqual(self.rag.refresh_lexical_index(), 0)
+
+        self.assertEqual(len(self.rag.lexical_index), 5)
+        self.assertEqual(self.feed.requests[0]['order'], "updated_at.asc,response_id.asc")
+        self.assertNotIn('or', self.feed.requests[0])
+
+
+    def test_refresh_rereads_overlap_behind_cursor(self):
+        """Test a late commit behind the cursor is picked up and re-read rows are not re-applied"""
+        self.feed.rows = [self.row(2, "football taught resilience", "2026-01-01T00:00:30")]
+        self.assertEqual(self.rag.refresh_lexical_index(), 1)
+
+        # Response 1 committed after the refresh but was stamped before the cursor
+        self.feed.rows.append(self.row(1, "music made me confident", "2026-01-01T00:00:10"))
+        self.assertEqual(self.rag.refresh_lexical_index(), 1)
+
+        self.assertIn(1, self.rag.lexical_index)
+        self.assertEqual(self.feed.requests[-1]['updated_at'], "gte.2025-12-31T23:59:30")
+        self.assertNotIn('or', self.feed.requests[-1])
+
+    def test_falls_back_to_response_id_paging(self):
+        """Test a table without the change-feed columns is paged by response_id"""
+        self.assertFalse(self.rag.change_feed_probe_result(
+            400, '{"code":"42703","message":"column responses.updated_at does not exist"}'))
+        self.assertIsNone(self.rag.change_feed_probe_result(503, "unavailable"))
+
+        self.rag.change_feed = False
+        self.feed.rows = [{'response_id': i, 'response_value': f"response {i}"} for i in range(1, 6)]
+        with mock.patch.object(simple_rag, 'RESPONSE_PAGE_SIZE', 2):
+            self.assertEqual(self.rag.refresh_lexical_index(), 5)
+            self.assertEqual(self.rag.refresh_lexical_index(), 0)
+
+        self.assertEqual(len(self.rag.lexical_index), 5)
+        self.assertEqual(self.feed.requests[-1]['response_id'], "gt.5")
+
+
+class TestAsyncSimpleRAGRefresh(unittest.TestCase):
+    """Test cases for AsyncSimpleRAGSystem's refresh keeping the bulk load off the event loop"""
+
+    def setUp(self):
+        self.feed = FakeChangeFeed()
+        self.rag = simple_rag.AsyncSimpleRAGSystem()
+        self.rag.change_feed = True
+
+        async def query_supabase(table, params=""):
+            return self.feed(table, params)
+        self.rag.query_supabase = query_supabase
+        patcher = mock.patch.object(simple_rag.question_catalog, 'by_id', return_value={})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def row(self, response_id, text, updated_at):
+        return {'response_id': response_id, 'response_value': text, 'updated_at': updated_at,
+                'deleted_at': None, 'charity_name': 'YCUK'}
+
+    def test_first_load_is_indexed_off_the_loop(self):
+        threads = []
+        index_responses = self.rag.index_responses
+
+        def recording_index_responses(*args):
+            threads.append(threading.current_thread())
+            return index_responses(*args)
+        self.rag.index_responses = recording_index_responses
+
+        self.feed.rows = [self.row(i, f"response {i}", "2026-01-01T00:00:00") for i in range(1, 4)]
+        self.assertEqual(asyncio.run(self.rag.refresh_lexical_index()), 3)
+        self.assertNotEqual(threads[0], threading.main_thread())
+        self.assertEqual(len(self.rag.lexical_index), 3)
+
+        # Later refreshes are small and apply in place
+        self.feed.rows.append(self.row(4, "drama made me brave", "2026-01-02T00:00:00"))
+        self.assertEqual(asyncio.run(self.rag.refresh_lexical_index()), 1)
+        self.assertEqual(threads[1], threading.main_thread())
+        self.assertEqual(self.rag.lexical_index.search("brave")[0][0], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
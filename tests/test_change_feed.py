@@ -0,0 +1,69 @@
+"""
+Unit tests for the responses change feed helpers
+Tests keyset query parameters, cursors and the overlap rewind
+"""
+import unittest
+import os
+import sys
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from impact.shared.database.change_feed import (
+    keyset_params, cursor_after, rewind, response_id_params, CURSOR_ORDER, CHANGE_FEED_SQL
+)
+
+
+class TestChangeFeed(unittest.TestCase):
+    """Test cases for the change feed helpers"""
+
+    def test_first_page(self):
+        """Test the first page is ordered by the cursor columns without offsets"""
+        params = keyset_params(100)
+        self.assertEqual(params["order"], CURSOR_ORDER)
+        self.assertEqual(params["limit"], 100)
+        self.assertNotIn("offset", params)
+        self.assertNotIn("or", params)
+
+    def test_since(self):
+        """Test a start timestamp filters on updated_at"""
+        params = keyset_params(100, since="2024-05-01T00:00:00+00:00")
+        self.assertEqual(params["updated_at"], "gte.2024-05-01T00:00:00+00:00")
+
+    def test_cursor_page(self):
+        """Test pages after a cursor break updated_at ties on response_id"""
+        batch = [
+            {"response_id": 7, "updated_at": "2024-05-01T10:00:00.5+00:00"},
+            {"response_id": 3, "updated_at": "2024-05-01T10:00:01+00:00"},
+        ]
+        cursor = cursor_after(batch)
+        self.assertEqual(cursor, {"updated_at": "2024-05-01T10:00:01+00:00", "response_id": 3})
+
+        params = keyset_params(100, cursor, since="ignored")
+        self.assertEqual(
+            params["or"],
+            '(updated_at.gt."2024-05-01T10:00:01+00:00",'
+            'and(updated_at.eq."2024-05-01T10:00:01+00:00",response_id.gt.3))'
+        )
+        self.assertNotIn("updated_at", params)
+
+    def test_rewind(self):
+        """Test the overlap window is taken behind the cursor"""
+        cursor = {"updated_at": "2024-05-01T10:00:30Z", "response_id": 1}
+        self.assertEqual(rewind(cursor, 60), "2024-05-01T09:59:30+00:00")
+
+
+    def test_response_id_fallback(self):
+        """Test tables without the change feed are paged by response_id"""
+        params = response_id_params(100, cursor_after([{"response_id": 9}]))
+        self.assertEqual(params["order"], "response_id.asc")
+        self.assertEqual(params["response_id"], "gt.9")
+        self.assertNotIn("response_id", response_id_params(100))
+
+    def test_ddl_adds_soft_delete_column(self):
+        """Test the DDL creates the deleted_at column readers filter on"""
+        self.assertTrue(any("deleted_at" in statement for statement in CHANGE_FEED_SQL))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,250 @@
+"""
+Unit tests for the persistent embedding cache
+Tests content addressing, persistence across instances and cache-aware encoding
+"""
+import unittest
+import multiprocessing
+import os
+import sys
+import tempfile
+import shutil
+
+import numpy as np
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from impact.shared.utils.embedding_cache import (
+    EmbeddingCache, CachedEncoder, normalize_text, text_key, encode_namespace
+)
+
+
+class FakeModel:
+    """Deterministic stand-in for SentenceTransformer that records encode calls"""
+
+    def __init__(self, dimension: int = 4):
+        self.dimension = dimension
+        self.calls = []
+
+    def encode(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        return np.array([
+            [float(len(t)), float(sum(map(ord, t)) % 97), 1.0, float(i)][:self.dimension]
+            for i, t in enumerate(texts)
+        ], dtype=np.float32)
+
+
+class TestTextKeys(unittest.TestCase):
+    """Test cases for text normalization and hashing"""
+
+    def test_normalize_collapses_whitespace(self):
+        self.assertEqual(normalize_text("  hello \n  world\t"), "hello world")
+
+    def test_equivalent_texts_share_key(self):
+        self.assertEqual(text_key("I feel  confident"), text_key("I feel confident "))
+        self.assertNotEqual(text_key("I feel confident"), text_key("I feel anxious"))
+        self.assertEqual(len(text_key("anything")), 16)
+
+
+def write_texts(cache_dir, prefix, count):
+    """Append texts in small batches from a separate process"""
+    cache = EmbeddingCache(cache_dir, "test-model")
+    for start in range(0, count, 10):
+        texts = [f"{prefix} {i}" for i in range(start, start + 10)]
+        cache.put_many(texts, [[len(prefix), i] for i in range(start, start + 10)])
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    """Test cases for EmbeddingCache"""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_put_and_get(self):
+        cache = EmbeddingCache(self.cache_dir, "test-model")
+        cache.put_many(["a text", "b text"], [[1, 2, 3], [4, 5, 6]])
+
+        np.testing.assert_array_equal(cache.get("b text"), np.array([4, 5, 6], dtype=np.float32))
+        self.assertIsNone(cache.get("missing"))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats['hits'], 1)
+        self.assertEqual(cache.stats['misses'], 1)
+
+    def test_persists_across_instances(self):
+        cache = EmbeddingCache(self.cache_dir, "test-model")
+        cache.put_many(["alpha", "beta"], [[1, 0], [0, 1]])
+
+        reopened = EmbeddingCache(self.cache_dir, "test-model")
+        self.assertEqual(len(reopened), 2)
+        self.assertEqual(reopened.dimension, 2)
+        np.testing.assert_array_equal(reopened.get("alpha"), np.array([1, 0], dtype=np.float32))
+
+    def test_growth_beyond_initial_capacity(self):
+        cache = EmbeddingCache(self.cache_dir, "test-model")
+        texts = [f"text {i}" for i in range(2500)]
+        vectors = np.arange(2500 * 3, dtype=np.float32).reshape(2500, 3)
+        cache.put_many(texts, vectors)
+
+        reopened = EmbeddingCache(self.cache_dir, "test-model")
+        self.assertEqual(len(reopened), 2500)
+        np.testing.assert_array_equal(reopened.get("text 2499"), vectors[2499])
+
+    def test_duplicates_stored_once(self):
+        cache = EmbeddingCache(self.cache_dir, "test-model")
+        cache.put_many(["same", "same ", "other"], [[1, 1], [2, 2], [3, 3]])
+        self.assertEqual(len(cache), 2)
+        cache.put("same", [9, 9])
+        np.testing.assert_array_equal(cache.get("same"), np.array([1, 1], dtype=np.float32))
+
+    def test_dimension_mismatch_rejected(self):
+        cache = EmbeddingCache(self.cache_dir, "test-model")
+        cache.put("x", [1, 2, 3])
+        with self.assertRaises(ValueError):
+            cache.put("y", [1, 2])
+
+    def test_models_are_isolated(self):
+        EmbeddingCache(self.cache_dir, "model-a").put("shared text", [1, 2])
+        other = EmbeddingCache(self.cache_dir, "model-b")
+        self.assertIsNone(other.get("shared text"))
+
+    def test_meta_without_keys_file_opens_empty(self):
+        cache = EmbeddingCache(self.cache_dir, "test-model")
+        cache.put("x", [1, 2])
+        os.remove(cache.keys_path)
+
+        reopened = EmbeddingCache(self.cache_dir, "test-model")
+        self.assertEqual(len(reopened), 0)
+        self.assertIsNone(reopened.get("x"))
+
+    def test_failed_write_does_not_publish_keys(self):
+        cache = EmbeddingCache(self.cache_dir, "test-model")
+        cache.put("x", [1, 2])
+
+        def fail(_needed):
+            raise OSError("disk full")
+        cache._ensure_capacity = fail
+
+        with self.assertRaises(OSError):
+            cache.put_many(["y", "z"], [[3, 4], [5, 6]])
+        self.assertNotIn("y", cache)
+        self.assertEqual(len(cache), 1)
+
+    def test_namespaces_are_isolated(self):
+        EmbeddingCache(self.cache_dir, "test-model").put("shared text", [1, 2])
+        other = EmbeddingCache(self.cache_dir, "test-model", namespace="onnx")
+        self.assertIsNone(other.get("shared text"))
+
+    def test_instances_sharing_a_dir_do_not_overwrite(self):
+        """Test a writer that opened the cache before another's append keeps both rows"""
+        first = EmbeddingCache(self.cache_dir, "test-model")
+        second = EmbeddingCache(self.cache_dir, "test-model")
+        first.put("from first", [1, 1])
+        second.put("from second", [2, 2])
+
+        reopened = EmbeddingCache(self.cache_dir, "test-model")
+        self.assertEqual(len(reopened), 2)
+        np.testing.assert_array_equal(reopened.get("from first"), [1, 1])
+        np.testing.assert_array_equal(reopened.get("from second"), [2, 2])
+        np.testing.assert_array_equal(second.get("from first"), [1, 1])
+
+    def test_concurrent_processes(self):
+        """Test two processes appending to one cache dir lose no rows"""
+        context = multiprocessing.get_context("spawn")
+        workers = [context.Process(target=write_texts, args=(self.cache_dir, prefix, 200))
+                   for prefix in ("left", "right-hand")]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        cache = EmbeddingCache(self.cache_dir, "test-model")
+        self.assertEqual(len(cache), 400)
+        np.testing.assert_array_equal(cache.get("left 123"), [4, 123])
+        np.testing.assert_array_equal(cache.get("right-hand 7"), [10, 7])
+
+    def test_stats_report_hit_ratio_and_bytes(self):
+        cache = EmbeddingCache(self.cache_dir, "test-model")
+        cache.put("x", [1, 2, 3])
+        cache.get_many(["x", "x", "y", "z"])
+
+        stats = cache.get_stats()
+        self.assertEqual(stats['hit_ratio'], 0.5)
+        self.assertGreater(stats['bytes_on_disk'], 0)
+        self.assertIn("MB on disk", cache.summary())
+
+
+class TestCachedEncoder(unittest.TestCase):
+    """Test cases for CachedEncoder"""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.model = FakeModel()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def test_only_missing_texts_are_encoded(self):
+        encoder = CachedEncoder("test-model", self.cache_dir, model=self.model)
+        first = encoder.encode(["one", "two"])
+
+        second = encoder.encode(["two", "three", "one"])
+
+        self.assertEqual(self.model.calls, [["one", "two"], ["three"]])
+        np.testing.assert_array_equal(second[0], first[1])
+        np.testing.assert_array_equal(second[2], first[0])
+
+    def test_repeated_texts_encoded_once(self):
+        encoder = CachedEncoder("test-model", self.cache_dir, model=self.model)
+        result = encoder.encode(["dup", "dup", "other"])
+
+        self.assertEqual(self.model.calls, [["dup", "other"]])
+        self.assertEqual(result.shape, (3, 4))
+        np.testing.assert_array_equal(result[0], result[1])
+
+    def test_cache_survives_new_encoder(self):
+        CachedEncoder("test-model", self.cache_dir, model=self.model).encode(["persisted"])
+
+        fresh_model = FakeModel()
+        CachedEncoder("test-model", self.cache_dir, model=fresh_model).encode(["persisted"])
+        self.assertEqual(fresh_model.calls, [])
+
+    def test_encode_options_use_separate_namespaces(self):
+        encoder = CachedEncoder("test-model", self.cache_dir, model=self.model)
+        encoder.encode(["text"])
+        encoder.encode(["text"], normalize_embeddings=True)
+        encoder.encode(["text"], batch_size=8)
+
+        self.assertEqual(self.model.calls, [["text"], ["text"]])
+
+    def test_stats_cover_every_namespace(self):
+        encoder = CachedEncoder("test-model", self.cache_dir, model=self.model)
+        encoder.encode(["text"])
+        encoder.encode(["text", "more"], normalize_embeddings=True)
+        encoder.encode(["more"], normalize_embeddings=True)
+
+        stats = encoder.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['writes']), (1, 3, 3))
+        self.assertEqual(stats['hit_ratio'], 0.25)
+        self.assertEqual(len(stats['namespaces']), 2)
+        self.assertIn("1/4 hits", encoder.summary())
+
+    def test_backend_uses_separate_namespace(self):
+        CachedEncoder("test-model", self.cache_dir, model=self.model).encode(["text"])
+        onnx_model = FakeModel()
+        CachedEncoder("test-model", self.cache_dir, model=onnx_model, backend="onnx").encode(["text"])
+        self.assertEqual(onnx_model.calls, [["text"]])
+
+    def test_namespace_ignores_scheduling_kwargs(self):
+        self.assertEqual(encode_namespace("torch", batch_size=32, show_progress_bar=False), "")
+        self.assertEqual(encode_namespace("onnx", normalize_embeddings=True), "onnx,normalize_embeddings=True")
+
+    def test_single_string_returns_vector(self):
+        encoder = CachedEncoder("test-model", self.cache_dir, model=self.model)
+        self.assertEqual(encoder.encode("single").shape, (4,))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+"""
+Unit tests for the multi-process embedding pool
+Uses a small deterministic model so no model weights are needed
+"""
+import unittest
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from impact.shared.utils.embedding_pool import EmbeddingPool, resolve_workers
+from impact.shared.utils.embedding_cache import CachedEncoder
+
+
+class FakeModel:
+    """Embeds a text as [length, checksum, worker pid]; sleeps to simulate model time"""
+
+    delay = 0.0
+
+    def encode(self, texts, batch_size=None, **kwargs):
+        time.sleep(self.delay * len(texts))
+        return np.array([[len(t), sum(map(ord, t)) % 9973, os.getpid()] for t in texts], dtype=np.float32)
+
+
+class SlowFakeModel(FakeModel):
+    delay = 0.01
+
+
+class ThreadsFakeModel(FakeModel):
+    """Embeds a text as [threads given to the loader, torch imported in the worker]"""
+
+    def __init__(self, threads):
+        self.threads = threads
+
+    def encode(self, texts, batch_size=None, **kwargs):
+        return np.array([[self.threads, "torch" in sys.modules] for _ in texts], dtype=np.float32)
+
+
+def load_fake_model(model_name, threads=None):
+    return FakeModel()
+
+
+def load_slow_fake_model(model_name, threads=None):
+    return SlowFakeModel()
+
+
+def load_threads_fake_model(model_name, threads=None):
+    return ThreadsFakeModel(threads)
+
+
+def sample_texts(count):
+    return [("story " * (i % 17)) + f"response {i}" for i in range(count)]
+
+
+class TestEmbeddingPool(unittest.TestCase):
+    """Test cases for EmbeddingPool"""
+
+    def test_resolve_workers(self):
+        """Test 0/None mean one worker per CPU"""
+        self.assertEqual(resolve_workers(0), os.cpu_count() or 1)
+        self.assertEqual(resolve_workers(None), os.cpu_count() or 1)
+        self.assertEqual(resolve_workers(3), 3)
+
+    def test_single_worker_preserves_order(self):
+        """Test the in-process path returns vectors in input order"""
+        texts = sample_texts(50)
+        pool = EmbeddingPool("fake", workers=1, batch_size=8, loader=load_fake_model)
+        result = pool.encode(texts)
+
+        expected = FakeModel().encode(texts)
+        np.testing.assert_array_equal(result[:, :2], expected[:, :2])
+        self.assertEqual(pool.get_stats()["batches"], 7)
+
+    def test_token_budget_batches(self):
+        """Test short texts share large batches, long texts get small ones, and padding shrinks"""
+        texts = ["Selected: Yes"] * 40 + ["a long story " * 40] * 4
+        pool = EmbeddingPool("fake", workers=1, batch_size=256, token_budget=512, loader=load_fake_model)
+        result = pool.encode(texts)
+
+        np.testing.assert_array_equal(result[:, :2], FakeModel().encode(texts)[:, :2])
+        stats = pool.get_stats()
+        self.assertLess(stats["batches"], 10)
+        self.assertLess(stats["padding_ratio"], 0.1)
+
+    def test_workers_preserve_order(self):
+        """Test sharded results come back in input order and use several processes"""
+        texts = sample_texts(200)
+        with EmbeddingPool("fake", workers=2, batch_size=10, loader=load_slow_fake_model) as pool:
+            result = pool.encode(texts)
+
+        expected = FakeModel().encode(texts)
+        np.testing.assert_array_equal(result[:, :2], expected[:, :2])
+        pids = set(result[:, 2].astype(int))
+        self.assertNotIn(os.getpid(), pids)
+        self.assertEqual(len(pids), 2)
+
+    def test_worker_threads_go_to_loader(self):
+        """Test each worker's share of the cores reaches the loader and torch is not imported for it"""
+        with EmbeddingPool("fake", workers=2, batch_size=10, loader=load_threads_fake_model) as pool:
+            result = pool.encode(sample_texts(20))
+
+        expected_threads = max(1, (os.cpu_count() or 1) // 2)
+        np.testing.assert_array_equal(result[:, 0], expected_threads)
+        np.testing.assert_array_equal(result[:, 1], 0)
+
+    def test_workers_speed_up(self):
+        """Test work spread across processes finishes faster than one process"""
+        texts = sample_texts(120)
+        single = EmbeddingPool("fake", workers=1, batch_size=10, loader=load_slow_fake_model)
+        started = time.perf_counter()
+        single.encode(texts)
+        single_seconds = time.perf_counter() - started
+
+        with EmbeddingPool("fake", workers=4, batch_size=10, loader=load_slow_fake_model) as pool:
+            pool.encode(texts[:40])  # start the workers
+            started = time.perf_counter()
+            pool.encode(texts)
+            pool_seconds = time.perf_counter() - started
+
+        self.assertLess(pool_seconds, single_seconds / 2)
+
+    def test_single_text_and_empty(self):
+        """Test a bare string returns one vector and an empty list returns no rows"""
+        pool = EmbeddingPool("fake", workers=1, loader=load_fake_model)
+        self.assertEqual(pool.encode("hello").shape, (3,))
+        self.assertEqual(len(pool.encode([])), 0)
+
+    def test_behind_cached_encoder(self):
+        """Test the pool works as the model behind a CachedEncoder"""
+        import tempfile
+        with tempfile.TemporaryDirectory() as cache_dir:
+            pool = EmbeddingPool("fake", workers=1, loader=load_fake_model)
+            encoder = CachedEncoder("fake", cache_dir, model=pool)
+            texts = sample_texts(20)
+            first = encoder.encode(texts)
+            second = encoder.encode(texts)
+            np.testing.assert_array_equal(first, second)
+            self.assertEqual(pool.get_stats()["texts"], 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
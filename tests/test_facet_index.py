@@ -0,0 +1,139 @@
+"""
+Unit tests for the metadata facet index
+Tests bitmap set operations across containers and where-clause evaluation
+"""
+import unittest
+import os
+import sys
+
+import numpy as np
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from impact.shared.utils.facet_index import Bitmap, FacetIndex
+
+
+class TestBitmap(unittest.TestCase):
+    """Test cases for Bitmap"""
+
+    def setUp(self):
+        self.universe = 1000
+        self.sparse = Bitmap.from_ordinals([3, 10, 500, 999], self.universe)
+        self.dense = Bitmap.from_ordinals(range(0, 1000, 2), self.universe)
+
+    def test_container_selection(self):
+        """Test sparse sets use ordinals and dense sets use a bitset"""
+        self.assertIsNotNone(self.sparse.ordinals)
+        self.assertIsNotNone(self.dense.bits)
+        self.assertLess(self.dense.nbytes(), 500 * 4)
+
+    def test_operations_match_python_sets(self):
+        """Test AND/OR/AND NOT for every container combination"""
+        sets = {
+            'sparse': {3, 10, 500, 999},
+            'dense': set(range(0, 1000, 2)),
+        }
+        bitmaps = {'sparse': self.sparse, 'dense': self.dense}
+
+        for a in bitmaps:
+            for b in bitmaps:
+                self.assertEqual(set((bitmaps[a] & bitmaps[b]).to_ordinals().tolist()), sets[a] & sets[b])
+                self.assertEqual(set((bitmaps[a] | bitmaps[b]).to_ordinals().tolist()), sets[a] | sets[b])
+                self.assertEqual(set((bitmaps[a] - bitmaps[b]).to_ordinals().tolist()), sets[a] - sets[b])
+
+    def test_full_and_empty(self):
+        """Test full and empty bitmaps"""
+        self.assertEqual(Bitmap.full(self.universe).cardinality(), self.universe)
+        self.assertEqual(len(Bitmap.empty(self.universe)), 0)
+        self.assertEqual(len(self.sparse & Bitmap.empty(self.universe)), 0)
+
+    def test_contains_many(self):
+        """Test vectorized membership"""
+        probe = np.array([3, 4, 998, 999])
+        np.testing.assert_array_equal(self.sparse.contains_many(probe), [True, False, False, True])
+        np.testing.assert_array_equal(self.dense.contains_many(probe), [False, True, True, False])
+
+
+class TestFacetIndex(unittest.TestCase):
+    """Test cases for FacetIndex"""
+
+    def setUp(self):
+        self.metadatas = [
+            {
+                'charity_name': ['YCUK', 'Palace for Life', 'Symphony Studios'][i % 3],
+                'age_group': ['12-14', '15-17'][i % 2],
+                'gender': 'Female' if i % 5 == 0 else 'Male',
+                'question_id': f"q{i % 4}",
+                'thematic_tags': ['confidence', 'community'] if i % 7 == 0 else ['skills']
+            }
+            for i in range(100)
+        ]
+        self.index = FacetIndex.build(self.metadatas)
+
+    def expected(self, predicate):
+        return [i for i, metadata in enumerate(self.metadatas) if predicate(metadata)]
+
+    def test_single_field(self):
+        """Test equality lookup"""
+        self.assertEqual(
+            self.index.candidates({'charity_name': 'YCUK'}).tolist(),
+            self.expected(lambda m: m['charity_name'] == 'YCUK')
+        )
+
+    def test_and_in_nin(self):
+        """Test $and with $in and $nin"""
+        where = {'$and': [
+            {'question_id': {'$in': ['q1', 'q2']}},
+            {'charity_name': {'$nin': ['YCUK']}},
+            {'age_group': '15-17'}
+        ]}
+        self.assertEqual(
+            self.index.candidates(where).tolist(),
+            self.expected(lambda m: m['question_id'] in ('q1', 'q2')
+                          and m['charity_name'] != 'YCUK' and m['age_group'] == '15-17')
+        )
+
+    def test_or_and_not(self):
+        """Test $or and $not"""
+        where = {
+            '$or': [{'gender': 'Female'}, {'question_id': 'q3'}],
+            '$not': {'charity_name': 'Palace for Life'}
+        }
+        self.assertEqual(
+            self.index.candidates(where).tolist(),
+            self.expected(lambda m: (m['gender'] == 'Female' or m['question_id'] == 'q3')
+                          and m['charity_name'] != 'Palace for Life')
+        )
+
+    def test_list_and_json_tags(self):
+        """Test list-valued and JSON-encoded tag fields match per element"""
+        self.assertEqual(
+            self.index.candidates({'thematic_tags': 'confidence'}).tolist(),
+            self.expected(lambda m: 'confidence' in m['thematic_tags'])
+        )
+
+        index = FacetIndex.build([{'thematic_tags': '["a", "b"]'}, {'thematic_tags': '["b"]'}])
+        self.assertEqual(index.candidates({'thematic_tags': 'a'}).tolist(), [0])
+        self.assertEqual(index.candidates({'thematic_tags': 'b'}).tolist(), [0, 1])
+
+    def test_unknown_value_and_coverage(self):
+        """Test unknown values match nothing and unindexed fields are not covered"""
+        self.assertEqual(len(self.index.candidates({'charity_name': 'Unknown'})), 0)
+        self.assertTrue(self.index.covers({'$and': [{'gender': 'Male'}, {'age_group': '12-14'}]}))
+        self.assertFalse(self.index.covers({'response_id': 5}))
+
+    def test_incremental_add(self):
+        """Test documents added after a lookup are visible"""
+        before = len(self.index.candidates({'gender': 'Female'}))
+        self.index.add({'gender': 'Female'})
+        self.assertEqual(len(self.index.candidates({'gender': 'Female'})), before + 1)
+
+    def test_unsupported_operator(self):
+        """Test unsupported operators raise"""
+        with self.assertRaises(ValueError):
+            self.index.evaluate({'gender': {'$gt': 'A'}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+"""
+Unit tests for FilterExtractor
+Tests gazetteer matching, aliases, fuzzy charity names and LLM fallback decisions
+"""
+import unittest
+import os
+import sys
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from impact.shared.utils.filter_extractor import FilterExtractor, parse_age_range
+
+
+class TestFilterExtractor(unittest.TestCase):
+    """Test cases for FilterExtractor"""
+
+    def setUp(self):
+        self.extractor = FilterExtractor()
+        self.extractor.set_values({
+            'charity_name': ['YCUK', 'Palace for Life', 'Symphony Studios'],
+            'age_group': ['12-14', '15-17', '18+'],
+            'gender': ['Male', 'Female'],
+        })
+
+    def assertFilters(self, question, charity_name=None, age_group=None, gender=None):
+        result = self.extractor.extract(question)
+        self.assertTrue(result['confident'], result['reason'])
+        self.assertEqual((result['charity_name'], result['age_group'], result['gender']),
+                         (charity_name, age_group, gender))
+        return result
+
+    def test_exact_values_and_aliases(self):
+        """Test gazetteer values and aliases resolve to the stored values"""
+        result = self.assertFilters("How do YCUK programs help teenage girls?", 'YCUK', '15-17', 'Female')
+        self.assertEqual(result['themes'], ['programs', 'help'])
+        self.assertFilters("Stories from young men aged 19", age_group='18+', gender='Male')
+        self.assertFilters("What do 13 year olds say about confidence?", age_group='12-14')
+        self.assertFilters("Feedback from the 15-17 group at palace for life", 'Palace for Life', '15-17')
+
+    def test_fuzzy_charity(self):
+        """Test misspelt charity names are matched and removed from themes"""
+        result = self.assertFilters("What impact does Palace for Lfe have?", charity_name='Palace for Life')
+        self.assertEqual(result['themes'], ['impact'])
+
+    def test_no_filters_is_confident(self):
+        """Test purely thematic questions take the fast path"""
+        result = self.assertFilters("Show me stories about resilience")
+        self.assertIn('resilience', result['themes'])
+
+    def test_fallbacks(self):
+        """Test ambiguous questions are handed to the LLM"""
+        for question in [
+            "Compare boys and girls",                      # comparison, two genders
+            "What do participants at the charity say?",    # unresolved charity reference
+            "How do people of different ages respond?",    # unresolved age reference
+            "What about 8 year olds?",                     # no matching age group
+            "Tell me about Symphony Stars",               # weak fuzzy match is not trusted
+        ]:
+            result = self.extractor.extract(question)
+            self.assertFalse(result['confident'], question)
+            self.assertIsNotNone(result['reason'])
+
+    def test_only_known_values_are_returned(self):
+        """Test aliases need a matching value in the data"""
+        extractor = FilterExtractor()
+        self.assertFalse(extractor.extract("Show me stories about resilience")['confident'])
+
+        extractor.add_values({'charity_name': 'YCUK', 'age_group': '12-14', 'gender': 'Female'})
+        self.assertTrue(extractor.extract("How do girls feel?")['confident'])
+        self.assertFalse(extractor.extract("How do boys feel?")['confident'])
+        self.assertFalse(extractor.extract("How do teenagers feel?")['confident'])
+
+    def test_catalog_topics_go_to_the_llm(self):
+        """Test questions about a catalog question topic are handed to the LLM for question targeting"""
+        self.extractor.set_topics({
+            'q12': "How confident do you feel speaking in front of others?",
+            'q14': "How much do you feel part of a community?",
+        })
+        result = self.extractor.extract("Are YCUK girls more confident now?")
+        self.assertFalse(result['confident'])
+        self.assertIn("q12", result['reason'])
+
+        # Boilerplate shared by the question texts does not count as a topic match
+        self.assertFilters("How do girls feel about football?", gender='Female')
+        self.assertEqual(self.extractor.get_stats()['topics'], 2)
+
+    def test_fast_path_rate(self):
+        """Test the fast path rate is reported"""
+        self.extractor.extract("How do girls feel?")
+        self.extractor.extract("Compare organizations")
+        stats = self.extractor.get_stats()
+        self.assertEqual((stats['fast_path'], stats['fallbacks']), (1, 1))
+        self.assertEqual(stats['fast_path_rate'], 0.5)
+
+    def test_parse_age_range(self):
+        """Test age group parsing"""
+        self.assertEqual(parse_age_range('12-14'), (12, 14))
+        self.assertEqual(parse_age_range('18+'), (18, 200))
+        self.assertIsNone(parse_age_range('Adults'))
+
+
+if __name__ == '__main__':
+    unittest.main()
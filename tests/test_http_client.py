@@ -0,0 +1,191 @@
+"""
+Unit tests for HttpTransport
+Runs against a local HTTP server to test retries, connection reuse and timeouts
+"""
+import unittest
+import os
+import sys
+import gzip
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from impact.shared.utils.http_client import HttpTransport, AsyncHttpTransport
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    failures = {}
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        remaining = Handler.failures.get(self.path, 0)
+        if remaining:
+            Handler.failures[self.path] = remaining - 1
+            self._reply(503, b"busy", {"Retry-After": "0"})
+            return
+        if self.path == "/gzip" and "gzip" in self.headers.get("Accept-Encoding", ""):
+            self._reply(200, gzip.compress(b'{"compressed": true}'), {"Content-Encoding": "gzip"})
+            return
+        self._reply(200, json.dumps({"path": self.path}).encode())
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.do_GET()
+
+
+class TestHttpTransport(unittest.TestCase):
+    """Test cases for HttpTransport"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        Handler.failures = {}
+        self.sleeps = []
+        self.transport = HttpTransport(max_retries=2, backoff_factor=0.01, sleep=self.sleeps.append)
+
+    def tearDown(self):
+        self.transport.close()
+
+    def test_connection_reuse(self):
+        """Test sequential requests share one keep-alive connection"""
+        for _ in range(5):
+            self.assertEqual(self.transport.get(f"{self.base_url}/ok").status_code, 200)
+
+        stats = self.transport.get_stats()["127.0.0.1"]
+        self.assertEqual(stats["requests"], 5)
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["connections_reused"], 4)
+        self.assertIn("127.0.0.1", self.transport.summary())
+
+    def test_retries_then_succeeds(self):
+        """Test retryable statuses are retried with backoff"""
+        Handler.failures["/flaky"] = 2
+        response = self.transport.get(f"{self.base_url}/flaky")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertEqual(self.transport.get_stats()["127.0.0.1"]["retries"], 2)
+
+    def test_returns_last_response_when_retries_exhausted(self):
+        """Test the final retryable response is returned to the caller"""
+        Handler.failures["/down"] = 10
+        self.assertEqual(self.transport.get(f"{self.base_url}/down").status_code, 503)
+        self.assertEqual(len(self.sleeps), 2)
+
+    def test_post_not_retried_by_default(self):
+        """Test non-idempotent requests are only retried when asked"""
+        Handler.failures["/create"] = 1
+        self.assertEqual(self.transport.post(f"{self.base_url}/create", json={}).status_code, 503)
+        self.assertEqual(self.sleeps, [])
+
+        Handler.failures["/create"] = 1
+        self.assertEqual(self.transport.post(f"{self.base_url}/create", json={}, retry=True).status_code, 200)
+
+    def test_gzip(self):
+        """Test gzip is negotiated and decoded transparently"""
+        self.assertEqual(self.transport.get(f"{self.base_url}/gzip").json(), {"compressed": True})
+
+    def test_connection_errors_raise_after_retries(self):
+        """Test unreachable hosts raise once retries are exhausted"""
+        import requests
+        with self.assertRaises(requests.ConnectionError):
+            self.transport.get("http://127.0.0.1:9/unreachable")
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertEqual(self.transport.get_stats()["127.0.0.1"]["errors"], 3)
+
+    def test_backoff_bounds(self):
+        """Test jittered backoff stays within the exponential cap"""
+        for attempt in range(1, 6):
+            self.assertLessEqual(self.transport.backoff(attempt), min(10.0, 0.01 * 2 ** (attempt - 1)))
+
+    def test_host_timeouts(self):
+        """Test per-host timeout overrides"""
+        transport = HttpTransport(timeout=(1, 2), host_timeouts={"slow.example": (1, 60)})
+        self.assertEqual(transport.timeout_for("slow.example"), (1, 60))
+        self.assertEqual(transport.timeout_for("other.example"), (1, 2))
+
+
+
+class TestAsyncHttpTransport(unittest.TestCase):
+    """Test cases for AsyncHttpTransport"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        Handler.failures = {}
+        self.sleeps = []
+
+    def run_with_transport(self, scenario):
+        async def fake_sleep(delay):
+            self.sleeps.append(delay)
+
+        async def runner():
+            transport = AsyncHttpTransport(max_retries=2, backoff_factor=0.01, sleep=fake_sleep)
+            try:
+                return await scenario(transport)
+            finally:
+                await transport.aclose()
+
+        return asyncio.run(runner())
+
+    def test_concurrent_requests(self):
+        """Test many requests can be in flight on one client"""
+        async def scenario(transport):
+            responses = await asyncio.gather(*[transport.get(f"{self.base_url}/item/{i}") for i in range(20)])
+            return [r.json()["path"] for r in responses], transport.get_stats()
+
+        paths, stats = self.run_with_transport(scenario)
+        self.assertEqual(paths, [f"/item/{i}" for i in range(20)])
+        self.assertEqual(stats["127.0.0.1"]["requests"], 20)
+
+    def test_retries_and_opt_in_post(self):
+        """Test retry policy matches the sync transport"""
+        async def scenario(transport):
+            Handler.failures["/flaky"] = 1
+            flaky = await transport.get(f"{self.base_url}/flaky")
+            Handler.failures["/create"] = 1
+            create = await transport.post(f"{self.base_url}/create", json={})
+            Handler.failures["/create"] = 1
+            create_retried = await transport.post(f"{self.base_url}/create", json={}, retry=True)
+            return flaky.status_code, create.status_code, create_retried.status_code
+
+        self.assertEqual(self.run_with_transport(scenario), (200, 503, 200))
+        self.assertEqual(len(self.sleeps), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Unit tests for the three-stage ingest pipeline
+Tests ordering, stage overlap, backpressure, error propagation and stats
+"""
+import unittest
+import os
+import sys
+import time
+import threading
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from impact.shared.utils.ingest_pipeline import IngestPipeline, run_pipeline
+
+
+def pages(count, size=3):
+    return ([page * size + i for i in range(size)] for page in range(count))
+
+
+class TestIngestPipeline(unittest.TestCase):
+    """Test cases for IngestPipeline"""
+
+    def test_batches_written_in_order(self):
+        """Test every batch is embedded and written once, in source order"""
+        written = []
+        pipeline = run_pipeline(pages(10), lambda batch: [x * 2 for x in batch], written.append)
+
+        self.assertEqual(written, [[x * 2 for x in batch] for batch in pages(10)])
+        stats = pipeline.get_stats()
+        for stage in ("fetch", "embed", "write"):
+            self.assertEqual(stats[stage]["batches"], 10)
+            self.assertEqual(stats[stage]["records"], 30)
+
+    def test_stages_overlap(self):
+        """Test fetch and write run while embedding, so elapsed time tracks the slowest stage"""
+        def slow_source():
+            for batch in pages(6):
+                time.sleep(0.05)
+                yield batch
+
+        def embed(batch):
+            time.sleep(0.05)
+            return batch
+
+        pipeline = run_pipeline(slow_source(), embed, lambda batch: time.sleep(0.05))
+
+        # Sequential would take 6 * 0.15s; pipelined is about 8 * 0.05s
+        self.assertLess(pipeline.elapsed_seconds, 0.7)
+
+    def test_bounded_queues_apply_backpressure(self):
+        """Test a slow writer stops the fetcher running ahead by more than the queue depths"""
+        fetched = []
+        lock = threading.Lock()
+        max_ahead = []
+
+        def source():
+            for batch in pages(12, size=1):
+                fetched.append(batch)
+                yield batch
+
+        def write(batch):
+            with lock:
+                max_ahead.append(len(fetched) - (batch[0] + 1))
+            time.sleep(0.02)
+
+        run_pipeline(source(), lambda batch: batch, write, queue_depth=1)
+
+        # One batch in each queue, one in each of fetch/embed/write
+        self.assertLessEqual(max(max_ahead), 4)
+
+    def test_stage_error_is_raised(self):
+        """Test an exception in a stage stops the pipeline and is re-raised"""
+        def embed(batch):
+            if batch[0] == 6:
+                raise ValueError("embedding failed")
+            return batch
+
+        written = []
+        pipeline = IngestPipeline(pages(100), embed, written.append)
+        with self.assertRaises(ValueError):
+            pipeline.run()
+        self.assertLess(len(written), 100)
+
+    def test_source_error_is_raised(self):
+        """Test an exception while fetching is re-raised"""
+        def source():
+            yield [1]
+            raise ConnectionError("fetch failed")
+
+        with self.assertRaises(ConnectionError):
+            run_pipeline(source(), lambda batch: batch, lambda batch: None)
+
+    def test_empty_source(self):
+        """Test an empty source finishes with zero counts"""
+        pipeline = run_pipeline(iter([]), lambda batch: batch, lambda batch: None)
+        stats = pipeline.get_stats()
+        self.assertEqual(stats["write"]["records"], 0)
+        self.assertIsNone(stats["bottleneck"])
+        self.assertIn("0 records", pipeline.summary())
+
+    def test_bottleneck(self):
+        """Test the slowest stage is reported as the bottleneck"""
+        pipeline = run_pipeline(pages(3), lambda batch: time.sleep(0.03) or batch, lambda batch: None)
+        self.assertEqual(pipeline.get_stats()["bottleneck"], "embed")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,253 @@
+"""
+Unit tests for NumpyVectorStore
+Tests exact top-k search, metadata filtering, quantized storage and persistence
+"""
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+import importlib.util
+
+import numpy as np
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from impact.advanced.numpy_vector_store import NumpyVectorStore, normalize_rows
+
+LANGCHAIN_AVAILABLE = importlib.util.find_spec("langchain_core") is not None
+
+
+class TestNumpyVectorStore(unittest.TestCase):
+    """Test cases for NumpyVectorStore"""
+
+    def setUp(self):
+        self.store_dir = tempfile.mkdtemp()
+        rng = np.random.default_rng(7)
+        self.embeddings = rng.normal(size=(200, 16)).astype(np.float32)
+        self.ids = [f"doc{i}" for i in range(200)]
+        self.metadatas = [
+            {
+                'charity_name': ['YCUK', 'Palace for Life', 'Symphony Studios'][i % 3],
+                'age_group': ['12-14', '15-17'][i % 2]
+            }
+            for i in range(200)
+        ]
+        self.documents = [f"response text {i}" for i in range(200)]
+
+    def tearDown(self):
+        shutil.rmtree(self.store_dir, ignore_errors=True)
+
+    def create_store(self, dtype="float32"):
+        store = NumpyVectorStore(self.store_dir, dtype=dtype)
+        store.add(ids=self.ids, embeddings=self.embeddings,
+                  documents=self.documents, metadatas=self.metadatas)
+        return store
+
+    def brute_force_top(self, query, k, rows=None):
+        matrix = normalize_rows(self.embeddings)
+        scores = matrix @ normalize_rows(query)[0]
+        rows = np.arange(len(scores)) if rows is None else np.asarray(rows)
+        order = rows[np.argsort(-scores[rows], kind="stable")]
+        return [self.ids[i] for i in order[:k]]
+
+    def test_query_matches_brute_force(self):
+        store = self.create_store()
+        query = self.embeddings[5] + 0.1
+
+        result = store.query(query_embeddings=[query.tolist()], n_results=10)
+
+        self.assertEqual(result['ids'][0], self.brute_force_top(query, 10))
+        self.assertEqual(result['ids'][0][0], "doc5")
+        expected_similarity = float(normalize_rows(self.embeddings[5])[0] @ normalize_rows(query)[0])
+        self.assertAlmostEqual(1 - result['distances'][0][0], expected_similarity, places=5)
+        self.assertEqual(result['documents'][0][0], "response text 5")
+
+    def test_multiple_queries_in_one_call(self):
+        store = self.create_store()
+        result = store.query(query_embeddings=self.embeddings[[3, 9]].tolist(), n_results=1)
+        self.assertEqual([ids[0] for ids in result['ids']], ["doc3", "doc9"])
+
+    def test_where_filter_restricts_results(self):
+        store = self.create_store()
+        query = self.embeddings[0]
+
+        result = store.query(
+            query_embeddings=[query.tolist()], n_results=5,
+            where={"$and": [{"charity_name": "YCUK"}, {"age_group": "15-17"}]}
+        )
+
+        expected_rows = [i for i, m in enumerate(self.metadatas)
+                         if m['charity_name'] == 'YCUK' and m['age_group'] == '15-17']
+        self.assertEqual(result['ids'][0], self.brute_force_top(query, 5, expected_rows))
+        for metadata in result['metadatas'][0]:
+            self.assertEqual(metadata['charity_name'], 'YCUK')
+            self.assertEqual(metadata['age_group'], '15-17')
+
+    def test_in_and_or_operators(self):
+        store = self.create_store()
+        in_mask = store.where_mask({"charity_name": {"$in": ["YCUK", "Symphony Studios"]}})
+        or_mask = store.where_mask({"$or": [{"charity_name": "YCUK"}, {"charity_name": "Symphony Studios"}]})
+
+        np.testing.assert_array_equal(in_mask, or_mask)
+        self.assertEqual(int(in_mask.sum()), sum(1 for m in self.metadatas if m['charity_name'] != 'Palace for Life'))
+
+    def test_filter_with_no_matches(self):
+        store = self.create_store()
+        result = store.query(query_embeddings=[self.embeddings[0].tolist()], n_results=5,
+                             where={"charity_name": "Unknown"})
+        self.assertEqual(result['ids'], [[]])
+
+    def test_quantized_storage_preserves_ranking(self):
+        for dtype in ("float16", "int8"):
+            with self.subTest(dtype=dtype):
+                shutil.rmtree(self.store_dir, ignore_errors=True)
+                store = self.create_store(dtype)
+                result = store.query(query_embeddings=[self.embeddings[42].tolist()], n_results=3)
+                self.assertEqual(result['ids'][0][0], "doc42")
+                self.assertGreater(1 - result['distances'][0][0], 0.99)
+
+    def test_persist_and_load(self):
+        self.create_store().flush()
+
+        loaded = NumpyVectorStore.load(self.store_dir)
+
+        self.assertEqual(loaded.count(), 200)
+        self.assertIsInstance(loaded._matrix, np.memmap)
+        result = loaded.query(query_embeddings=[self.embeddings[17].tolist()], n_results=1)
+        self.assertEqual(result['ids'][0], ["doc17"])
+
+    def test_get_delete_and_upsert(self):
+        store = self.create_store()
+
+        store.delete(ids=["doc1", "doc2"])
+        self.assertEqual(store.count(), 198)
+        self.assertEqual(store.get(ids=["doc1"])['ids'], [])
+
+        store.upsert(ids=["doc3"], embeddings=[self.embeddings[0].tolist()],
+                     documents=["updated"], metadatas=[{'charity_name': 'YCUK'}])
+        fetched = store.get(ids=["doc3"])
+        self.assertEqual(fetched['documents'], ["updated"])
+        self.assertEqual(store.count(), 198)
+
+        with self.assertRaises(ValueError):
+            store.add(ids=["doc3"], embeddings=[self.embeddings[0].tolist()])
+
+    def test_modify_metadata_persists(self):
+        store = self.create_store()
+        store.modify(metadata={"last_sync": "2024-01-01T00:00:00"})
+        store.flush()
+        self.assertEqual(NumpyVectorStore.load(self.store_dir).metadata["last_sync"], "2024-01-01T00:00:00")
+
+    def test_writes_wait_for_flush(self):
+        """Test add/upsert/delete stay in memory and flush writes them once"""
+        store = NumpyVectorStore.load_or_create(self.store_dir)
+        mtime = os.path.getmtime(os.path.join(store.path, "records.json"))
+
+        for start in range(0, 200, 50):
+            store.add(ids=self.ids[start:start + 50], embeddings=self.embeddings[start:start + 50],
+                      documents=self.documents[start:start + 50], metadatas=self.metadatas[start:start + 50])
+        store.delete(ids=["doc0"])
+        self.assertEqual(NumpyVectorStore.load(self.store_dir).count(), 0)
+        self.assertEqual(os.path.getmtime(os.path.join(store.path, "records.json")), mtime)
+
+        store.flush()
+        self.assertEqual(NumpyVectorStore.load(self.store_dir).count(), 199)
+
+        # Nothing pending: flush is a no-op
+        os.remove(os.path.join(store.path, "records.json"))
+        store.flush()
+        self.assertFalse(NumpyVectorStore.exists(self.store_dir))
+
+    def test_paged_appends_grow_geometrically(self):
+        """Test page-by-page loads reallocate O(log n) times and match a single add"""
+        store = NumpyVectorStore(self.store_dir)
+        buffers = set()
+        for start in range(0, 200, 10):
+            store.add(ids=self.ids[start:start + 10], embeddings=self.embeddings[start:start + 10],
+                      documents=self.documents[start:start + 10], metadatas=self.metadatas[start:start + 10])
+            buffers.add(id(store._buffer))
+
+        self.assertLessEqual(len(buffers), 6)
+        np.testing.assert_array_equal(store._matrix, self.create_store()._matrix)
+        result = store.query(query_embeddings=[self.embeddings[123].tolist()], n_results=1)
+        self.assertEqual(result['ids'][0], ["doc123"])
+
+    def test_append_after_load_and_delete(self):
+        """Test appends move a loaded store off its memory map and deletes keep rows aligned"""
+        self.create_store().flush()
+        store = NumpyVectorStore.load(self.store_dir)
+        store.delete(ids=["doc0"])
+        store.upsert(ids=["doc1"], embeddings=[self.embeddings[5].tolist()])
+        store.add(ids=["new"], embeddings=[self.embeddings[0].tolist()])
+
+        self.assertNotIsInstance(store._matrix, np.memmap)
+        self.assertEqual(store.count(), 200)
+        result = store.query(query_embeddings=[self.embeddings[0].tolist()], n_results=1)
+        self.assertEqual(result['ids'][0], ["new"])
+        store.flush()
+        reloaded = NumpyVectorStore.load(self.store_dir)
+        self.assertEqual(reloaded.count(), 200)
+        result = reloaded.query(query_embeddings=[self.embeddings[5].tolist()], n_results=2)
+        self.assertEqual(sorted(result['ids'][0]), ["doc1", "doc5"])
+
+    def test_rejects_unknown_dtype(self):
+        with self.assertRaises(ValueError):
+            NumpyVectorStore(self.store_dir, dtype="float64")
+
+
+class FakeEmbeddings:
+    """Bag-of-letters embeddings, enough to make similar texts score higher"""
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        vector = [0.0] * 26
+        for c in text.lower():
+            if c.isalpha():
+                vector[ord(c) - ord('a')] += 1.0
+        return vector
+
+
+@unittest.skipUnless(LANGCHAIN_AVAILABLE, "needs langchain_core")
+class TestNumpyLangChainStore(unittest.TestCase):
+    """Test cases for the LangChain adapter over NumpyVectorStore"""
+
+    def setUp(self):
+        from impact.advanced.numpy_langchain import NumpyLangChainStore
+        self.store_dir = tempfile.mkdtemp()
+        self.store = NumpyVectorStore(self.store_dir)
+        self.vectorstore = NumpyLangChainStore(self.store, FakeEmbeddings())
+        self.vectorstore.add_texts(
+            ["I feel confident", "I made friends", "I feel confident now"],
+            metadatas=[{'charity_name': 'YCUK'}, {'charity_name': 'YCUK'}, {'charity_name': 'Palace for Life'}],
+            ids=["r1", "r2", "r3"]
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.store_dir)
+
+    def test_relevance_search_reads_the_numpy_store(self):
+        results = self.vectorstore.similarity_search_with_relevance_scores("confident", k=2)
+        self.assertEqual({doc.metadata['response_id'] for doc, _ in results}, {"r1", "r3"})
+        self.assertTrue(all(0.0 <= score <= 1.0 for _, score in results))
+        self.assertEqual(self.vectorstore._collection.count(), 3)
+
+    def test_filter_and_retriever(self):
+        docs = self.vectorstore.similarity_search("confident", k=3, filter={'charity_name': 'YCUK'})
+        self.assertEqual([doc.metadata['response_id'] for doc in docs][0], "r1")
+        self.assertNotIn("r3", [doc.metadata['response_id'] for doc in docs])
+
+        retrieved = self.vectorstore.as_retriever(search_kwargs={"k": 1}).invoke("friends")
+        self.assertEqual(retrieved[0].page_content, "I made friends")
+
+    def test_get_and_delete(self):
+        self.assertEqual(sorted(self.vectorstore.get()["ids"]), ["r1", "r2", "r3"])
+        self.vectorstore.delete(["r2"])
+        self.assertEqual(NumpyVectorStore.load(self.store_dir).count(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+"""
+Unit tests for the ONNX embedding backend
+Pooling and encode plumbing always run; the parity tests export
+all-MiniLM-L6-v2 and compare it with PyTorch when ONNX_PARITY_TEST is set
+(needs torch, sentence-transformers and onnxruntime, and downloads the model)
+"""
+import unittest
+import os
+import sys
+import tempfile
+import importlib.util
+from types import SimpleNamespace
+
+import numpy as np
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from impact.shared.utils.onnx_encoder import (
+    OnnxEncoder, mean_pool, l2_normalize, cosine_agreement, load_embedding_model,
+    export_onnx, verify_export, VERIFY_TEXTS, MIN_COSINE, DEFAULT_MODEL
+)
+
+PARITY_DEPENDENCIES = all(
+    importlib.util.find_spec(name) for name in ("torch", "sentence_transformers", "onnxruntime")
+)
+
+
+class FakeTokenizer:
+    """Pads to the longest text; one token per character"""
+
+    def __init__(self):
+        self.seen = []
+
+    def encode_batch(self, texts):
+        self.seen.extend(texts)
+        width = max(len(t) for t in texts)
+        return [
+            SimpleNamespace(
+                ids=[ord(c) for c in t] + [0] * (width - len(t)),
+                type_ids=[0] * width,
+                attention_mask=[1] * len(t) + [0] * (width - len(t))
+            )
+            for t in texts
+        ]
+
+
+class FakeSession:
+    """Token embedding = [id, 1]; padding tokens get a large value that pooling must ignore"""
+
+    def __init__(self):
+        self.feeds = []
+
+    def run(self, outputs, feed):
+        self.feeds.append(feed)
+        ids = feed["input_ids"].astype(np.float32)
+        ids[feed["attention_mask"] == 0] = 1e6
+        return [np.stack([ids, np.ones_like(ids)], axis=-1)]
+
+
+def fake_encoder(normalize=True, input_names=("input_ids", "attention_mask", "token_type_ids")):
+    encoder = OnnxEncoder.__new__(OnnxEncoder)
+    encoder.tokenizer = FakeTokenizer()
+    encoder.session = FakeSession()
+    encoder.input_names = set(input_names)
+    encoder.normalize = normalize
+    return encoder
+
+
+class TestOnnxEncoder(unittest.TestCase):
+    """Test cases for pooling and the encode path"""
+
+    def test_mean_pool_ignores_padding(self):
+        """Test padded positions do not contribute to the mean"""
+        tokens = np.array([[[1.0, 2.0], [3.0, 4.0], [100.0, 100.0]]])
+        mask = np.array([[1, 1, 0]])
+        np.testing.assert_allclose(mean_pool(tokens, mask), [[2.0, 3.0]])
+
+    def test_normalize_and_agreement(self):
+        """Test unit-length rows and row-wise cosine"""
+        vectors = l2_normalize(np.array([[3.0, 4.0], [0.0, 2.0]]))
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), [1.0, 1.0])
+        agreement = cosine_agreement([[1.0, 0.0], [1.0, 1.0]], [[2.0, 0.0], [1.0, -1.0]])
+        np.testing.assert_allclose(agreement, [1.0, 0.0], atol=1e-6)
+
+    def test_encode_order_and_pooling(self):
+        """Test batches are pooled over real tokens and returned in input order"""
+        encoder = fake_encoder(normalize=False)
+        texts = ["ab", "a", "abc", "b"]
+        result = encoder.encode(texts, batch_size=3)
+
+        expected = [[np.mean([ord(c) for c in t]), 1.0] for t in texts]
+        np.testing.assert_allclose(result, expected)
+        self.assertEqual(len(encoder.session.feeds), 2)
+
+    def test_encode_matches_sentence_transformers_conventions(self):
+        """Test inputs are stripped, token_type_ids only sent when the graph takes them, output normalized"""
+        encoder = fake_encoder(input_names=("input_ids", "attention_mask"))
+        result = encoder.encode("  hi  ")
+
+        self.assertEqual(set(encoder.tokenizer.seen), {"hi"})
+        self.assertNotIn("token_type_ids", encoder.session.feeds[0])
+        self.assertEqual(result.shape, (2,))
+        self.assertAlmostEqual(float(np.linalg.norm(result)), 1.0, places=6)
+
+    def test_unknown_backend(self):
+        """Test an unknown backend name is rejected"""
+        with self.assertRaises(ValueError):
+            load_embedding_model(DEFAULT_MODEL, backend="tensorflow")
+
+
+@unittest.skipUnless(PARITY_DEPENDENCIES and os.getenv("ONNX_PARITY_TEST"),
+                     "needs torch, sentence-transformers, onnxruntime and ONNX_PARITY_TEST")
+class TestOnnxParity(unittest.TestCase):
+    """Exported model against the PyTorch model"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.model_dir = export_onnx(DEFAULT_MODEL, cls.tmp.name)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_int8_within_tolerance(self):
+        """Test int8 embeddings stay within MIN_COSINE of PyTorch"""
+        self.assertGreaterEqual(verify_export(DEFAULT_MODEL, self.model_dir), MIN_COSINE)
+
+    def test_fp32_matches(self):
+        """Test the unquantized export reproduces PyTorch"""
+        worst = verify_export(DEFAULT_MODEL, self.model_dir, min_cosine=0.9999, quantized=False)
+        self.assertGreaterEqual(worst, 0.9999)
+
+    def test_shape_and_norm(self):
+        """Test 384-dimensional unit vectors, one per input"""
+        vectors = OnnxEncoder(self.model_dir).encode(VERIFY_TEXTS)
+        self.assertEqual(vectors.shape, (len(VERIFY_TEXTS), 384))
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Unit tests for ParameterCache
+Tests normalized keys, catalog versioning, LRU eviction and persistence
+"""
+import unittest
+import os
+import sys
+import tempfile
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from impact.shared.utils.parameter_cache import ParameterCache
+from impact.shared.utils.question_catalog import QuestionCatalog
+
+
+PARAMS = {"charity_name": "YCUK", "age_group": None, "gender": "Female", "themes": ["confidence"]}
+
+
+class TestParameterCache(unittest.TestCase):
+    """Test cases for ParameterCache"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "parameters.sqlite3")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_normalized_question_hits(self):
+        """Test case, whitespace and trailing punctuation share an entry"""
+        cache = ParameterCache("test")
+        cache.put("How do YCUK programs help girls?", "v1", PARAMS)
+        self.assertEqual(cache.get("  how do ycuk programs   help girls ", "v1"), PARAMS)
+        self.assertIsNone(cache.get("How do YCUK programs help boys?", "v1"))
+        self.assertEqual((cache.stats["hits"], cache.stats["misses"]), (1, 1))
+
+    def test_catalog_version_is_part_of_key(self):
+        """Test a new catalog version misses"""
+        cache = ParameterCache("test")
+        cache.put("question", "v1", PARAMS)
+        self.assertIsNone(cache.get("question", "v2"))
+
+    def test_returned_parameters_are_copies(self):
+        """Test callers cannot mutate the cached entry"""
+        cache = ParameterCache("test")
+        cache.put("question", "v1", PARAMS)
+        cache.get("question", "v1")["gender"] = "Male"
+        self.assertEqual(cache.get("question", "v1")["gender"], "Female")
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted"""
+        cache = ParameterCache("test", max_entries=2)
+        cache.put("a", "v1", {"themes": ["a"]})
+        cache.put("b", "v1", {"themes": ["b"]})
+        cache.get("a", "v1")
+        cache.put("c", "v1", {"themes": ["c"]})
+        self.assertIsNone(cache.get("b", "v1"))
+        self.assertIsNotNone(cache.get("a", "v1"))
+        self.assertEqual((len(cache), cache.stats["evictions"]), (2, 1))
+
+    def test_persistence(self):
+        """Test entries survive a restart and stay bounded and namespaced"""
+        cache = ParameterCache("test", self.path, max_entries=2)
+        for name in ["a", "b", "c"]:
+            cache.put(name, "v1", {"themes": [name]})
+        cache.close()
+
+        reopened = ParameterCache("test", self.path, max_entries=2)
+        self.assertEqual(reopened.get("c", "v1"), {"themes": ["c"]})
+        self.assertIsNone(reopened.get("a", "v1"))
+        self.assertEqual(len(reopened), 2)
+        reopened.close()
+
+        other = ParameterCache("other", self.path)
+        self.assertEqual(len(other), 0)
+        other.close()
+
+
+class TestContextualVersion(unittest.TestCase):
+    """Test cases for QuestionCatalog.contextual_version"""
+
+    def test_only_contextual_questions_change_version(self):
+        """Test non-contextual edits keep cached parameters valid"""
+        rows = [
+            {"question_id": "q1", "question_text": "How confident do you feel?", "outcome_measured": "contextual"},
+            {"question_id": "q2", "question_text": "Age?", "outcome_measured": "demographic"},
+        ]
+        catalog = QuestionCatalog(lambda validator: ([dict(r) for r in rows], None), ttl_seconds=0)
+        version = catalog.contextual_version()
+
+        rows[1]["question_text"] = "What is your age?"
+        self.assertEqual(catalog.contextual_version(), version)
+
+        rows[0]["question_text"] = "How confident do you feel now?"
+        self.assertNotEqual(catalog.contextual_version(), version)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+Unit tests for QuestionCatalog
+Tests TTL caching, conditional revalidation, derived structures and stale fallback
+"""
+import unittest
+import os
+import sys
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from impact.shared.utils.question_catalog import QuestionCatalog, describe_questions
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeLoader:
+    """Serves a mutable question list with an ETag that changes with it"""
+
+    def __init__(self, questions):
+        self.questions = questions
+        self.etag = '"v1"'
+        self.calls = []
+        self.fail = False
+
+    def __call__(self, validator):
+        self.calls.append(validator)
+        if self.fail:
+            raise ConnectionError("supabase unavailable")
+        if validator == self.etag:
+            return None, validator
+        return [dict(q) for q in self.questions], self.etag
+
+
+class TestQuestionCatalog(unittest.TestCase):
+    """Test cases for QuestionCatalog"""
+
+    def setUp(self):
+        self.loader = FakeLoader([
+            {'question_id': 'c1', 'question_text': 'How old are you?', 'outcome_measured': 'contextual',
+             'mcq_options': ['12-14', '15-17']},
+            {'question_id': 'o1', 'question_text': 'How confident do you feel?', 'outcome_measured': 'confidence',
+             'mcq_options': None},
+        ])
+        self.clock = FakeClock()
+        self.catalog = QuestionCatalog(self.loader, ttl_seconds=60, clock=self.clock)
+
+    def test_served_from_memory_within_ttl(self):
+        """Test repeated access within the TTL does not call the loader"""
+        self.catalog.by_id()
+        self.catalog.contextual_description()
+        self.catalog.questions()
+        self.assertEqual(len(self.loader.calls), 1)
+        self.assertEqual(self.catalog.stats['hits'], 2)
+
+    def test_derived_structures(self):
+        """Test question map, contextual list and descriptions"""
+        self.assertEqual(set(self.catalog.by_id()), {'c1', 'o1'})
+        self.assertEqual([q['question_id'] for q in self.catalog.contextual()], ['c1'])
+        self.assertEqual(self.catalog.contextual_description(), "- c1: How old are you?")
+        self.assertIn("(Options: ['12-14', '15-17'])", self.catalog.contextual_description(include_options=True))
+
+    def test_not_modified_keeps_derived(self):
+        """Test revalidation with an unchanged ETag keeps derived structures"""
+        by_id = self.catalog.by_id()
+        version = self.catalog.version
+
+        self.clock.now = 61
+        self.assertIs(self.catalog.by_id(), by_id)
+        self.assertEqual(self.loader.calls, [None, '"v1"'])
+        self.assertEqual(self.catalog.version, version)
+        self.assertEqual(self.catalog.stats['not_modified'], 1)
+
+    def test_change_rebuilds_derived(self):
+        """Test a changed table is reloaded and derived structures are rebuilt"""
+        version = self.catalog.version
+        calls = []
+        self.catalog.derived('schema', lambda questions: calls.append(1) or len(questions))
+
+        self.loader.questions.append({'question_id': 'c2', 'question_text': 'Gender?',
+                                      'outcome_measured': 'contextual', 'mcq_options': None})
+        self.loader.etag = '"v2"'
+        self.clock.now = 61
+
+        self.assertEqual(self.catalog.derived('schema', lambda questions: calls.append(1) or len(questions)), 3)
+        self.assertEqual(len(calls), 2)
+        self.assertNotEqual(self.catalog.version, version)
+        self.assertIn('c2', self.catalog.by_id())
+
+    def test_stale_copy_served_on_error(self):
+        """Test loader failures keep the last good catalog"""
+        self.catalog.by_id()
+        self.loader.fail = True
+        self.clock.now = 61
+
+        self.assertEqual(set(self.catalog.by_id()), {'c1', 'o1'})
+        self.assertEqual(self.catalog.stats['errors'], 1)
+
+        # The failure also starts a new TTL window
+        self.catalog.by_id()
+        self.assertEqual(self.catalog.stats['errors'], 1)
+
+    def test_invalidate(self):
+        """Test invalidate forces revalidation"""
+        self.catalog.by_id()
+        self.catalog.invalidate()
+        self.catalog.by_id()
+        self.assertEqual(len(self.loader.calls), 2)
+
+    def test_describe_questions(self):
+        """Test description formatting"""
+        self.assertEqual(describe_questions([]), "")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+"""
+Unit tests for rank fusion helpers
+Tests reciprocal-rank fusion and weighted score fusion
+"""
+import unittest
+import os
+import sys
+import importlib.util
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# The config module requires these; no network calls are made
+for name in ("SUPABASE_URL", "SUPABASE_KEY", "GOOGLE_API_KEY"):
+    os.environ.setdefault(name, "test")
+
+from impact.shared.utils.rank_fusion import reciprocal_rank_fusion, weighted_score_fusion
+
+LANGCHAIN_AVAILABLE = importlib.util.find_spec("langchain_core") is not None
+
+
+class TestRankFusion(unittest.TestCase):
+    """Test cases for rank fusion"""
+
+    def test_rrf_rewards_agreement(self):
+        """Test a document ranked well by both legs beats single-leg winners"""
+        dense = ['a', 'b', 'c']
+        lexical = ['d', 'b', 'a']
+        fused = [key for key, _ in reciprocal_rank_fusion([dense, lexical])]
+        self.assertEqual(fused[:2], ['a', 'b'])
+        self.assertEqual(set(fused), {'a', 'b', 'c', 'd'})
+
+    def test_rrf_scores(self):
+        """Test RRF score formula"""
+        fused = dict(reciprocal_rank_fusion([['a'], ['a']], k=60))
+        self.assertAlmostEqual(fused['a'], 2 / 61)
+
+    def test_rrf_weights(self):
+        """Test weights shift the fused order towards one leg"""
+        fused = reciprocal_rank_fusion([['a', 'b'], ['b', 'a']], weights=[1.0, 2.0])
+        self.assertEqual(fused[0][0], 'b')
+
+    def test_weight_count_mismatch(self):
+        """Test one weight is required per leg"""
+        with self.assertRaises(ValueError):
+            reciprocal_rank_fusion([['a'], ['b']], weights=[1.0])
+
+    def test_weighted_score_fusion(self):
+        """Test scores on different scales are normalized before combining"""
+        dense = [('a', 0.9), ('b', 0.5)]
+        lexical = [('b', 12.0), ('c', 3.0)]
+        fused = dict(weighted_score_fusion([dense, lexical]))
+        self.assertAlmostEqual(fused['a'], 1.0)
+        self.assertAlmostEqual(fused['b'], 1.0)
+        self.assertAlmostEqual(fused['c'], 0.0)
+
+    def test_empty_legs(self):
+        """Test empty legs are ignored"""
+        self.assertEqual(reciprocal_rank_fusion([[], ['a']])[0][0], 'a')
+        self.assertEqual(weighted_score_fusion([[], [('a', 1.0)]])[0][0], 'a')
+
+
+@unittest.skipUnless(LANGCHAIN_AVAILABLE, "needs langchain_core")
+class TestHybridDocumentKey(unittest.TestCase):
+    """Test cases for how the hybrid retriever identifies documents across legs"""
+
+    def test_same_text_different_ids_stay_separate(self):
+        from langchain_core.documents import Document
+        from impact.advanced.hybrid_retriever import document_key
+
+        yes_a = Document(page_content="Selected: Yes", metadata={'response_id': "1", 'charity_name': 'YCUK'})
+        yes_b = Document(page_content="Selected: Yes", metadata={'response_id': "2", 'charity_name': 'Palace for Life'})
+        self.assertNotEqual(document_key(yes_a), document_key(yes_b))
+
+    def test_fallbacks(self):
+        from langchain_core.documents import Document
+        from impact.advanced.hybrid_retriever import document_key
+
+        by_metadata = Document(page_content="Selected: Yes", metadata={'response_id': "7"})
+        self.assertEqual(document_key(by_metadata), "id:7")
+
+        no_id = Document(page_content="Selected: Yes", metadata={'question_text': 'Did you enjoy it?'})
+        self.assertEqual(document_key(no_id), document_key(Document(page_content="Selected: Yes",
+                                                                    metadata={'question_text': 'Did you enjoy it?'})))
+
+    def test_chroma_style_store_merges_legs(self):
+        """Test documents ingested by VectorStoreManager match across legs of a Chroma-like store"""
+        from langchain_core.documents import Document
+        from langchain_core.vectorstores import VectorStore
+        from impact.advanced.hybrid_retriever import HybridRetriever
+        from impact.advanced.vector_store import VectorStoreManager
+
+        rows = [
+            {'response_id': 1, 'response_value': 'I feel much more confident now', 'charity_name': 'YCUK'},
+            {'response_id': 2, 'response_value': 'I feel much more confident now', 'charity_name': 'Palace for Life'},
+            {'response_id': 3, 'response_value': 'I made lots of new friends', 'charity_name': 'YCUK'},
+        ]
+        prepared = VectorStoreManager.prepare_documents(None, rows)
+
+        class ChromaLike(VectorStore):
+            """Mirrors langchain's Chroma wrapper: ids only from get(), never on returned Documents"""
+
+            def get(self, include=None):
+                return {"ids": [doc['id'] for doc in prepared], "documents": [doc['text'] for doc in prepared],
+                        "metadatas": [doc['metadata'] for doc in prepared]}
+
+            def similarity_search_with_relevance_scores(self, query, k=4, **kwargs):
+                return [(Document(page_content=doc['text'], metadata=doc['metadata']), 0.9 - 0.1 * rank)
+                        for rank, doc in enumerate(prepared[:k])]
+
+            def similarity_search(self, query, k=4, **kwargs):
+                return [doc for doc, _ in self.similarity_search_with_relevance_scores(query, k)]
+
+            @classmethod
+            def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+                raise NotImplementedError
+
+            def add_texts(self, texts, metadatas=None, **kwargs):
+                raise NotImplementedError
+
+        retriever = HybridRetriever.from_vectorstore(ChromaLike(), k=3, fetch_k=3)
+        docs = retriever.invoke("confident")
+        self.assertEqual(sorted(doc.metadata['response_id'] for doc in docs), ["1", "2", "3"])
+
+    def test_fusion_keeps_each_participants_metadata(self):
+        import tempfile
+        import shutil
+        from impact.advanced.numpy_vector_store import NumpyVectorStore
+        from impact.advanced.numpy_langchain import NumpyLangChainStore
+        from impact.advanced.hybrid_retriever import HybridRetriever
+
+        class ConstantEmbeddings:
+            def embed_documents(self, texts):
+                return [[1.0, float(len(text))] for text in texts]
+
+            def embed_query(self, text):
+                return [1.0, float(len(text))]
+
+        store_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, store_dir)
+        vectorstore = NumpyLangChainStore(NumpyVectorStore(store_dir), ConstantEmbeddings())
+        vectorstore.add_texts(["Selected: Yes", "Selected: Yes", "Selected: No"],
+                              metadatas=[{'charity_name': 'YCUK'}, {'charity_name': 'Palace for Life'},
+                                         {'charity_name': 'YCUK'}],
+                              ids=["1", "2", "3"])
+
+        retriever = HybridRetriever.from_vectorstore(vectorstore, k=3, fetch_k=3)
+        docs = retriever.invoke("Selected: Yes")
+        yes = [doc for doc in docs if doc.page_content == "Selected: Yes"]
+        self.assertEqual({doc.metadata['charity_name'] for doc in yes}, {'YCUK', 'Palace for Life'})
+
+
+if __name__ == '__main__':
+    unittest.main()
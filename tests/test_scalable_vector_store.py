@@ -0,0 +1,107 @@
+"""
+Unit tests for ScalableVectorStoreManager's pipelined diff and write stages
+Runs against the NumPy backend with a deterministic stand-in encoder
+"""
+import unittest
+import os
+import sys
+import hashlib
+import importlib.util
+import tempfile
+import shutil
+import threading
+
+import numpy as np
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# The config module requires these; no network calls are made
+for name in ("SUPABASE_URL", "SUPABASE_KEY", "GOOGLE_API_KEY"):
+    os.environ.setdefault(name, "test")
+
+CHROMADB_AVAILABLE = importlib.util.find_spec("chromadb") is not None
+
+
+class HashEncoder:
+    """Maps each text to a fixed pseudo-random vector and records encoded texts"""
+
+    def __init__(self):
+        self.texts = []
+
+    def encode(self, texts, **kwargs):
+        self.texts.extend(texts)
+        return np.stack([
+            np.random.default_rng(int(hashlib.md5(text.encode()).hexdigest()[:8], 16)).normal(size=8)
+            for text in texts
+        ]).astype(np.float32)
+
+
+def row(response_id, value, updated_at, deleted_at=None):
+    return {
+        'response_id': response_id,
+        'response_value': value,
+        'charity_name': 'Charity',
+        'age_group': '18-25',
+        'question_id': 1,
+        'created_at': '2024-01-01T00:00:00',
+        'updated_at': updated_at,
+        'deleted_at': deleted_at
+    }
+
+
+@unittest.skipUnless(CHROMADB_AVAILABLE, "needs chromadb")
+class TestPipelinedWrites(unittest.TestCase):
+    """Test pages diffed ahead of earlier writes still apply in order"""
+
+    def setUp(self):
+        from impact.advanced.scalable_vector_store import ScalableVectorStoreManager
+        from impact.advanced.numpy_vector_store import NumpyVectorStore
+
+        self.store_dir = tempfile.mkdtemp()
+        # Skip __init__: it loads the embedding model and worker pool
+        self.manager = ScalableVectorStoreManager.__new__(ScalableVectorStoreManager)
+        self.manager.collection = NumpyVectorStore(self.store_dir)
+        self.manager.encoder = HashEncoder()
+        self.manager.store_lock = threading.RLock()
+        self.manager.last_page_timing = {}
+
+    def tearDown(self):
+        shutil.rmtree(self.store_dir)
+
+    def test_delete_in_later_page_after_pending_upsert(self):
+        """Test a soft delete is applied even if its page was diffed before the upsert was written"""
+        first = self.manager.embed_page([row(1, "first version of the answer", "2024-01-02")])
+        second = self.manager.embed_page([row(1, "first version of the answer", "2024-01-03", deleted_at="2024-01-03")])
+        self.assertEqual(second['tombstones'], [])
+
+        self.manager.write_page(first)
+        self.manager.write_page(second)
+
+        self.assertEqual(self.manager.collection.get(ids=["1"])['ids'], [])
+        self.assertEqual(self.manager.last_page_timing['deleted'], 1)
+
+    def test_repeated_row_is_not_rewritten(self):
+        """Test a row re-emitted by the overlap rewind is skipped once the earlier page is written"""
+        first = self.manager.embed_page([row(1, "an answer", "2024-01-02")])
+        second = self.manager.embed_page([row(1, "an answer", "2024-01-02")])
+
+        self.assertEqual(self.manager.write_page(first), 1)
+        self.assertEqual(self.manager.write_page(second), 0)
+        self.assertEqual(self.manager.last_page_timing['skipped'], 1)
+
+    def test_restored_row_is_embedded_at_write(self):
+        """Test a row the embed stage skipped is encoded when an earlier page changed it"""
+        self.manager.write_page(self.manager.embed_page([row(1, "an answer", "2024-01-02")]))
+
+        deleted = self.manager.embed_page([row(1, "an answer", "2024-01-03", deleted_at="2024-01-03")])
+        restored = self.manager.embed_page([row(1, "an answer", "2024-01-02")])
+        self.assertEqual(restored['upserts'], [])
+
+        self.manager.write_page(deleted)
+        self.assertEqual(self.manager.write_page(restored), 1)
+        self.assertEqual(self.manager.collection.get(ids=["1"])['documents'], ["an answer"])
+
+
+if __name__ == '__main__':
+    unittest.main()
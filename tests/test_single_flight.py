@@ -0,0 +1,127 @@
+"""
+Unit tests for request coalescing
+Tests sync and async single-flight sharing, error propagation and key normalization
+"""
+import unittest
+import os
+import sys
+import time
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from impact.shared.utils.single_flight import SingleFlight, AsyncSingleFlight, flight_key
+
+
+class TestFlightKey(unittest.TestCase):
+    """Test cases for flight_key"""
+
+    def test_normalization(self):
+        """Test case, whitespace and trailing punctuation are ignored"""
+        self.assertEqual(flight_key("How do programs build confidence?"),
+                         flight_key("  how do programs   build CONFIDENCE "))
+        self.assertNotEqual(flight_key("confidence"), flight_key("resilience"))
+
+    def test_filters(self):
+        """Test filters are part of the key regardless of dict order"""
+        self.assertEqual(flight_key("q", {"a": 1, "b": [2]}), flight_key("q", {"b": [2], "a": 1}))
+        self.assertNotEqual(flight_key("q", {"gender": "Male"}), flight_key("q", {"gender": "Female"}))
+
+
+class TestSingleFlight(unittest.TestCase):
+    """Test cases for the thread-based SingleFlight"""
+
+    def test_concurrent_calls_share_one_execution(self):
+        """Test identical in-flight calls run the function once"""
+        flights = SingleFlight()
+        calls = []
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            release.wait(5)
+            return {"answer": 42}
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = [pool.submit(flights.do, "key", compute) for _ in range(8)]
+            while flights.get_stats()["requests"] < 8:
+                time.sleep(0.01)
+            release.set()
+            results = [f.result() for f in futures]
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(r is results[0] for r in results))
+        stats = flights.get_stats()
+        self.assertEqual((stats["executions"], stats["collapsed"], stats["in_flight"]), (1, 7, 0))
+
+    def test_sequential_calls_are_not_cached(self):
+        """Test a finished flight is not reused"""
+        flights = SingleFlight()
+        self.assertEqual([flights.do("key", lambda: i) for i in range(3)], [0, 1, 2])
+        self.assertEqual(flights.get_stats()["collapsed"], 0)
+
+    def test_errors_reach_every_caller(self):
+        """Test followers receive the leader's exception"""
+        flights = SingleFlight()
+        release = threading.Event()
+
+        def fail():
+            release.wait(5)
+            raise ValueError("gemini down")
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            futures = [pool.submit(flights.do, "key", fail) for _ in range(3)]
+            while flights.get_stats()["requests"] < 3:
+                time.sleep(0.01)
+            release.set()
+            for future in futures:
+                with self.assertRaises(ValueError):
+                    future.result()
+
+
+class TestAsyncSingleFlight(unittest.TestCase):
+    """Test cases for AsyncSingleFlight"""
+
+    def test_concurrent_calls_share_one_execution(self):
+        """Test identical coroutines await one task"""
+        calls = []
+
+        async def compute():
+            calls.append(1)
+            run = len(calls)
+            await asyncio.sleep(0.01)
+            return run
+
+        async def scenario():
+            flights = AsyncSingleFlight()
+            results = await asyncio.gather(*[flights.do(flight_key("Same question?"), compute) for _ in range(10)],
+                                           flights.do(flight_key("other"), compute))
+            return results, flights.get_stats()
+
+        results, stats = asyncio.run(scenario())
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(results[:10], [1] * 10)
+        self.assertEqual((stats["executions"], stats["collapsed"], stats["in_flight"]), (2, 9, 0))
+
+    def test_cancelled_caller_does_not_cancel_others(self):
+        """Test a disconnecting client leaves the shared computation running"""
+        async def compute():
+            await asyncio.sleep(0.02)
+            return "answer"
+
+        async def scenario():
+            flights = AsyncSingleFlight()
+            first = asyncio.ensure_future(flights.do("key", compute))
+            second = asyncio.ensure_future(flights.do("key", compute))
+            await asyncio.sleep(0)
+            first.cancel()
+            return await second
+
+        self.assertEqual(asyncio.run(scenario()), "answer")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+Unit tests for streaming wire formats
+Tests SSE and NDJSON encoding of (event, data) sequences
+"""
+import unittest
+import os
+import sys
+import json
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from impact.shared.utils.streaming import (
+    sse_event, ndjson_line, encode_stream, media_type_for, SSE_MEDIA_TYPE, NDJSON_MEDIA_TYPE
+)
+
+
+class TestStreaming(unittest.TestCase):
+    """Test cases for streaming helpers"""
+
+    def test_sse_event(self):
+        """Test SSE framing keeps multi-line text on one data line"""
+        encoded = sse_event("token", {"text": "line one\nline two"})
+        self.assertTrue(encoded.endswith("\n\n"))
+        event_line, data_line = encoded.strip("\n").split("\n")
+        self.assertEqual(event_line, "event: token")
+        self.assertEqual(json.loads(data_line[len("data: "):]), {"text": "line one\nline two"})
+
+    def test_ndjson_line(self):
+        """Test NDJSON framing is one object per line"""
+        encoded = ndjson_line("done", {"evidence_count": 3})
+        self.assertEqual(encoded.count("\n"), 1)
+        self.assertEqual(json.loads(encoded), {"event": "done", "data": {"evidence_count": 3}})
+
+    def test_encode_stream_is_lazy(self):
+        """Test events are encoded as they are produced, evidence first"""
+        produced = []
+
+        def events():
+            for event in ("evidence", "token", "done"):
+                produced.append(event)
+                yield event, {}
+
+        stream = encode_stream(events(), "ndjson")
+        first = next(stream)
+        self.assertEqual(json.loads(first)["event"], "evidence")
+        self.assertEqual(produced, ["evidence"])
+        self.assertEqual([json.loads(line)["event"] for line in stream], ["token", "done"])
+
+    def test_media_types(self):
+        """Test format names map to media types and unknown formats are rejected"""
+        self.assertEqual(media_type_for("sse"), SSE_MEDIA_TYPE)
+        self.assertEqual(media_type_for("ndjson"), NDJSON_MEDIA_TYPE)
+        with self.assertRaises(ValueError):
+            media_type_for("xml")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Unit tests for VectorStoreManager.search_similar_batch
+Runs against the NumPy backend with a deterministic stand-in embedding model
+"""
+import unittest
+import os
+import sys
+import hashlib
+import tempfile
+import shutil
+
+import numpy as np
+
+# Add src directory to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+# The config module requires these; no network calls are made
+for name in ("SUPABASE_URL", "SUPABASE_KEY", "GOOGLE_API_KEY"):
+    os.environ.setdefault(name, "test")
+
+from impact.advanced.vector_store import VectorStoreManager
+from impact.advanced.numpy_vector_store import NumpyVectorStore
+
+
+class HashModel:
+    """Maps each text to a fixed pseudo-random vector and counts encode calls"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, texts, **kwargs):
+        self.calls += 1
+        return np.stack([
+            np.random.default_rng(int(hashlib.md5(text.encode()).hexdigest()[:8], 16)).normal(size=16)
+            for text in texts
+        ]).astype(np.float32)
+
+
+class TestSearchSimilarBatch(unittest.TestCase):
+    """Test cases for batched multi-query search"""
+
+    def setUp(self):
+        self.store_dir = tempfile.mkdtemp()
+        self.model = HashModel()
+        texts = [f"survey response {i}" for i in range(60)]
+
+        store = NumpyVectorStore(self.store_dir)
+        store.add(
+            ids=[f"doc{i}" for i in range(60)],
+            embeddings=self.model.encode(texts),
+            documents=texts,
+            metadatas=[{"charity_name": ["YCUK", "Palace for Life"][i % 2], "age_group": "15-17"}
+                       for i in range(60)]
+        )
+
+        self.manager = VectorStoreManager.__new__(VectorStoreManager)
+        self.manager.embedding_model = self.model
+        self.manager.collection = store
+        self.queries = ["building confidence", "making friends", "survey response 7", "leadership"]
+
+    def tearDown(self):
+        shutil.rmtree(self.store_dir)
+
+    def test_batch_matches_single_queries(self):
+        """Test each batch entry equals the per-query result, in query order"""
+        batch = self.manager.search_similar_batch(self.queries, n_results=5)
+        single = [self.manager.search_similar(query, n_results=5) for query in self.queries]
+
+        self.assertEqual(len(batch), len(self.queries))
+        for batch_results, single_results in zip(batch, single):
+            self.assertEqual([r["id"] for r in batch_results], [r["id"] for r in single_results])
+            for b, s in zip(batch_results, single_results):
+                self.assertEqual(b["text"], s["text"])
+                self.assertEqual(b["metadata"], s["metadata"])
+                self.assertAlmostEqual(b["similarity_score"], s["similarity_score"], places=5)
+        self.assertEqual(batch[2][0]["id"], "doc7")
+
+    def test_batch_with_filters(self):
+        """Test filters apply to every query in the batch"""
+        batch = self.manager.search_similar_batch(self.queries, n_results=5, filters={"charity_name": "YCUK"})
+        single = [self.manager.search_similar(q, n_results=5, filters={"charity_name": "YCUK"})
+                  for q in self.queries]
+
+        self.assertEqual([[r["id"] for r in rs] for rs in batch], [[r["id"] for r in rs] for rs in single])
+        for results in batch:
+            self.assertTrue(all(r["metadata"]["charity_name"] == "YCUK" for r in results))
+
+    def test_one_encode_call(self):
+        """Test all queries are embedded together"""
+        calls = self.model.calls
+        self.manager.search_similar_batch(self.queries)
+        self.assertEqual(self.model.calls, calls + 1)
+
+    def test_empty(self):
+        self.assertEqual(self.manager.search_similar_batch([]), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,7 +5,7 @@ Conversational interface with session management and context awareness
 import json
 import sys
 import os
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Iterator, Tuple
 from datetime import datetime
 
 # Add lib directory to path for imports
@@ -35,8 +35,15 @@ def handler(request):
         "message": "How do programs build confidence?",
         "session_id": "user_123",
         "include_context": true,
-        "max_results": 5
+        "max_results": 5,
+        "stream": false
     }
+    
+    With "stream": true the reply is framed as Server-Sent Events (an
+    'evidence' event with the sources and metadata, a 'token' event with the
+    answer, then 'done' or 'error') so clients can share one parser with the
+    advanced server's /chat/stream. This runtime sends the returned body in
+    one piece, so it does not lower time to first byte here.
     """
     
     # Handle CORS for browser requests
@@ -130,6 +137,21 @@ def handler(request):
                 'body': json.dumps(validation_response)
             }
         
+        if body.get('stream'):
+            return {
+                'statusCode': 200,
+                'headers': {
+                    'Content-Type': 'text/event-stream',
+                    'Access-Control-Allow-Origin': '*',
+                    'Cache-Control': 'no-cache',
+                    'X-Accel-Buffering': 'no'
+                },
+                'body': "".join(
+                    sse_event(event, data)
+                    for event, data in stream_chat_events(message, session_id, include_context)
+                )
+            }
+        
         # Process the chat message with error handling
         result = process_chat_message_with_fallback(
             message, session_id, include_context, max_results
@@ -140,17 +162,7 @@ def handler(request):
             'success': True,
             'message': result['answer'],
             'evidence_count': result['evidence_count'],
-            'source_documents': [
-                {
-                    'text': doc.get('text', ''),
-                    'organization': doc.get('organization', 'Unknown'),
-                    'age_group': doc.get('age_group', 'Unknown'),
-                    'gender': doc.get('gender', 'Unknown'),
-                    'question_text': doc.get('question_text', 'Unknown'),
-                    'similarity_score': doc.get('score', 0.0)
-                }
-                for doc in result.get('source_documents', [])
-            ],
+            'source_documents': format_source_documents(result.get('source_documents', [])),
             'metadata': {
                 'organizations': result.get('organizations', []),
                 'age_groups': result.get('age_groups', []),
@@ -301,6 +313,53 @@ def process_chat_message_with_fallback(message: str, session_id: str,
             'error_info': fallback_response.get('error_info', {})
         }
 
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Encode one Server-Sent Event with a single-line JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+def format_source_documents(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Source documents in the shape returned by the chat endpoint"""
+    return [
+        {
+            'text': doc.get('text', ''),
+            'organization': doc.get('organization', 'Unknown'),
+            'age_group': doc.get('age_group', 'Unknown'),
+            'gender': doc.get('gender', 'Unknown'),
+            'question_text': doc.get('question_text', 'Unknown'),
+            'similarity_score': doc.get('score', 0.0)
+        }
+        for doc in documents
+    ]
+
+def stream_chat_events(message: str, session_id: str,
+                       include_context: bool) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Yield (event, data) pairs for a chat reply in the streaming endpoints'
+    event order. The reply is generated in full first, then replayed.
+    """
+    try:
+        result = process_chat_message_with_fallback(message, session_id, include_context, 5)
+        yield 'evidence', {
+            'evidence_count': result['evidence_count'],
+            'source_documents': format_source_documents(result.get('source_documents', [])),
+            'organizations': result.get('organizations', []),
+            'age_groups': result.get('age_groups', []),
+            'genders': result.get('genders', []),
+            'session_id': result.get('session_id', session_id),
+            'turn_number': result.get('turn_number', 1)
+        }
+        yield 'token', {'text': result['answer']}
+        yield 'done', {
+            'evidence_count': result['evidence_count'],
+            'system_type': result.get('system_type', 'conversational_rag'),
+            'timestamp': datetime.now().isoformat()
+        }
+        
+    except Exception as e:
+        # Errors travel in-band, as they do on the streaming endpoints
+        print(f"Chat stream error: {str(e)}")
+        yield 'error', format_user_friendly_error(e, user_query=message)
+
 # GET endpoint for retrieving conversation history
 def get_conversation_history(request, session_id: str):
     """Get conversation history for a session"""
@@ -12,6 +12,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'lib'))
 
 from rag_engine import ServerlessRAGEngine
 from vector_client import VectorStoreFactory
+from single_flight import SingleFlight, flight_key
 from serverless_error_handler import (
     timeout_handler, memory_monitor, retry_handler, graceful_degradation,
     cold_start_optimizer, format_error_response, create_fallback_response,
@@ -22,6 +23,9 @@ from user_friendly_errors import (
     format_validation_error, get_contextual_error_message
 )
 
+# Identical concurrent searches on a warm instance share one engine run
+search_flights = SingleFlight()
+
 @cold_start_optimizer
 @timeout_handler(timeout_seconds=25, error_message="Search request timed out")
 @memory_monitor
@@ -119,7 +123,10 @@ def handler(request):
             max_results = 20
         
         # Process the search query with error handling
-        result = process_search_query_with_fallback(query, filters, max_results)
+        result = search_flights.do(
+            flight_key(query, {'filters': filters, 'max_results': max_results}),
+            lambda: process_search_query_with_fallback(query, filters, max_results)
+        )
         
         # Format response for API
         api_response = {
@@ -143,7 +150,8 @@ def handler(request):
                 'age_groups': result['age_groups'],
                 'genders': result['genders'],
                 'system_type': result['system_type'],
-                'processing_time': result['processing_time']
+                'processing_time': result['processing_time'],
+                'request_coalescing': search_flights.get_stats()
             },
             'filters_applied': filters,
             'timestamp': result.get('timestamp', '')
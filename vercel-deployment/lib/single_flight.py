@@ -0,0 +1,56 @@
+"""
+Request coalescing for serverless handlers
+Serverless counterpart of impact.shared.utils.single_flight (the deployment
+bundle only ships this directory). Concurrent identical requests handled by
+the same warm instance share one computation.
+"""
+import json
+import threading
+import unicodedata
+from typing import Any, Callable, Dict, Optional
+
+
+def flight_key(query: str, filters: Optional[Dict[str, Any]] = None) -> str:
+    """Normalized query (case, whitespace, trailing punctuation) plus canonical filters"""
+    normalized = " ".join(unicodedata.normalize("NFC", query or "").split()).casefold().rstrip("?!. ")
+    return json.dumps([normalized, filters or {}], sort_keys=True, default=str)
+
+
+class SingleFlight:
+    """The first caller for a key runs fn; concurrent callers wait for its result"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Dict[str, Any]] = {}
+        self.stats = {"requests": 0, "executions": 0, "collapsed": 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            self.stats["requests"] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+                self.stats["executions"] += 1
+            else:
+                self.stats["collapsed"] += 1
+
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"in_flight": len(self._calls), **self.stats}
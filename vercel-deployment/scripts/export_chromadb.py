@@ -22,6 +22,10 @@ except ImportError:
     # Fallback configuration if import fails
     VECTOR_DB_PATH = "advanced_rag/vector_db"
     EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+    EMBEDDING_CACHE_PATH = "./cache/embeddings"
+    EMBEDDING_WORKERS = 1
+    EMBEDDING_BACKEND = "torch"
+    ONNX_MODEL_PATH = "./cache/onnx"
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -122,6 +126,40 @@ class ChromaDBExporter:
             logger.error(f"❌ Failed to export documents: {str(e)}")
             return None
     
+    def embed_documents(self, export_data: Dict[str, Any], workers: Optional[int] = None,
+                        missing_only: bool = True) -> int:
+        """
+        Embed exported documents with the current model: those exported without
+        an embedding, or all of them when missing_only is False. Returns the
+        number of documents embedded.
+        """
+        documents = [
+            doc for doc in export_data["documents"]
+            if doc["text"] and (not missing_only or doc["embedding"] is None or len(doc["embedding"]) == 0)
+        ]
+        if not documents:
+            return 0
+        
+        from src.impact.shared.utils.embedding_cache import CachedEncoder
+        from src.impact.shared.utils.embedding_pool import EmbeddingPool
+        from src.impact.shared.utils.onnx_encoder import embedding_loader
+        
+        logger.info(f"🧠 Embedding {len(documents)} documents...")
+        loader = embedding_loader(EMBEDDING_BACKEND, ONNX_MODEL_PATH)
+        # Loading here first also creates the ONNX export before any worker needs it
+        model = loader(EMBEDDING_MODEL)
+        with EmbeddingPool(EMBEDDING_MODEL, workers, loader=loader, model=model) as pool:
+            encoder = CachedEncoder(EMBEDDING_MODEL, EMBEDDING_CACHE_PATH, model=pool)
+            embeddings = encoder.encode([doc["text"] for doc in documents])
+            logger.info(pool.summary())
+            logger.info(encoder.summary())
+        
+        for doc, embedding in zip(documents, embeddings):
+            doc["embedding"] = embedding.tolist()
+        export_data["export_info"]["embedding_dimension"] = int(embeddings.shape[1])
+        
+        return len(documents)
+    
     def save_export_to_file(self, export_data: Dict[str, Any], output_file: str) -> bool:
         """Save export data to JSON file"""
         try:
@@ -311,6 +349,14 @@ class ChromaDBExporter:
 
 def main():
     """Main export function"""
+    import argparse
+    parser = argparse.ArgumentParser(description="Export a ChromaDB collection to JSON")
+    parser.add_argument("--workers", type=int, default=EMBEDDING_WORKERS,
+                        help="Embedding processes (0 = one per CPU)")
+    parser.add_argument("--reembed", action="store_true",
+                        help="Re-embed every document instead of only those exported without an embedding")
+    args = parser.parse_args()
+    
     print("🚀 ChromaDB Export Utility")
     print("=" * 50)
     
@@ -372,6 +418,10 @@ def main():
     
     # Process export
     if export_data:
+        embedded = exporter.embed_documents(export_data, workers=args.workers, missing_only=not args.reembed)
+        if embedded:
+            print(f"🧠 Embedded {embedded} documents")
+        
         # Validate export
         if exporter.validate_export(export_data):
             # Save to file
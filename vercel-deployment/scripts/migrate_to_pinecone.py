@@ -8,7 +8,7 @@ import sys
 import json
 import logging
 import time
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Generator
 from datetime import datetime
 import asyncio
 
@@ -29,14 +29,37 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'lib'))
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+RESPONSE_COLUMNS = """
+    response_id,
+    participant_id,
+    charity_name,
+    age_group,
+    gender,
+    response_value,
+    thematic_tags,
+    embedding,
+    created_at,
+    questions (
+        question_id,
+        question_text,
+        question_type,
+        mcq_options
+    )
+"""
+
+# Records fetched, embedded and upserted per pipeline page
+MIGRATION_PAGE_SIZE = int(os.getenv('INGEST_PAGE_SIZE', '500'))
+
 class PineconeMigrator:
     """Handles migration from Supabase to Pinecone"""
     
-    def __init__(self):
+    def __init__(self, workers: Optional[int] = None):
         self.supabase_client = None
         self.pinecone_client = None
         self.pinecone_index = None
         self.embedding_model = None
+        self.embedding_pool = None
+        self.embedding_encoder = None
         
         # Configuration from environment
         self.supabase_url = os.getenv('SUPABASE_URL')
@@ -46,6 +69,10 @@ class PineconeMigrator:
         self.pinecone_index_name = os.getenv('PINECONE_INDEX_NAME', 'rag-survey-responses')
         self.pinecone_namespace = os.getenv('PINECONE_NAMESPACE', 'production')
         self.google_api_key = os.getenv('GOOGLE_API_KEY')
+        self.embedding_cache_path = os.getenv('EMBEDDING_CACHE_PATH', './cache/embeddings')
+        self.embedding_workers = workers if workers is not None else int(os.getenv('EMBEDDING_WORKERS', '1'))
+        self.embedding_backend = os.getenv('EMBEDDING_BACKEND', 'torch')
+        self.onnx_model_path = os.getenv('ONNX_MODEL_PATH', './cache/onnx')
         
         self.validate_configuration()
     
@@ -99,10 +126,28 @@ class PineconeMigrator:
             self.pinecone_index = self.pinecone_client.Index(self.pinecone_index_name)
             logger.info(f"✅ Pinecone index '{self.pinecone_index_name}' ready")
             
-            # Initialize embedding model
-            from sentence_transformers import SentenceTransformer
-            self.embedding_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-            logger.info("✅ Sentence transformers embeddings initialized")
+            # Initialize embedding model behind the shared on-disk embedding cache
+            from src.impact.shared.utils.embedding_cache import CachedEncoder
+            from src.impact.shared.utils.embedding_pool import EmbeddingPool
+            from src.impact.shared.utils.onnx_encoder import load_embedding_model, embedding_loader
+            self.embedding_model = load_embedding_model(
+                'sentence-transformers/all-MiniLM-L6-v2',
+                self.embedding_backend,
+                self.onnx_model_path
+            )
+            self.embedding_pool = EmbeddingPool(
+                'sentence-transformers/all-MiniLM-L6-v2',
+                self.embedding_workers,
+                loader=embedding_loader(self.embedding_backend, self.onnx_model_path),
+                model=self.embedding_model
+            )
+            self.embedding_encoder = CachedEncoder(
+                'sentence-transformers/all-MiniLM-L6-v2',
+                self.embedding_cache_path,
+                model=self.embedding_pool
+            )
+            logger.info(f"✅ Sentence transformers embeddings initialized "
+                        f"({self.embedding_backend} backend, {self.embedding_pool.workers} workers)")
             
         except ImportError as e:
             logger.error(f"❌ Missing required library: {e}")
@@ -118,23 +163,7 @@ class PineconeMigrator:
             logger.info("📥 Fetching data from Supabase...")
             
             # Query responses with question details
-            query = self.supabase_client.table("responses").select("""
-                response_id,
-                participant_id,
-                charity_name,
-                age_group,
-                gender,
-                response_value,
-                thematic_tags,
-                embedding,
-                created_at,
-                questions (
-                    question_id,
-                    question_text,
-                    question_type,
-                    mcq_options
-                )
-            """)
+            query = self.supabase_client.table("responses").select(RESPONSE_COLUMNS)
             
             if limit:
                 query = query.limit(limit)
@@ -152,15 +181,37 @@ class PineconeMigrator:
             logger.error(f"❌ Failed to fetch Supabase data: {e}")
             raise
     
+    def iter_supabase_pages(self, limit: Optional[int] = None,
+                            page_size: int = MIGRATION_PAGE_SIZE) -> Generator[List[Dict[str, Any]], None, None]:
+        """Fetch survey responses page by page, in response_id order"""
+        fetched = 0
+        while limit is None or fetched < limit:
+            size = page_size if limit is None else min(page_size, limit - fetched)
+            response = (
+                self.supabase_client.table("responses")
+                .select(RESPONSE_COLUMNS)
+                .order("response_id")
+                .range(fetched, fetched + size - 1)
+                .execute()
+            )
+            page = response.data or []
+            if page:
+                logger.info(f"📥 Fetched {len(page)} records from Supabase (offset {fetched})")
+                yield page
+            fetched += len(page)
+            if len(page) < size:
+                break
+    
     def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
         """Generate embeddings for a batch of texts"""
         try:
             logger.info(f"🧠 Generating embeddings for {len(texts)} texts...")
             
-            # Use sentence transformers
-            embeddings = self.embedding_model.encode(texts).tolist()
+            # Use sentence transformers (unchanged texts come from the embedding cache)
+            embeddings = self.embedding_encoder.encode(texts).tolist()
             
             logger.info(f"✅ Generated {len(embeddings)} embeddings")
+            logger.info(self.embedding_encoder.summary())
             return embeddings
             
         except Exception as e:
@@ -208,6 +259,15 @@ class PineconeMigrator:
         logger.info(f"✅ Prepared {len(vectors)} vectors for Pinecone")
         return vectors
     
+    def embed_page(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Embed one page of records and turn it into Pinecone vectors (the pipeline's embed stage)"""
+        records = [record for record in records if record.get('response_value')]
+        if not records:
+            return []
+        
+        embeddings = self.generate_embeddings_batch([record['response_value'] for record in records])
+        return self.prepare_pinecone_vectors(records, embeddings)
+    
     def upsert_to_pinecone(self, vectors: List[Dict[str, Any]], batch_size: int = 100):
         """Upsert vectors to Pinecone in batches"""
         try:
@@ -321,44 +381,46 @@ class PineconeMigrator:
             # Initialize clients
             self.initialize_clients()
             
-            # Fetch data from Supabase
-            supabase_data = self.fetch_supabase_data(limit=sample_size)
+            from src.impact.shared.utils.ingest_pipeline import run_pipeline
+            
+            # Fetch, embed and upsert overlap page by page: the next page
+            # downloads and the previous one is upserted while this one embeds
+            written = {"vectors": 0, "sample": None}
+            
+            def write(vectors: List[Dict[str, Any]]):
+                if not vectors:
+                    return
+                written["vectors"] += len(vectors)
+                if written["sample"] is None:
+                    written["sample"] = vectors[0]
+                if not dry_run:
+                    self.upsert_to_pinecone(vectors)
             
-            if not supabase_data:
+            pipeline = run_pipeline(self.iter_supabase_pages(limit=sample_size), self.embed_page, write)
+            self.embedding_pool.close()
+            logger.info(pipeline.summary())
+            logger.info(self.embedding_pool.summary())
+            record_count = pipeline.stages["fetch"].records
+            
+            if not record_count:
                 logger.error("❌ No data to migrate")
                 return False
             
-            # Prepare texts for embedding
-            texts = []
-            for record in supabase_data:
-                response_text = record.get('response_value', '')
-                if response_text:
-                    texts.append(response_text)
-            
-            if not texts:
+            if not written["vectors"]:
                 logger.error("❌ No valid response texts found")
                 return False
             
-            # Generate embeddings
-            embeddings = self.generate_embeddings_batch(texts)
-            
-            # Prepare vectors
-            vectors = self.prepare_pinecone_vectors(supabase_data, embeddings)
-            
             if dry_run:
+                sample = written["sample"]
                 logger.info("🔍 DRY RUN - Would migrate:")
-                logger.info(f"   Records: {len(supabase_data)}")
-                logger.info(f"   Vectors: {len(vectors)}")
-                logger.info(f"   Sample vector keys: {list(vectors[0].keys()) if vectors else 'None'}")
-                if vectors:
-                    logger.info(f"   Sample metadata keys: {list(vectors[0]['metadata'].keys())}")
+                logger.info(f"   Records: {record_count}")
+                logger.info(f"   Vectors: {written['vectors']}")
+                logger.info(f"   Sample vector keys: {list(sample.keys())}")
+                logger.info(f"   Sample metadata keys: {list(sample['metadata'].keys())}")
                 return True
             
-            # Upsert to Pinecone
-            self.upsert_to_pinecone(vectors)
-            
             # Verify migration
-            success = self.verify_migration(len(supabase_data))
+            success = self.verify_migration(record_count)
             
             if success:
                 # Print summary
@@ -376,11 +438,17 @@ class PineconeMigrator:
 
 def main():
     """Main migration function"""
+    import argparse
+    parser = argparse.ArgumentParser(description="Migrate survey responses from Supabase to Pinecone")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Embedding processes (0 = one per CPU; default EMBEDDING_WORKERS or 1)")
+    args = parser.parse_args()
+    
     print("🚀 Pinecone Migration Tool")
     print("=" * 50)
     
     try:
-        migrator = PineconeMigrator()
+        migrator = PineconeMigrator(workers=args.workers)
         
         # Ask user for migration options
         print("\n🤔 Migration Options:")